@@ -39,3 +39,190 @@ class Config:
     GOOGLE_CSE_ID = os.getenv("GOOGLE_CSE_ID")
     JINA_API_KEY = os.getenv("JINA_API_KEY")
     SCRAPINGANT_API_KEY = os.getenv("SCRAPINGANT_API_KEY")
+
+    # --- Análises Assíncronas (Jobs em Segundo Plano) ---
+    # Número de análises executadas em paralelo por processo e tamanho máximo da fila.
+    ANALYSIS_JOB_WORKERS = int(os.getenv("ANALYSIS_JOB_WORKERS", "4"))
+    ANALYSIS_JOB_MAX_PENDING = int(os.getenv("ANALYSIS_JOB_MAX_PENDING", "32"))
+    # Tempo (em segundos) durante o qual o resultado de um job fica disponível para consulta.
+    ANALYSIS_JOB_RESULT_TTL = int(os.getenv("ANALYSIS_JOB_RESULT_TTL", "3600"))
+    # Número máximo de eventos de progresso guardados por job (os mais antigos são descartados).
+    ANALYSIS_JOB_MAX_EVENTS = int(os.getenv("ANALYSIS_JOB_MAX_EVENTS", "2000"))
+    # Janela (em segundos) em que uma análise guardada com os mesmos dados de entrada é
+    # devolvida em vez de gerar outra ("force_refresh": true ignora-a). 0 desativa.
+    ANALYSIS_REUSE_WINDOW = int(os.getenv("ANALYSIS_REUSE_WINDOW", "21600"))
+    # Intervalo (em segundos) entre comentários de keep-alive no stream de progresso (SSE).
+    SSE_HEARTBEAT_INTERVAL = int(os.getenv("SSE_HEARTBEAT_INTERVAL", "15"))
+
+    # --- Análises em Lote (/api/analyze/batch) ---
+    # Número máximo de análises por lote.
+    BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "50"))
+    # Buscas profundas (uma por consulta distinta) em simultâneo na pesquisa partilhada do lote.
+    BATCH_SEARCH_CONCURRENCY = int(os.getenv("BATCH_SEARCH_CONCURRENCY", "4"))
+    # Análises do lote a gerar o relatório pela IA em simultâneo (limite partilhado pelo lote inteiro).
+    BATCH_LLM_CONCURRENCY = int(os.getenv("BATCH_LLM_CONCURRENCY", "2"))
+
+    # --- Controlo de Admissão (/api/analyze síncrono) ---
+    # Análises em simultâneo por processo; as seguintes esperam numa fila limitada
+    # até ANALYSIS_QUEUE_TIMEOUT segundos. Fila cheia -> 429; espera esgotada -> 503.
+    ADMISSION_CONTROL_ENABLED = os.getenv("ADMISSION_CONTROL_ENABLED", "true").lower() in ("1", "true", "yes")
+    ANALYSIS_MAX_CONCURRENT = int(os.getenv("ANALYSIS_MAX_CONCURRENT", "4"))
+    ANALYSIS_MAX_QUEUE = int(os.getenv("ANALYSIS_MAX_QUEUE", "8"))
+    ANALYSIS_QUEUE_TIMEOUT = float(os.getenv("ANALYSIS_QUEUE_TIMEOUT", "20"))
+
+    # --- Busca Profunda (Extração de Páginas) ---
+    # Extrações simultâneas no total e por host.
+    DEEP_SEARCH_MAX_WORKERS = int(os.getenv("DEEP_SEARCH_MAX_WORKERS", "5"))
+    DEEP_SEARCH_PER_HOST_LIMIT = int(os.getenv("DEEP_SEARCH_PER_HOST_LIMIT", "2"))
+    # Prazo máximo (em segundos) para toda a fase de pesquisa e extração.
+    DEEP_SEARCH_DEADLINE = int(os.getenv("DEEP_SEARCH_DEADLINE", "90"))
+    # A extração termina mais cedo ao atingir este número de páginas substanciais (0 = extrair todas).
+    DEEP_SEARCH_TARGET_PAGES = int(os.getenv("DEEP_SEARCH_TARGET_PAGES", "6"))
+    # Orçamento (em tokens estimados) para os trechos das páginas incluídos no prompt
+    # (0 = inclui as páginas inteiras) e tamanho máximo de cada trecho em caracteres.
+    WEB_CONTEXT_TOKEN_BUDGET = int(os.getenv("WEB_CONTEXT_TOKEN_BUDGET", "6000"))
+    WEB_CONTEXT_PASSAGE_CHARS = int(os.getenv("WEB_CONTEXT_PASSAGE_CHARS", "800"))
+    # Descarta páginas (e snippets) quase duplicados, comparando fingerprints SimHash de 64 bits;
+    # dois textos são considerados iguais se diferirem em até NEAR_DUPLICATE_MAX_DISTANCE bits.
+    DEEP_SEARCH_DEDUPLICATE = os.getenv("DEEP_SEARCH_DEDUPLICATE", "true").lower() in ("1", "true", "yes")
+    NEAR_DUPLICATE_MAX_DISTANCE = int(os.getenv("NEAR_DUPLICATE_MAX_DISTANCE", "3"))
+
+    # --- Busca Multi-Provedor ---
+    # 'sequential' consulta Jina -> Google CSE -> ScrapingAnt em cascata;
+    # 'race' consulta todos em paralelo e fica com os primeiros resultados.
+    SEARCH_MODE = os.getenv("SEARCH_MODE", "sequential")
+    # Tempo máximo (em segundos) de espera pelos provedores no modo 'race'.
+    SEARCH_LATENCY_BUDGET = float(os.getenv("SEARCH_LATENCY_BUDGET", "20"))
+
+    # --- Cache ---
+    # 'memory' (por processo) ou 'sqlite' (persistente e partilhada entre os workers do gunicorn).
+    CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+    # Diretório onde ficam os ficheiros da cache SQLite.
+    CACHE_DIR = os.getenv("CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache"))
+    # Validade (em segundos) dos resultados de busca em cache (0 = desativa a cache).
+    SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", "21600"))
+    SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "1000"))
+    # Cache de páginas extraídas: por defeito em disco (SQLite), limitada em número e em bytes.
+    PAGE_CACHE_BACKEND = os.getenv("PAGE_CACHE_BACKEND", "sqlite")
+    # Durante este tempo (em segundos) a página é servida sem contactar a origem;
+    # depois é revalidada com um GET condicional.
+    PAGE_CACHE_FRESH_TTL = int(os.getenv("PAGE_CACHE_FRESH_TTL", "86400"))
+    # Idade máxima (em segundos) de uma entrada antes de ser descartada.
+    PAGE_CACHE_MAX_AGE = int(os.getenv("PAGE_CACHE_MAX_AGE", "604800"))
+    PAGE_CACHE_MAX_ENTRIES = int(os.getenv("PAGE_CACHE_MAX_ENTRIES", "2000"))
+    PAGE_CACHE_MAX_BYTES = int(os.getenv("PAGE_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+    # Número de análises psicológicas (determinísticas) memorizadas por processo (0 = desativa).
+    PSYCH_ANALYSIS_CACHE_MAX_ENTRIES = int(os.getenv("PSYCH_ANALYSIS_CACHE_MAX_ENTRIES", "256"))
+
+    # --- Cliente HTTP Partilhado ---
+    # Número de hosts com pool próprio e ligações keep-alive mantidas por host.
+    HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "20"))
+    HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "20"))
+    # Novas tentativas (com backoff exponencial) apenas para pedidos idempotentes (GET/HEAD).
+    HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "2"))
+    HTTP_RETRY_BACKOFF = float(os.getenv("HTTP_RETRY_BACKOFF", "0.5"))
+    # Timeouts (em segundos) por provedor.
+    HTTP_DEFAULT_TIMEOUT = float(os.getenv("HTTP_DEFAULT_TIMEOUT", "30"))
+    HTTP_TIMEOUTS = {
+        "jina": float(os.getenv("HTTP_TIMEOUT_JINA", "25")),
+        "google_cse": float(os.getenv("HTTP_TIMEOUT_GOOGLE_CSE", "15")),
+        "scrapingant_search": float(os.getenv("HTTP_TIMEOUT_SCRAPINGANT_SEARCH", "30")),
+        "scrapingant_extract": float(os.getenv("HTTP_TIMEOUT_SCRAPINGANT_EXTRACT", "45")),
+        "direct": float(os.getenv("HTTP_TIMEOUT_DIRECT", "20")),
+        "huggingface": float(os.getenv("HTTP_TIMEOUT_HUGGINGFACE", "60")),
+        "huggingface_client": float(os.getenv("HTTP_TIMEOUT_HUGGINGFACE_CLIENT", "90")),
+        # Prazo total de um stream do Gemini (o SDK não tem timeout de leitura por defeito)
+        "gemini_stream": float(os.getenv("HTTP_TIMEOUT_GEMINI_STREAM", "180")),
+    }
+
+    # --- Caminho Assíncrono (asyncio + httpx) ---
+    # Com true, busca, extração, busca profunda e chamadas à IA correm num event loop por
+    # worker em vez de uma thread por pedido; as APIs síncronas passam a delegar nele.
+    ASYNC_IO_ENABLED = os.getenv("ASYNC_IO_ENABLED", "false").lower() in ("1", "true", "yes")
+    ASYNC_HTTP_MAX_CONNECTIONS = int(os.getenv("ASYNC_HTTP_MAX_CONNECTIONS", "200"))
+    ASYNC_HTTP_MAX_KEEPALIVE = int(os.getenv("ASYNC_HTTP_MAX_KEEPALIVE", "50"))
+
+    # --- Limites de Pedidos e Quotas Diárias por Provedor ---
+    # Token bucket (pedidos por minuto) e quota diária (UTC), partilhados entre workers
+    # num ficheiro SQLite em CACHE_DIR. 0 desativa o limite respetivo. A ScrapingAnt
+    # partilha os mesmos créditos na busca e na extração.
+    RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes")
+    # Tempo máximo (segundos) à espera de um token antes de passar ao provedor seguinte
+    RATE_LIMIT_MAX_WAIT = float(os.getenv("RATE_LIMIT_MAX_WAIT", "2"))
+    RATE_LIMITS = {
+        "gemini": {
+            "per_minute": int(os.getenv("RATE_LIMIT_GEMINI_PER_MINUTE", "15")),
+            "daily": int(os.getenv("RATE_LIMIT_GEMINI_DAILY", "1500")),
+        },
+        "huggingface": {
+            "per_minute": int(os.getenv("RATE_LIMIT_HUGGINGFACE_PER_MINUTE", "30")),
+            "daily": int(os.getenv("RATE_LIMIT_HUGGINGFACE_DAILY", "0")),
+        },
+        "jina": {
+            "per_minute": int(os.getenv("RATE_LIMIT_JINA_PER_MINUTE", "20")),
+            "daily": int(os.getenv("RATE_LIMIT_JINA_DAILY", "0")),
+        },
+        "google_cse": {
+            "per_minute": int(os.getenv("RATE_LIMIT_GOOGLE_CSE_PER_MINUTE", "60")),
+            "daily": int(os.getenv("RATE_LIMIT_GOOGLE_CSE_DAILY", "100")),
+        },
+        "scrapingant": {
+            "per_minute": int(os.getenv("RATE_LIMIT_SCRAPINGANT_PER_MINUTE", "30")),
+            "daily": int(os.getenv("RATE_LIMIT_SCRAPINGANT_DAILY", "330")),
+        },
+    }
+
+    # --- Disjuntores (Circuit Breakers) por Provedor ---
+    # Um provedor com demasiadas falhas (ou chamadas lentas) na janela é ignorado
+    # durante CIRCUIT_BREAKER_OPEN_SECONDS; depois, um único pedido testa se recuperou.
+    CIRCUIT_BREAKER_ENABLED = os.getenv("CIRCUIT_BREAKER_ENABLED", "true").lower() in ("1", "true", "yes")
+    CIRCUIT_BREAKER_WINDOW = float(os.getenv("CIRCUIT_BREAKER_WINDOW", "120"))
+    CIRCUIT_BREAKER_MIN_CALLS = int(os.getenv("CIRCUIT_BREAKER_MIN_CALLS", "4"))
+    CIRCUIT_BREAKER_FAILURE_RATE = float(os.getenv("CIRCUIT_BREAKER_FAILURE_RATE", "0.5"))
+    CIRCUIT_BREAKER_SLOW_CALL_RATE = float(os.getenv("CIRCUIT_BREAKER_SLOW_CALL_RATE", "0.8"))
+    CIRCUIT_BREAKER_OPEN_SECONDS = float(os.getenv("CIRCUIT_BREAKER_OPEN_SECONDS", "30"))
+    # Duração (segundos) a partir da qual uma chamada conta como lenta, por provedor
+    CIRCUIT_BREAKER_SLOW_CALLS = {
+        "gemini": float(os.getenv("CIRCUIT_SLOW_CALL_GEMINI", "90")),
+        "huggingface": float(os.getenv("CIRCUIT_SLOW_CALL_HUGGINGFACE", "60")),
+        "jina": float(os.getenv("CIRCUIT_SLOW_CALL_JINA", "15")),
+        "google_cse": float(os.getenv("CIRCUIT_SLOW_CALL_GOOGLE_CSE", "8")),
+        "scrapingant_search": float(os.getenv("CIRCUIT_SLOW_CALL_SCRAPINGANT_SEARCH", "20")),
+        "scrapingant_extract": float(os.getenv("CIRCUIT_SLOW_CALL_SCRAPINGANT_EXTRACT", "30")),
+        "direct": float(os.getenv("CIRCUIT_SLOW_CALL_DIRECT", "15")),
+    }
+
+    # --- Cache de Respostas da IA ---
+    # Desativada por defeito: prompts idênticos dentro do TTL reutilizam a resposta anterior.
+    LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+    LLM_CACHE_BACKEND = os.getenv("LLM_CACHE_BACKEND", "sqlite")
+    LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", "3600"))
+    LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "500"))
+    LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(20 * 1024 * 1024)))
+
+    # --- Pedidos de Cobertura (Hedging) Gemini -> Hugging Face ---
+    # Desativado por defeito. Se o Gemini não responder (ou não enviar o primeiro token, em
+    # streaming) dentro do percentil LLM_HEDGE_PERCENTILE das suas latências recentes, o
+    # Hugging Face é chamado em paralelo e vence o primeiro a responder.
+    LLM_HEDGING_ENABLED = os.getenv("LLM_HEDGING_ENABLED", "false").lower() in ("1", "true", "yes")
+    LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+    LLM_HEDGE_MIN_DELAY = float(os.getenv("LLM_HEDGE_MIN_DELAY", "5"))
+    LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+    # Atrasos usados enquanto não houver amostras suficientes (resposta completa / primeiro token)
+    LLM_HEDGE_DEFAULT_DELAY = float(os.getenv("LLM_HEDGE_DEFAULT_DELAY", "45"))
+    LLM_HEDGE_STREAM_DEFAULT_DELAY = float(os.getenv("LLM_HEDGE_STREAM_DEFAULT_DELAY", "10"))
+
+    # --- Geração do Relatório ---
+    # 'single' pede o relatório completo num único pedido (em streaming quando há um cliente à escuta);
+    # 'sharded' divide-o em grupos de secções gerados em paralelo.
+    REPORT_GENERATION_MODE = os.getenv("REPORT_GENERATION_MODE", "single")
+    # Pedidos simultâneos à IA no modo 'sharded' e novas tentativas por grupo de secções.
+    REPORT_SECTION_CONCURRENCY = int(os.getenv("REPORT_SECTION_CONCURRENCY", "4"))
+    REPORT_SECTION_RETRIES = int(os.getenv("REPORT_SECTION_RETRIES", "1"))
+    REPORT_SECTION_MAX_TOKENS = int(os.getenv("REPORT_SECTION_MAX_TOKENS", "4096"))
+
+    # --- Base de Conhecimento (drivers, objeções, tendências e regras por segmento) ---
+    # Ficheiro JSON (por defeito, src/services/data/knowledge_base.json) e intervalo, em segundos,
+    # entre verificações de alterações para o recarregar sem reiniciar. 0 desativa o recarregamento.
+    KNOWLEDGE_BASE_PATH = os.getenv("KNOWLEDGE_BASE_PATH")
+    KNOWLEDGE_BASE_RELOAD_INTERVAL = float(os.getenv("KNOWLEDGE_BASE_RELOAD_INTERVAL", "10"))
@@ -1,6 +1,7 @@
 # Ficheiro: src/database.py
 
 import logging
+from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Optional, Any
 from supabase.client import create_client, Client
 
@@ -90,6 +91,31 @@ class DatabaseManager:
             logger.error(f"❌ Erro ao obter análise ID {analysis_id}: {e}")
             return None
 
+    def find_recent_analysis_by_hash(self, input_hash: str, max_age_seconds: int) -> Optional[Dict[str, Any]]:
+        """
+        Obtém a análise mais recente com o hash de dados de entrada indicado,
+        criada há no máximo 'max_age_seconds' segundos (ver migração 002).
+        """
+        if not self.client or max_age_seconds <= 0:
+            return None
+        try:
+            since = (datetime.now(timezone.utc) - timedelta(seconds=max_age_seconds)).isoformat()
+            response = (
+                self.client.table('analyses')
+                .select('id, created_at, comprehensive_analysis')
+                .eq('input_hash', input_hash)
+                .gte('created_at', since)
+                .order('created_at', desc=True)
+                .limit(1)
+                .execute()
+            )
+            if response.data and response.data[0].get('comprehensive_analysis'):
+                return response.data[0]
+            return None
+        except Exception as e:
+            logger.error(f"❌ Erro ao procurar análise pelo hash dos dados de entrada: {e}")
+            return None
+
     def list_analyses(self, limit: int = 20) -> List[Dict[str, Any]]:
         """
         Lista as análises mais recentes guardadas no banco de dados.
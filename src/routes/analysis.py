@@ -1,11 +1,22 @@
 # Ficheiro: src/routes/analysis.py
 
+import json
 import logging
-from flask import Blueprint, request, jsonify
+import time
+from typing import Dict, Any, Iterator, Optional, Tuple
+from flask import Blueprint, Response, request, jsonify, stream_with_context, url_for
 import traceback
 
+from config import Config
+
 # Importa o motor de análise principal e o gestor do banco de dados
+from services.admission_controller import analysis_admission
+from services.batch_analysis import BATCH_PHASES, batch_analysis_service
 from services.enhanced_analysis_engine import enhanced_analysis_engine
+from services.job_manager import job_manager
+from services.progress import ProgressCallback
+from services.request_hash import IGNORED_FIELDS, analysis_input_hash
+from services.single_flight import SingleFlight
 from database import db_manager
 
 logger = logging.getLogger(__name__)
@@ -13,14 +24,127 @@ logger = logging.getLogger(__name__)
 # Cria um Blueprint para organizar as rotas relacionadas com a análise.
 analysis_bp = Blueprint('analysis', __name__)
 
+# Pedidos síncronos idênticos que cheguem em simultâneo partilham a mesma execução.
+analysis_flight = SingleFlight("analysis")
+
+def _request_flag(data: Dict[str, Any], name: str) -> bool:
+    """
+    Lê (e remove dos dados) uma opção booleana do pedido, passada como
+    parâmetro '?<name>=true' ou como campo "<name>": true no corpo.
+    """
+    flag = data.pop(name, None)
+    if flag is None:
+        flag = request.args.get(name, '')
+    return str(flag).lower() in ('1', 'true', 'yes')
+
+def _find_reusable_analysis(input_hash: str) -> Optional[Dict[str, Any]]:
+    """
+    Devolve a análise guardada mais recente feita com os mesmos dados de entrada,
+    se tiver sido criada dentro de ANALYSIS_REUSE_WINDOW segundos.
+    """
+    record = db_manager.find_recent_analysis_by_hash(input_hash, Config.ANALYSIS_REUSE_WINDOW)
+    if not record:
+        return None
+    analysis_result = dict(record['comprehensive_analysis'])
+    analysis_result['database_id'] = record['id']
+    analysis_result['reused'] = True
+    analysis_result['reused_created_at'] = record.get('created_at')
+    logger.info(f"♻️ Análise idêntica encontrada (ID {record['id']}, criada em {record.get('created_at')}). A reutilizar.")
+    return analysis_result
+
+def _run_analysis_pipeline(
+    data: Dict[str, Any],
+    progress_callback: Optional[ProgressCallback] = None,
+    web_context: Optional[str] = None
+) -> Tuple[Dict[str, Any], int]:
+    """
+    Executa o motor de análise e guarda o resultado no banco de dados.
+    Partilhado pelo modo síncrono, pelos jobs em segundo plano e pelos lotes
+    (que indicam o 'web_context' já recolhido pela pesquisa partilhada).
+
+    Returns:
+        Um tuplo (resultado, status_code HTTP).
+    """
+    # --- Passo 2: Chamar o Motor de Análise ---
+    analysis_result = enhanced_analysis_engine.generate_comprehensive_analysis(data, progress_callback, web_context)
+
+    if not analysis_result or analysis_result.get("error"):
+        logger.error(f"❌ O motor de análise retornou um erro: {(analysis_result or {}).get('error')}")
+        return analysis_result or {'error': 'Erro na geração da análise'}, 500
+
+    # --- Passo 3: Preparar Dados e Guardar no Banco de Dados ---
+    db_data_to_save = data.copy()
+    db_data_to_save['comprehensive_analysis'] = analysis_result
+    # Permite reutilizar esta análise em pedidos futuros com os mesmos dados
+    db_data_to_save['input_hash'] = analysis_input_hash(data)
+
+    # --- CORREÇÃO AQUI ---
+    # Converte campos de texto vazios para None para evitar erros de tipo numérico no banco de dados.
+    if db_data_to_save.get('preco') == '':
+        db_data_to_save['preco'] = None
+
+    created_record = db_manager.create_analysis(db_data_to_save)
+
+    if created_record and created_record.get('id'):
+        analysis_result['database_id'] = created_record['id']
+        logger.info(f"✅ Análise guardada com sucesso no banco de dados com ID: {created_record['id']}")
+    else:
+        logger.warning("⚠️ A análise foi gerada, mas falhou ao ser guardada no banco de dados.")
+        analysis_result['database_status'] = "failed_to_save"
+
+    return analysis_result, 200
+
+def _run_admitted_pipeline(data: Dict[str, Any]) -> Tuple[Dict[str, Any], int]:
+    """
+    Executa o pipeline depois de obter lugar no controlo de admissão.
+    Se não houver lugar, devolve 429 (fila cheia) ou 503 (espera esgotada)
+    com 'retry_after' em segundos.
+    """
+    rejection = analysis_admission.acquire()
+    if rejection:
+        status_code, retry_after = rejection
+        if status_code == 429:
+            message = 'Demasiadas análises em espera. Tente novamente dentro de momentos.'
+        else:
+            message = 'O servidor está ocupado. Tente novamente dentro de momentos.'
+        return {'error': message, 'retry_after': retry_after}, status_code
+
+    start = time.monotonic()
+    try:
+        return _run_analysis_pipeline(data)
+    finally:
+        analysis_admission.release(time.monotonic() - start)
+
+def _job_queue_full_response() -> Tuple[Response, int]:
+    """503 para quando a fila de jobs está cheia, com o Retry-After estimado pelo controlo de admissão."""
+    retry_after = analysis_admission.retry_after()
+    response = jsonify({'error': 'O servidor está ocupado. Tente novamente dentro de momentos.', 'retry_after': retry_after})
+    response.headers['Retry-After'] = str(retry_after)
+    return response, 503
+
 @analysis_bp.route('/analyze', methods=['POST'])
 def analyze_market():
     """
     Endpoint principal para receber os dados do formulário, iniciar o processo
     de análise e retornar o relatório completo em formato JSON.
+
+    Com '?async=true' (ou "async": true no corpo), a análise é agendada em
+    segundo plano e a resposta 202 contém o ID do job a consultar em
+    /api/analyze/<job_id>.
+
+    Pedidos com os mesmos dados (após normalização) que cheguem enquanto uma
+    análise idêntica ainda está em curso reutilizam essa análise. Se uma análise
+    com os mesmos dados foi guardada há menos de ANALYSIS_REUSE_WINDOW segundos,
+    é devolvida de imediato (200, com "reused": true, também em modo assíncrono),
+    a menos que o pedido inclua "force_refresh": true.
+
+    O número de análises em simultâneo é limitado (ver AdmissionController),
+    num orçamento partilhado pelos pedidos síncronos e pelos jobs em segundo
+    plano: quando não há lugar, a resposta síncrona é 429 ou 503 com o
+    cabeçalho Retry-After; os jobs esperam no estado 'queued'.
     """
     logger.info("🚀 Recebido novo pedido de análise no endpoint /api/analyze.")
-    
+
     try:
         # --- Passo 1: Obter e Validar os Dados de Entrada ---
         data = request.get_json()
@@ -32,38 +156,225 @@ def analyze_market():
             logger.warning("⚠️ Pedido de análise sem o campo obrigatório 'segmento'.")
             return jsonify({'error': 'O campo "segmento" é obrigatório.'}), 400
 
+        run_async = _request_flag(data, 'async')
+        force_refresh = _request_flag(data, 'force_refresh')
+        input_hash = analysis_input_hash(data)
         logger.info(f"Dados recebidos para análise: {data}")
 
-        # --- Passo 2: Chamar o Motor de Análise ---
-        analysis_result = enhanced_analysis_engine.generate_comprehensive_analysis(data)
-
-        if not analysis_result or analysis_result.get("error"):
-            logger.error(f"❌ O motor de análise retornou um erro: {analysis_result.get('error')}")
-            return jsonify(analysis_result), 500
-
-        # --- Passo 3: Preparar Dados e Guardar no Banco de Dados ---
-        db_data_to_save = data.copy()
-        db_data_to_save['comprehensive_analysis'] = analysis_result
-        
-        # --- CORREÇÃO AQUI ---
-        # Converte campos de texto vazios para None para evitar erros de tipo numérico no banco de dados.
-        if db_data_to_save.get('preco') == '':
-            db_data_to_save['preco'] = None
-        
-        created_record = db_manager.create_analysis(db_data_to_save)
-        
-        if created_record and created_record.get('id'):
-            analysis_result['database_id'] = created_record['id']
-            logger.info(f"✅ Análise guardada com sucesso no banco de dados com ID: {created_record['id']}")
-        else:
-            logger.warning("⚠️ A análise foi gerada, mas falhou ao ser guardada no banco de dados.")
-            analysis_result['database_status'] = "failed_to_save"
+        if not force_refresh:
+            reused_analysis = _find_reusable_analysis(input_hash)
+            if reused_analysis:
+                return jsonify(reused_analysis), 200
+
+        if run_async:
+            job = job_manager.submit(_run_analysis_pipeline, data, dedupe_key=input_hash)
+            if not job:
+                return _job_queue_full_response()
+
+            status_url = url_for('analysis.get_analysis_job', job_id=job.id)
+            response = jsonify({
+                'job_id': job.id,
+                'status': job.status,
+                'status_url': status_url,
+                'events_url': url_for('analysis.stream_analysis_events', job_id=job.id)
+            })
+            response.headers['Location'] = status_url
+            return response, 202
+
+        analysis_result, status_code = analysis_flight.do(input_hash, lambda: _run_admitted_pipeline(data))
 
         # --- Passo 4: Retornar a Resposta de Sucesso ---
-        logger.info("✅ Análise concluída e pronta para ser enviada ao cliente.")
-        return jsonify(analysis_result), 200
+        if status_code == 200:
+            logger.info("✅ Análise concluída e pronta para ser enviada ao cliente.")
+        response = jsonify(analysis_result)
+        if status_code in (429, 503):
+            response.headers['Retry-After'] = str(analysis_result['retry_after'])
+        return response, status_code
 
     except Exception as e:
         logger.critical(f"❌ Erro inesperado no endpoint de análise: {e}")
         logger.critical(traceback.format_exc())
         return jsonify({'error': 'Ocorreu um erro inesperado no servidor.'}), 500
+
+def _run_batch_pipeline(
+    payload: Dict[str, Any],
+    progress_callback: Optional[ProgressCallback] = None
+) -> Tuple[Dict[str, Any], int]:
+    """Executa um lote de análises (ver BatchAnalysisService); cada análise é guardada como as restantes."""
+    return batch_analysis_service.run(
+        payload['items'],
+        run_item=lambda item, web_context: _run_analysis_pipeline(item, web_context=web_context),
+        find_reusable=None if payload.get('force_refresh') else _find_reusable_analysis,
+        progress_callback=progress_callback
+    )
+
+def _batch_ndjson_lines(job_id: str) -> Iterator[str]:
+    """
+    Transmite um lote como NDJSON: uma linha por fase e por item concluído
+    (índice e status) e, no fim, uma linha 'done' com o resumo e os resultados.
+    Linhas vazias servem de keep-alive.
+    """
+    after_id = 0
+    while True:
+        events, finished = job_manager.wait_for_events(job_id, after_id, timeout=Config.SSE_HEARTBEAT_INTERVAL)
+        if events is None:
+            break
+        if not events:
+            if finished:
+                break
+            yield "\n"
+            continue
+        for event in events:
+            after_id = event['id']
+            if event['event'] == 'done':
+                line = {'event': 'done', 'status': event['data']['status'], 'error': event['data']['error'], 'summary': event['data']['result']}
+            elif event['event'] in ('phase', 'batch_item'):
+                line = {'event': event['event'], **event['data']}
+            else:
+                continue
+            yield json.dumps(line, ensure_ascii=False, default=str) + "\n"
+        if finished and events[-1]['event'] == 'done':
+            break
+
+@analysis_bp.route('/analyze/batch', methods=['POST'])
+def analyze_batch():
+    """
+    Agenda um lote de análises: {"items": [{...}, {...}], "force_refresh": false}.
+
+    As análises do lote partilham o trabalho comum (uma busca por consulta
+    distinta, extrações de páginas deduplicadas e um limite de gerações pela
+    IA em simultâneo para todo o lote; ver BatchAnalysisService).
+
+    Por defeito, responde 202 com o ID do job, consultável em
+    /api/analyze/<job_id> (com todos os resultados no fim) e em
+    /api/analyze/<job_id>/events (um evento 'batch_item' com o índice e o
+    status de cada item concluído). Com '?stream=true' (ou "stream": true),
+    responde com um stream NDJSON com uma linha por item concluído e os
+    resultados na linha final.
+    """
+    logger.info("📦 Recebido novo pedido de análise em lote no endpoint /api/analyze/batch.")
+
+    try:
+        data = request.get_json()
+        if not data or not isinstance(data, dict):
+            return jsonify({'error': 'Corpo do pedido vazio. Envie os dados em formato JSON.'}), 400
+
+        items = data.get('items')
+        if not isinstance(items, list) or not items:
+            return jsonify({'error': 'O campo "items" deve ser uma lista não vazia de análises.'}), 400
+        if len(items) > batch_analysis_service.max_items:
+            return jsonify({'error': f'Cada lote pode ter no máximo {batch_analysis_service.max_items} análises.'}), 400
+        invalid = [index for index, item in enumerate(items) if not isinstance(item, dict) or not item.get('segmento')]
+        if invalid:
+            return jsonify({'error': 'Todas as análises do lote precisam do campo "segmento".', 'invalid_items': invalid}), 400
+
+        stream = _request_flag(data, 'stream')
+        force_refresh = _request_flag(data, 'force_refresh')
+        payload = {
+            'items': [{key: value for key, value in item.items() if key not in IGNORED_FIELDS} for item in items],
+            'force_refresh': force_refresh
+        }
+
+        # "force_refresh" é ignorado pelo hash, por isso entra à parte na chave
+        dedupe_key = f"batch:{int(force_refresh)}:{analysis_input_hash({'items': payload['items']})}"
+        # Cada análise do lote pede o seu próprio lugar de admissão (ver BatchAnalysisService)
+        job = job_manager.submit(_run_batch_pipeline, payload, dedupe_key=dedupe_key, phases=BATCH_PHASES, admit=False)
+        if not job:
+            return _job_queue_full_response()
+
+        status_url = url_for('analysis.get_analysis_job', job_id=job.id)
+        if stream:
+            return Response(
+                stream_with_context(_batch_ndjson_lines(job.id)),
+                mimetype='application/x-ndjson',
+                headers={
+                    'Cache-Control': 'no-cache',
+                    'X-Accel-Buffering': 'no',
+                    'X-Job-Id': job.id,
+                    'Location': status_url
+                }
+            )
+
+        response = jsonify({
+            'job_id': job.id,
+            'status': job.status,
+            'items': len(items),
+            'status_url': status_url,
+            'events_url': url_for('analysis.stream_analysis_events', job_id=job.id)
+        })
+        response.headers['Location'] = status_url
+        return response, 202
+
+    except Exception as e:
+        logger.critical(f"❌ Erro inesperado no endpoint de análise em lote: {e}")
+        logger.critical(traceback.format_exc())
+        return jsonify({'error': 'Ocorreu um erro inesperado no servidor.'}), 500
+
+@analysis_bp.route('/analyze/<job_id>', methods=['GET'])
+def get_analysis_job(job_id: str):
+    """
+    Retorna o estado, o progresso por fase e, quando terminado,
+    o resultado de uma análise agendada em modo assíncrono.
+    """
+    snapshot = job_manager.get_snapshot(job_id)
+    if not snapshot:
+        return jsonify({'error': 'Job de análise não encontrado ou expirado.'}), 404
+    return jsonify(snapshot), 200
+
+def _format_sse(event: Dict[str, Any]) -> str:
+    """Formata um evento do job no formato Server-Sent Events."""
+    payload = json.dumps(event['data'], ensure_ascii=False, default=str)
+    return f"id: {event['id']}\nevent: {event['event']}\ndata: {payload}\n\n"
+
+@analysis_bp.route('/analyze/<job_id>/events', methods=['GET'])
+def stream_analysis_events(job_id: str):
+    """
+    Transmite o progresso de uma análise assíncrona via Server-Sent Events.
+
+    Eventos emitidos: 'phase', 'psychological_analysis', 'search_results',
+    'page_extracted', 'llm_chunk' (texto parcial do relatório), 'section_ready'
+    (cada secção do relatório assim que fica completa), 'report_parsed' e, no
+    fim, 'done' com o resultado. Nos lotes, cada item concluído gera um
+    evento 'batch_item' com o índice e o status (o resultado vem no 'done').
+    Comentários de keep-alive são enviados periodicamente para evitar que
+    proxies fechem a ligação por inatividade. Um cliente que volte a ligar
+    com o cabeçalho 'Last-Event-ID' recebe apenas os eventos em falta.
+    """
+    if not job_manager.get_snapshot(job_id, include_result=False):
+        return jsonify({'error': 'Job de análise não encontrado ou expirado.'}), 404
+
+    try:
+        last_event_id = int(request.headers.get('Last-Event-ID', 0))
+    except ValueError:
+        last_event_id = 0
+
+    def generate():
+        after_id = last_event_id
+        # Indica ao EventSource o intervalo de reconexão em caso de queda.
+        yield "retry: 3000\n\n"
+        while True:
+            events, finished = job_manager.wait_for_events(
+                job_id, after_id, timeout=Config.SSE_HEARTBEAT_INTERVAL
+            )
+            if events is None:
+                break
+            if not events:
+                if finished:
+                    break
+                yield ": keep-alive\n\n"
+                continue
+            for event in events:
+                after_id = event['id']
+                yield _format_sse(event)
+            if finished and events[-1]['event'] == 'done':
+                break
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            # Desativa o buffering do nginx para que os eventos cheguem de imediato.
+            'X-Accel-Buffering': 'no'
+        }
+    )
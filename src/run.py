@@ -63,10 +63,22 @@ def create_app():
 
     @app.route('/api/health')
     def health_check():
+        # Quota diária restante e pedidos disponíveis de cada provedor externo.
+        from services.rate_limiter import rate_limiter
         return jsonify({
             'status': 'healthy',
             'timestamp': datetime.now().isoformat(),
-            'version': '2.0.0'
+            'version': '2.0.0',
+            'quotas': rate_limiter.remaining()
+        })
+
+    @app.route('/api/metrics')
+    def metrics():
+        # Métricas internas (caches, filas, provedores) registadas pelos serviços.
+        from services.metrics import metrics_registry
+        return jsonify({
+            'timestamp': datetime.now().isoformat(),
+            'metrics': metrics_registry.collect()
         })
 
     # --- Handlers de Erro Globais ---
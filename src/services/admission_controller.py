@@ -0,0 +1,160 @@
+# Ficheiro: src/services/admission_controller.py
+
+import logging
+import math
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from config import Config
+from services.metrics import metrics_registry
+
+logger = logging.getLogger(__name__)
+
+class AdmissionController:
+    """
+    Controlo de admissão para um endpoint pesado: no máximo 'max_concurrent'
+    pedidos em execução; os seguintes esperam, por ordem de chegada, numa fila
+    de até 'max_queue' lugares durante no máximo 'queue_timeout' segundos.
+
+    Em vez de todos os pedidos abrandarem juntos durante um pico, os que não
+    cabem são recusados de imediato (fila cheia -> 429) ou ao fim da espera
+    (-> 503), sempre com uma estimativa de Retry-After, e os admitidos mantêm
+    uma latência previsível.
+
+    Quem chama acquire() e é admitido tem de chamar release() no fim. Os jobs
+    em segundo plano partilham os mesmos lugares, mas esperam na fila sem
+    limite de tempo (acquire(block=True)); essas esperas não ocupam os
+    'max_queue' lugares da fila, que ficam reservados aos pedidos síncronos.
+    """
+    def __init__(
+        self,
+        name: str,
+        max_concurrent: int = 4,
+        max_queue: int = 8,
+        queue_timeout: float = 20.0,
+        enabled: bool = True,
+        max_samples: int = 200
+    ):
+        self.name = name
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self.enabled = enabled
+        self.active = 0
+        # Fila FIFO de senhas dos pedidos à espera
+        self._queue: Deque[object] = deque()
+        # Quantas das senhas na fila são de esperas sem limite (acquire(block=True))
+        self._blocking_waiters = 0
+        self._cond = threading.Condition()
+        self._waits: Deque[float] = deque(maxlen=max_samples)
+        # Duração média (exponencial) de um pedido admitido, usada no Retry-After
+        self._avg_duration: Optional[float] = None
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+
+    def _retry_after(self) -> int:
+        """Segundos estimados até haver lugar: a fila atual a escoar pelos lugares disponíveis."""
+        duration = self._avg_duration or self.queue_timeout
+        return max(1, math.ceil(duration * (len(self._queue) + 1) / self.max_concurrent))
+
+    def retry_after(self) -> int:
+        """Estimativa atual para o cabeçalho Retry-After, para quem recusa pedidos à frente do controlador."""
+        with self._cond:
+            return self._retry_after()
+
+    def acquire(self, block: bool = False) -> Optional[Tuple[int, int]]:
+        """
+        Pede um lugar para executar o pedido, esperando na fila se necessário.
+
+        Args:
+            block: Se True, espera pela sua vez sem limite de tempo nem de fila
+                   e nunca é recusado. Destina-se aos workers dos jobs em
+                   segundo plano, cujo número já é limitado pelo próprio pool,
+                   e não conta para o limite 'max_queue'.
+
+        Returns:
+            None se o pedido foi admitido; caso contrário, um tuplo
+            (status HTTP, segundos para o cabeçalho Retry-After).
+        """
+        if not self.enabled:
+            return None
+
+        start = time.monotonic()
+        with self._cond:
+            if self.active < self.max_concurrent and not self._queue:
+                self.active += 1
+                self.admitted += 1
+                self._waits.append(0.0)
+                return None
+
+            if not block and len(self._queue) - self._blocking_waiters >= self.max_queue:
+                self.rejected_queue_full += 1
+                logger.warning(f"🚧 {self.name}: fila cheia ({self.active} em execução, {len(self._queue)} à espera). Pedido recusado (429).")
+                return 429, self._retry_after()
+
+            ticket = object()
+            self._queue.append(ticket)
+            if block:
+                self._blocking_waiters += 1
+            deadline = start + self.queue_timeout
+            while not (self._queue[0] is ticket and self.active < self.max_concurrent):
+                remaining = None if block else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    self._queue.remove(ticket)
+                    # A senha seguinte pode ter passado a ser a primeira da fila
+                    self._cond.notify_all()
+                    self.rejected_timeout += 1
+                    logger.warning(f"⏱️ {self.name}: pedido esperou {self.queue_timeout:.0f}s na fila sem lugar. Pedido recusado (503).")
+                    return 503, self._retry_after()
+                self._cond.wait(remaining)
+
+            self._queue.popleft()
+            if block:
+                self._blocking_waiters -= 1
+            self.active += 1
+            self.admitted += 1
+            self._waits.append(time.monotonic() - start)
+            # Pode haver mais de um lugar livre para os pedidos seguintes
+            self._cond.notify_all()
+            return None
+
+    def release(self, duration: Optional[float] = None) -> None:
+        """Liberta o lugar de um pedido admitido; 'duration' alimenta a estimativa do Retry-After."""
+        if not self.enabled:
+            return
+        with self._cond:
+            self.active -= 1
+            if duration is not None:
+                self._avg_duration = duration if self._avg_duration is None else 0.8 * self._avg_duration + 0.2 * duration
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            waits = sorted(self._waits)
+            return {
+                "enabled": self.enabled,
+                "active": self.active,
+                "queue_depth": len(self._queue),
+                "max_concurrent": self.max_concurrent,
+                "max_queue": self.max_queue,
+                "admitted": self.admitted,
+                "rejected_queue_full": self.rejected_queue_full,
+                "rejected_timeout": self.rejected_timeout,
+                "wait_avg_seconds": round(sum(waits) / len(waits), 3) if waits else 0.0,
+                "wait_p95_seconds": round(waits[min(len(waits) - 1, math.ceil(0.95 * len(waits)) - 1)], 3) if waits else 0.0,
+                "wait_max_seconds": round(waits[-1], 3) if waits else 0.0,
+                "avg_duration_seconds": round(self._avg_duration, 2) if self._avg_duration is not None else None,
+            }
+
+# --- Instância Global ---
+analysis_admission = AdmissionController(
+    "analysis",
+    max_concurrent=Config.ANALYSIS_MAX_CONCURRENT,
+    max_queue=Config.ANALYSIS_MAX_QUEUE,
+    queue_timeout=Config.ANALYSIS_QUEUE_TIMEOUT,
+    enabled=Config.ADMISSION_CONTROL_ENABLED
+)
+metrics_registry.register("admission", analysis_admission.stats)
@@ -1,19 +1,95 @@
 # Ficheiro: src/services/ai_manager.py
 
+import asyncio
+import hashlib
+import json
 import logging
-import requests
+import queue
+import threading
+import time
 import google.generativeai as genai
-from typing import Optional, Dict, Any
+from google.api_core import exceptions as google_exceptions
+from typing import Awaitable, Callable, Iterator, List, Optional, Dict, Any, Tuple
 
 # Importa a configuração centralizada para aceder às chaves de API
 from config import Config
+from services.async_runtime import async_runtime
+from services.cache import create_cache
+from services.circuit_breaker import create_breaker
+from services.hedging import HedgingPolicy
+from services.http_client import http_client
+from services.huggingface_client import iter_tgi_stream
+from services.metrics import metrics_registry
+from services.rate_limiter import rate_limiter
+from services.single_flight import AsyncSingleFlight, SingleFlight
 
 logger = logging.getLogger(__name__)
 
+# Provedor primário e provedor de cobertura (hedging)
+PRIMARY_PROVIDER = "gemini"
+SECONDARY_PROVIDER = "huggingface"
+
+GEMINI_MODEL_NAME = "gemini-1.5-flash"
+DEFAULT_HUGGINGFACE_MODEL = "mistralai/Mistral-7B-Instruct-v0.2"
+
+# Configurações de segurança para evitar bloqueios desnecessários
+GEMINI_SAFETY_SETTINGS = [
+    {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_NONE"},
+    {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_NONE"},
+    {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_NONE"},
+    {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_NONE"}
+]
+
+
+class GenerationStream:
+    """
+    Iterador sobre os pedaços de texto de uma geração em streaming.
+    Depois de consumido, 'provider', 'model', 'cached' e result() descrevem
+    a resposta obtida.
+    """
+    def __init__(self, manager: "AIManager", prompt: str, max_tokens: int):
+        self._manager = manager
+        self.prompt = prompt
+        self.max_tokens = max_tokens
+        self.provider: Optional[str] = None
+        self.model: Optional[str] = None
+        self.cached = False
+        # False se o stream foi interrompido ou nenhum provedor respondeu
+        self.completed = False
+        self._parts: List[str] = []
+
+    @property
+    def text(self) -> str:
+        return "".join(self._parts)
+
+    def __iter__(self) -> Iterator[str]:
+        for chunk in self._manager._stream_with_fallback(self):
+            self._parts.append(chunk)
+            yield chunk
+
+    def result(self) -> Optional[Dict[str, Any]]:
+        """O mesmo formato de generate_analysis_with_metadata, ou None se falhou."""
+        if not self.completed or not self._parts:
+            return None
+        return {'text': self.text, 'provider': self.provider, 'model': self.model, 'cached': self.cached}
+
+
 class AIManager:
     """
     Gerenciador de IAs com sistema de fallback automático.
     Prioridade: Google Gemini -> Hugging Face.
+
+    Com LLM_CACHE_ENABLED=true, as respostas ficam numa cache (SQLite por
+    defeito, partilhada entre workers) para que prompts idênticos enviados
+    pouco tempo depois não voltem a chamar o provedor.
+
+    Com LLM_HEDGING_ENABLED=true, um Gemini lento não espera pela falha: passado
+    o atraso de cobertura, o Hugging Face é chamado em paralelo e vence o
+    primeiro a responder.
+
+    Com ASYNC_IO_ENABLED=true, generate_analysis_with_metadata delega na versão
+    assíncrona, que corre no event loop partilhado (ver AsyncRuntime); aí o
+    pedido de cobertura que perde é cancelado. O streaming continua em threads.
     """
     def __init__(self):
         """Inicializa os clientes para os provedores de IA disponíveis."""
@@ -27,7 +103,7 @@ class AIManager:
             try:
                 genai.configure(api_key=Config.GEMINI_API_KEY)
                 # Usamos um modelo mais recente e eficiente
-                self.providers['gemini']['client'] = genai.GenerativeModel("gemini-1.5-flash")
+                self.providers['gemini']['client'] = genai.GenerativeModel(GEMINI_MODEL_NAME)
                 self.providers['gemini']['available'] = True
                 logger.info("✅ Provedor de IA Gemini inicializado com sucesso.")
             except Exception as e:
@@ -42,88 +118,395 @@ class AIManager:
         else:
             logger.warning("⚠️ Chave de API do Hugging Face não configurada.")
 
-    def _generate_with_gemini(self, prompt: str, max_tokens: int) -> Optional[str]:
-        """Gera conteúdo usando o Google Gemini como provedor principal."""
-        try:
-            client = self.providers['gemini']['client']
-            
-            # Configurações de geração para análises detalhadas
-            generation_config = {
+        # --- Cache de Respostas (opcional) ---
+        self.response_cache = create_cache(
+            "llm_responses",
+            ttl=Config.LLM_CACHE_TTL if Config.LLM_CACHE_ENABLED else 0,
+            max_entries=Config.LLM_CACHE_MAX_ENTRIES,
+            max_bytes=Config.LLM_CACHE_MAX_BYTES,
+            backend=Config.LLM_CACHE_BACKEND if Config.LLM_CACHE_ENABLED else "memory"
+        )
+        metrics_registry.register("llm_cache", self.response_cache.stats)
+        self._flight = SingleFlight("llm")
+        self._async_flight = AsyncSingleFlight("llm_async")
+
+        # --- Disjuntores: um provedor degradado é ignorado em vez de atrasar cada pedido ---
+        self.breakers = {provider: create_breaker(f"llm:{provider}", provider) for provider in self.providers}
+
+        # --- Pedidos de cobertura (hedging): latências da resposta completa e do primeiro token ---
+        self.hedging_enabled = Config.LLM_HEDGING_ENABLED
+        self.hedging = {
+            name: HedgingPolicy(
+                name,
+                percentile=Config.LLM_HEDGE_PERCENTILE,
+                min_delay=Config.LLM_HEDGE_MIN_DELAY,
+                default_delay=default_delay,
+                min_samples=Config.LLM_HEDGE_MIN_SAMPLES
+            )
+            for name, default_delay in (
+                ("response", Config.LLM_HEDGE_DEFAULT_DELAY),
+                ("first_token", Config.LLM_HEDGE_STREAM_DEFAULT_DELAY),
+            )
+        }
+        metrics_registry.register("llm_hedging", lambda: {name: policy.stats() for name, policy in self.hedging.items()})
+
+    def _model_name(self, provider: str) -> str:
+        """Devolve o nome do modelo usado por um provedor."""
+        if provider == 'gemini':
+            return GEMINI_MODEL_NAME
+        return Config.HUGGINGFACE_MODEL_NAME or DEFAULT_HUGGINGFACE_MODEL
+
+    def _generation_params(self, provider: str, max_tokens: int) -> Dict[str, Any]:
+        """Parâmetros de geração enviados a cada provedor."""
+        if provider == 'gemini':
+            return {
                 'temperature': 0.7,
                 'top_p': 0.95,
                 'top_k': 64,
                 'max_output_tokens': max_tokens,
             }
+        return {
+            "max_new_tokens": max_tokens,
+            "temperature": 0.7,
+            "return_full_text": False,
+        }
+
+    def _cache_key(self, provider: str, model: str, prompt: str, params: Dict[str, Any]) -> str:
+        """Hash SHA-256 do provedor, modelo, prompt e parâmetros de geração."""
+        raw = json.dumps([provider, model, prompt, params], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def _generate_with_gemini(self, prompt: str, max_tokens: int) -> Optional[str]:
+        """Gera conteúdo usando o Google Gemini como provedor principal."""
+        try:
+            client = self.providers['gemini']['client']
             
-            # Configurações de segurança para evitar bloqueios desnecessários
-            safety_settings = [
-                {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_NONE"},
-                {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_NONE"},
-                {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_NONE"},
-                {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_NONE"}
-            ]
+            # Configurações de geração para análises detalhadas
+            generation_config = self._generation_params('gemini', max_tokens)
 
             response = client.generate_content(
                 prompt,
                 generation_config=generation_config,
-                safety_settings=safety_settings
+                safety_settings=GEMINI_SAFETY_SETTINGS
             )
-            
-            if response.text:
-                logger.info(f"✅ Análise gerada com sucesso pelo Gemini.")
-                return response.text
-            else:
-                # Se a resposta estiver bloqueada, o motivo estará em 'prompt_feedback'
-                logger.warning(f"⚠️ Gemini retornou uma resposta vazia. Feedback: {response.prompt_feedback}")
-                return None
+            return self._gemini_text(response)
+
+        except google_exceptions.ResourceExhausted as e:
+            rate_limiter.throttle('gemini')
+            logger.error(f"❌ Gemini recusou o pedido por limite de utilização (429): {e}")
+            return None
+        except Exception as e:
+            logger.error(f"❌ Erro ao gerar análise com o Gemini: {e}")
+            return None
+
+    async def _generate_with_gemini_async(self, prompt: str, max_tokens: int) -> Optional[str]:
+        """Versão assíncrona de _generate_with_gemini."""
+        try:
+            response = await self.providers['gemini']['client'].generate_content_async(
+                prompt,
+                generation_config=self._generation_params('gemini', max_tokens),
+                safety_settings=GEMINI_SAFETY_SETTINGS
+            )
+            return self._gemini_text(response)
 
+        except google_exceptions.ResourceExhausted as e:
+            await asyncio.to_thread(rate_limiter.throttle, 'gemini')
+            logger.error(f"❌ Gemini recusou o pedido por limite de utilização (429): {e}")
+            return None
         except Exception as e:
             logger.error(f"❌ Erro ao gerar análise com o Gemini: {e}")
             return None
 
+    def _gemini_text(self, response: Any) -> Optional[str]:
+        """Texto de uma resposta completa do Gemini, ou None se vier vazia."""
+        if response.text:
+            logger.info(f"✅ Análise gerada com sucesso pelo Gemini.")
+            return response.text
+        # Se a resposta estiver bloqueada, o motivo estará em 'prompt_feedback'
+        logger.warning(f"⚠️ Gemini retornou uma resposta vazia. Feedback: {response.prompt_feedback}")
+        return None
+
+    def _huggingface_request(self, prompt: str, max_tokens: int) -> Tuple[str, Dict[str, str], Dict[str, Any]]:
+        """URL, cabeçalhos e corpo de um pedido de geração à Hugging Face Inference API."""
+        # Usa o modelo definido na configuração, com um fallback padrão
+        model_name = self._model_name('huggingface')
+        api_url = f"https://api-inference.huggingface.co/models/{model_name}"
+        headers = {"Authorization": f"Bearer {Config.HUGGINGFACE_API_KEY}"}
+        payload = {
+            "inputs": prompt,
+            "parameters": self._generation_params('huggingface', max_tokens)
+        }
+        return api_url, headers, payload
+
+    def _huggingface_text(self, response: Any) -> Optional[str]:
+        """Texto gerado numa resposta do Hugging Face (requests ou httpx), ou None se falhou."""
+        if response.status_code == 200:
+            result = response.json()
+            content = result[0]['generated_text']
+            logger.info(f"✅ Análise gerada com sucesso pelo Hugging Face ({self._model_name('huggingface')}).")
+            return content
+        logger.error(f"❌ Erro na API do Hugging Face: {response.status_code} - {response.text}")
+        return None
+
     def _generate_with_huggingface(self, prompt: str, max_tokens: int) -> Optional[str]:
         """Gera conteúdo usando a Hugging Face Inference API como fallback."""
         try:
-            # Usa o modelo definido na configuração, com um fallback padrão
-            model_name = Config.HUGGINGFACE_MODEL_NAME or "mistralai/Mistral-7B-Instruct-v0.2"
-            api_url = f"https://api-inference.huggingface.co/models/{model_name}"
-            headers = {"Authorization": f"Bearer {Config.HUGGINGFACE_API_KEY}"}
-
-            payload = {
-                "inputs": prompt,
-                "parameters": {
-                    "max_new_tokens": max_tokens,
-                    "temperature": 0.7,
-                    "return_full_text": False,
-                }
-            }
-            
-            response = requests.post(api_url, headers=headers, json=payload, timeout=60)
-            
-            if response.status_code == 200:
-                result = response.json()
-                content = result[0]['generated_text']
-                logger.info(f"✅ Análise gerada com sucesso pelo Hugging Face ({model_name}).")
-                return content
-            else:
-                logger.error(f"❌ Erro na API do Hugging Face: {response.status_code} - {response.text}")
-                return None
+            api_url, headers, payload = self._huggingface_request(prompt, max_tokens)
+            response = http_client.post(api_url, provider="huggingface", headers=headers, json=payload)
+            rate_limiter.observe("huggingface", response)
+            return self._huggingface_text(response)
 
         except Exception as e:
             logger.error(f"❌ Erro ao gerar análise com o Hugging Face: {e}")
             return None
 
-    def generate_analysis(self, prompt: str, max_tokens: int = 8192) -> Optional[str]:
+    async def _generate_with_huggingface_async(self, prompt: str, max_tokens: int) -> Optional[str]:
+        """Versão assíncrona de _generate_with_huggingface."""
+        try:
+            api_url, headers, payload = self._huggingface_request(prompt, max_tokens)
+            response = await async_runtime.post(api_url, provider="huggingface", headers=headers, json=payload)
+            await asyncio.to_thread(rate_limiter.observe, "huggingface", response)
+            return self._huggingface_text(response)
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"❌ Erro ao gerar análise com o Hugging Face: {e}")
+            return None
+
+    def _stream_with_gemini(self, prompt: str, max_tokens: int, connections: Optional[List[Any]] = None) -> Iterator[str]:
+        """
+        Gera conteúdo em streaming com o Gemini. Lança uma exceção em caso de falha.
+
+        O stream tem um prazo total (HTTP_TIMEOUTS['gemini_stream']), para que um
+        stream parado não prenda quem o consome indefinidamente. A versão fixada do
+        SDK não aceita um timeout no pedido, por isso o stream é lido numa thread
+        auxiliar e, esgotado o prazo, é lançado TimeoutError sem esperar pelo
+        próximo pedaço; essa thread termina quando o SDK desistir da ligação.
+        """
+        timeout = http_client.timeout_for("gemini_stream")
+        deadline = time.monotonic() + timeout
+        events: "queue.Queue" = queue.Queue()
+        stop = threading.Event()
+
+        def read() -> None:
+            try:
+                response = self.providers['gemini']['client'].generate_content(
+                    prompt,
+                    generation_config=self._generation_params('gemini', max_tokens),
+                    safety_settings=GEMINI_SAFETY_SETTINGS,
+                    stream=True
+                )
+                for chunk in response:
+                    if stop.is_set():
+                        return
+                    try:
+                        text = chunk.text
+                    except ValueError:
+                        # Pedaço sem texto (ex.: apenas o motivo de paragem)
+                        continue
+                    if text:
+                        events.put(('chunk', text))
+                events.put(('end', None))
+            except google_exceptions.ResourceExhausted as e:
+                rate_limiter.throttle('gemini')
+                events.put(('error', e))
+            except Exception as e:
+                events.put(('error', e))
+
+        threading.Thread(target=read, name="llm-stream-gemini-reader", daemon=True).start()
+        try:
+            while True:
+                try:
+                    kind, value = events.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    raise TimeoutError(f"O stream do Gemini excedeu o prazo de {timeout:.0f}s.")
+                if kind == 'end':
+                    return
+                if kind == 'error':
+                    raise value
+                yield value
+        finally:
+            stop.set()
+
+    def _stream_with_huggingface(self, prompt: str, max_tokens: int, connections: Optional[List[Any]] = None) -> Iterator[str]:
+        """
+        Gera conteúdo em streaming (formato TGI) com o Hugging Face. Lança uma exceção em caso de falha.
+        A resposta HTTP é acrescentada a 'connections', para que possa ser fechada por outra thread.
+        """
+        model_name = self._model_name('huggingface')
+        api_url = f"https://api-inference.huggingface.co/models/{model_name}"
+        headers = {"Authorization": f"Bearer {Config.HUGGINGFACE_API_KEY}"}
+        payload = {
+            "inputs": prompt,
+            "parameters": self._generation_params('huggingface', max_tokens),
+            "stream": True
+        }
+
+        response = http_client.post(api_url, provider="huggingface", headers=headers, json=payload, stream=True)
+        if connections is not None:
+            connections.append(response)
+        rate_limiter.observe("huggingface", response)
+        if response.status_code != 200:
+            message = f"{response.status_code} - {response.text}"
+            response.close()
+            raise RuntimeError(f"Erro na API do Hugging Face: {message}")
+
+        yield from iter_tgi_stream(response)
+
+    def _acquire(self, provider: str) -> bool:
+        """
+        Autoriza uma chamada ao provedor: o disjuntor tem de estar fechado (ou a
+        aceitar um pedido de teste) e o limite de pedidos e a quota diária não
+        podem estar esgotados.
+        """
+        if not self.breakers[provider].allow_request():
+            logger.warning(f"🔌 {provider} ignorado: disjuntor aberto após falhas recentes.")
+            return False
+        if not rate_limiter.acquire(provider):
+            self.breakers[provider].release()
+            return False
+        return True
+
+    def _cached_generation(
+        self,
+        provider: str,
+        prompt: str,
+        max_tokens: int,
+        generate: Callable[[str, int], Optional[str]],
+        use_cache: bool = True
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Consulta a cache de respostas antes de chamar o provedor e guarda a
+        resposta gerada. A chave inclui o provedor, o modelo, o prompt e os
+        parâmetros de geração. Com use_cache=False a cache não é consultada,
+        mas a nova resposta substitui a anterior.
+
+        Se o disjuntor do provedor estiver aberto ou o seu limite de pedidos
+        esgotado, devolve None sem o chamar.
+        """
+        cache_key, model, cached = self._cache_lookup(provider, prompt, max_tokens, use_cache)
+        if cached:
+            return cached
+
+        if not self._acquire(provider):
+            return None
+
+        start = time.monotonic()
+        text = generate(prompt, max_tokens)
+        return self._store_generation(provider, cache_key, model, text, time.monotonic() - start)
+
+    async def _cached_generation_async(
+        self,
+        provider: str,
+        prompt: str,
+        max_tokens: int,
+        generate: Callable[[str, int], Awaitable[Optional[str]]],
+        use_cache: bool = True
+    ) -> Optional[Dict[str, Any]]:
+        """Versão assíncrona de _cached_generation; 'generate' é uma corrotina."""
+        # A cache de respostas pode ser SQLite (I/O bloqueante): fora do event loop
+        cache_key, model, cached = await asyncio.to_thread(
+            self._cache_lookup, provider, prompt, max_tokens, use_cache
+        )
+        if cached:
+            return cached
+
+        # O limitador pode esperar por um token (e usa SQLite): fora do event loop
+        if not await asyncio.to_thread(self._acquire, provider):
+            return None
+
+        start = time.monotonic()
+        try:
+            text = await generate(prompt, max_tokens)
+        except asyncio.CancelledError:
+            # Pedido de cobertura que perdeu: não conta como sucesso nem como falha
+            self.breakers[provider].release()
+            raise
+        return await asyncio.to_thread(
+            self._store_generation, provider, cache_key, model, text, time.monotonic() - start
+        )
+
+    def _cache_lookup(
+        self,
+        provider: str,
+        prompt: str,
+        max_tokens: int,
+        use_cache: bool
+    ) -> Tuple[str, str, Optional[Dict[str, Any]]]:
+        """(chave da cache, modelo, resposta em cache ou None) de um pedido ao provedor."""
+        model = self._model_name(provider)
+        cache_key = self._cache_key(provider, model, prompt, self._generation_params(provider, max_tokens))
+
+        cached_text = self.response_cache.get(cache_key) if use_cache else None
+        if cached_text:
+            logger.info(f"♻️ Resposta do {provider} obtida da cache.")
+            return cache_key, model, {'text': cached_text, 'provider': provider, 'model': model, 'cached': True}
+        return cache_key, model, None
+
+    def _store_generation(
+        self,
+        provider: str,
+        cache_key: str,
+        model: str,
+        text: Optional[str],
+        duration: float
+    ) -> Optional[Dict[str, Any]]:
+        """Regista o resultado no disjuntor (e a latência do primário) e guarda a resposta na cache."""
+        breaker = self.breakers[provider]
+        if not text:
+            breaker.record_failure(duration)
+            return None
+        breaker.record_success(duration)
+        if provider == PRIMARY_PROVIDER:
+            self.hedging['response'].record_latency(duration)
+
+        self.response_cache.set(cache_key, text)
+        return {'text': text, 'provider': provider, 'model': model, 'cached': False}
+
+    def generate_analysis_with_metadata(
+        self,
+        prompt: str,
+        max_tokens: int = 8192,
+        use_cache: bool = True
+    ) -> Optional[Dict[str, Any]]:
         """
         Orquestra a geração da análise, tentando o provedor primário (Gemini)
         e recorrendo ao fallback (Hugging Face) se necessário.
+
+        Pedidos com o mesmo prompt feitos em simultâneo partilham a mesma geração.
+
+        Returns:
+            Um dicionário com 'text', 'provider', 'model' e 'cached' (True se a
+            resposta veio da cache), ou None se todos os provedores falharem.
         """
+        if async_runtime.enabled:
+            return async_runtime.run(self.generate_analysis_with_metadata_async(prompt, max_tokens, use_cache))
+
+        flight_key = hashlib.sha256(f"{max_tokens}:{use_cache}:{prompt}".encode('utf-8')).hexdigest()
+        return self._flight.do(flight_key, lambda: self._generate_with_fallback(prompt, max_tokens, use_cache))
+
+    async def generate_analysis_with_metadata_async(
+        self,
+        prompt: str,
+        max_tokens: int = 8192,
+        use_cache: bool = True
+    ) -> Optional[Dict[str, Any]]:
+        """Versão assíncrona de generate_analysis_with_metadata, para correr no event loop partilhado."""
+        flight_key = hashlib.sha256(f"{max_tokens}:{use_cache}:{prompt}".encode('utf-8')).hexdigest()
+        return await self._async_flight.do(flight_key, lambda: self._generate_with_fallback_async(prompt, max_tokens, use_cache))
+
+    def _generate_with_fallback(self, prompt: str, max_tokens: int, use_cache: bool = True) -> Optional[Dict[str, Any]]:
+        """Tenta cada provedor disponível por ordem de prioridade."""
         logger.info("🚀 Iniciando geração de análise com o AI Manager...")
+
+        if self._can_hedge():
+            return self._generate_hedged(prompt, max_tokens, use_cache)
         
         # 1. Tenta o provedor primário: Gemini
         if self.providers['gemini']['available']:
             logger.info("🧠 A tentar provedor primário: Gemini...")
-            result = self._generate_with_gemini(prompt, max_tokens)
+            result = self._cached_generation('gemini', prompt, max_tokens, self._generate_with_gemini, use_cache)
             if result:
                 return result
             logger.warning("⚠️ Gemini falhou ou retornou resposta vazia. A tentar fallback...")
@@ -131,7 +514,7 @@ class AIManager:
         # 2. Se o primário falhar, tenta o fallback: Hugging Face
         if self.providers['huggingface']['available']:
             logger.info("🧠 A tentar provedor de fallback: Hugging Face...")
-            result = self._generate_with_huggingface(prompt, max_tokens)
+            result = self._cached_generation('huggingface', prompt, max_tokens, self._generate_with_huggingface, use_cache)
             if result:
                 return result
             logger.error("❌ Fallback com Hugging Face também falhou.")
@@ -140,6 +523,401 @@ class AIManager:
         logger.critical("❌ Todos os provedores de IA falharam. Não foi possível gerar a análise.")
         return None
 
+    async def _generate_with_fallback_async(self, prompt: str, max_tokens: int, use_cache: bool = True) -> Optional[Dict[str, Any]]:
+        """Versão assíncrona de _generate_with_fallback."""
+        logger.info("🚀 Iniciando geração de análise com o AI Manager (assíncrono)...")
+
+        if self._can_hedge():
+            return await self._generate_hedged_async(prompt, max_tokens, use_cache)
+
+        generators = [
+            ('gemini', self._generate_with_gemini_async),
+            ('huggingface', self._generate_with_huggingface_async),
+        ]
+        for provider, generate in generators:
+            if not self.providers[provider]['available']:
+                continue
+            logger.info(f"🧠 A tentar provedor: {provider}...")
+            result = await self._cached_generation_async(provider, prompt, max_tokens, generate, use_cache)
+            if result:
+                return result
+            logger.warning(f"⚠️ {provider} falhou ou retornou resposta vazia.")
+
+        logger.critical("❌ Todos os provedores de IA falharam. Não foi possível gerar a análise.")
+        return None
+
+    def _can_hedge(self) -> bool:
+        """A cobertura só faz sentido com o hedging ativo e os dois provedores configurados."""
+        return (
+            self.hedging_enabled
+            and self.providers[PRIMARY_PROVIDER]['available']
+            and self.providers[SECONDARY_PROVIDER]['available']
+        )
+
+    def _generate_hedged(self, prompt: str, max_tokens: int, use_cache: bool) -> Optional[Dict[str, Any]]:
+        """
+        Chama o Gemini e, se não tiver respondido ao fim do atraso de cobertura,
+        chama também o Hugging Face; devolve a primeira resposta válida.
+
+        Um pedido HTTP já enviado não pode ser interrompido: a resposta do
+        perdedor é descartada (mas fica na cache, se esta estiver ativa).
+        """
+        generators = {
+            PRIMARY_PROVIDER: self._generate_with_gemini,
+            SECONDARY_PROVIDER: self._generate_with_huggingface,
+        }
+        results: "queue.Queue" = queue.Queue()
+
+        def run(provider: str) -> None:
+            try:
+                result = self._cached_generation(provider, prompt, max_tokens, generators[provider], use_cache)
+            except Exception as e:
+                logger.error(f"❌ Erro inesperado no {provider}: {e}")
+                result = None
+            results.put((provider, result))
+
+        def launch(provider: str) -> None:
+            threading.Thread(target=run, args=(provider,), name=f"llm-hedge-{provider}", daemon=True).start()
+
+        policy = self.hedging['response']
+        policy.record_request()
+        delay = policy.delay()
+        launch(PRIMARY_PROVIDER)
+
+        try:
+            _, result = results.get(timeout=delay)
+        except queue.Empty:
+            logger.info(f"⏱️ Gemini sem resposta após {delay:.1f}s. A lançar pedido de cobertura ao Hugging Face...")
+            policy.record_hedge()
+            launch(SECONDARY_PROVIDER)
+            for _ in range(len(generators)):
+                provider, result = results.get()
+                if result:
+                    policy.record_win(provider)
+                    logger.info(f"🏁 {provider} respondeu primeiro ao pedido coberto.")
+                    return result
+            logger.critical("❌ Todos os provedores de IA falharam. Não foi possível gerar a análise.")
+            return None
+
+        if result:
+            return result
+        # O primário falhou antes do atraso de cobertura: fallback normal
+        logger.warning("⚠️ Gemini falhou ou retornou resposta vazia. A tentar fallback...")
+        result = self._cached_generation(SECONDARY_PROVIDER, prompt, max_tokens, generators[SECONDARY_PROVIDER], use_cache)
+        if not result:
+            logger.critical("❌ Todos os provedores de IA falharam. Não foi possível gerar a análise.")
+        return result
+
+    async def _generate_hedged_async(self, prompt: str, max_tokens: int, use_cache: bool) -> Optional[Dict[str, Any]]:
+        """
+        Versão assíncrona de _generate_hedged. Aqui o pedido que perde é
+        cancelado, o que fecha a sua ligação HTTP em vez de esperar pela resposta.
+        """
+        generators = {
+            PRIMARY_PROVIDER: self._generate_with_gemini_async,
+            SECONDARY_PROVIDER: self._generate_with_huggingface_async,
+        }
+
+        def launch(provider: str) -> "asyncio.Task":
+            return asyncio.ensure_future(
+                self._cached_generation_async(provider, prompt, max_tokens, generators[provider], use_cache)
+            )
+
+        policy = self.hedging['response']
+        policy.record_request()
+        delay = policy.delay()
+        tasks = {launch(PRIMARY_PROVIDER): PRIMARY_PROVIDER}
+
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done:
+                result = self._task_result(done.pop())
+                if result:
+                    return result
+                # O primário falhou antes do atraso de cobertura: fallback normal
+                logger.warning("⚠️ Gemini falhou ou retornou resposta vazia. A tentar fallback...")
+                result = await launch(SECONDARY_PROVIDER)
+                if not result:
+                    logger.critical("❌ Todos os provedores de IA falharam. Não foi possível gerar a análise.")
+                return result
+
+            logger.info(f"⏱️ Gemini sem resposta após {delay:.1f}s. A lançar pedido de cobertura ao Hugging Face...")
+            policy.record_hedge()
+            tasks[launch(SECONDARY_PROVIDER)] = SECONDARY_PROVIDER
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    result = self._task_result(task)
+                    if result:
+                        policy.record_win(tasks[task])
+                        logger.info(f"🏁 {tasks[task]} respondeu primeiro ao pedido coberto.")
+                        return result
+            logger.critical("❌ Todos os provedores de IA falharam. Não foi possível gerar a análise.")
+            return None
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    @staticmethod
+    def _task_result(task: "asyncio.Task") -> Optional[Dict[str, Any]]:
+        """Resultado de uma tarefa de geração terminada (None se lançou uma exceção)."""
+        if task.exception():
+            logger.error(f"❌ Erro inesperado na geração: {task.exception()}")
+            return None
+        return task.result()
+
+    def generate_analysis_stream(self, prompt: str, max_tokens: int = 8192) -> GenerationStream:
+        """
+        Gera a análise em streaming. O objeto devolvido é iterável e produz os
+        pedaços de texto à medida que chegam; no fim, result() devolve o mesmo
+        dicionário que generate_analysis_with_metadata.
+
+        O fallback para o provedor seguinte só acontece se o stream falhar antes
+        do primeiro pedaço de texto; uma falha a meio termina o stream.
+        """
+        return GenerationStream(self, prompt, max_tokens)
+
+    def _stream_with_fallback(self, stream: GenerationStream) -> Iterator[str]:
+        if self._can_hedge():
+            handled = yield from self._stream_hedged(stream)
+            if handled:
+                return
+
+        streamers = [
+            ('gemini', self._stream_with_gemini),
+            ('huggingface', self._stream_with_huggingface),
+        ]
+        for provider, stream_func in streamers:
+            if not self.providers[provider]['available']:
+                continue
+
+            model = self._model_name(provider)
+            cache_key = self._cache_key(provider, model, stream.prompt, self._generation_params(provider, stream.max_tokens))
+            stream.provider, stream.model = provider, model
+
+            cached_text = self.response_cache.get(cache_key)
+            if cached_text:
+                logger.info(f"♻️ Resposta do {provider} obtida da cache.")
+                stream.cached = True
+                stream.completed = True
+                yield cached_text
+                return
+
+            if not self._acquire(provider):
+                continue
+            breaker = self.breakers[provider]
+
+            logger.info(f"🧠 A gerar análise em streaming com o {provider}...")
+            parts: List[str] = []
+            # A latência registada no disjuntor é a do primeiro pedaço de texto
+            start = time.monotonic()
+            first_chunk_latency = None
+            try:
+                for chunk in stream_func(stream.prompt, stream.max_tokens):
+                    if first_chunk_latency is None:
+                        first_chunk_latency = time.monotonic() - start
+                        if provider == PRIMARY_PROVIDER:
+                            self.hedging['first_token'].record_latency(first_chunk_latency)
+                    parts.append(chunk)
+                    yield chunk
+            except GeneratorExit:
+                # Quem consumia o stream desistiu; o provedor estava a responder
+                breaker.record_success(first_chunk_latency or 0.0)
+                raise
+            except Exception as e:
+                breaker.record_failure(first_chunk_latency or time.monotonic() - start)
+                if parts:
+                    logger.error(f"❌ Stream do {provider} interrompido após {len(''.join(parts))} caracteres: {e}")
+                    return
+                logger.warning(f"⚠️ Stream do {provider} falhou antes do primeiro token: {e}. A tentar fallback...")
+                continue
+
+            if parts:
+                breaker.record_success(first_chunk_latency)
+                logger.info(f"✅ Stream do {provider} concluído.")
+                self.response_cache.set(cache_key, "".join(parts))
+                stream.completed = True
+                return
+            breaker.record_failure(time.monotonic() - start)
+            logger.warning(f"⚠️ {provider} não devolveu conteúdo. A tentar fallback...")
+
+        logger.critical("❌ Todos os provedores de IA falharam. Não foi possível gerar a análise.")
+
+    def _pump_stream(
+        self,
+        provider: str,
+        stream_func: Callable[[str, int], Iterator[str]],
+        stream: GenerationStream,
+        events: "queue.Queue",
+        stop: threading.Event,
+        connections: List[Any]
+    ) -> None:
+        """Lê um stream numa thread e publica na fila eventos (provedor, tipo, valor)."""
+        chunks = stream_func(stream.prompt, stream.max_tokens, connections)
+        try:
+            for chunk in chunks:
+                if stop.is_set():
+                    return
+                events.put((provider, 'chunk', chunk))
+            events.put((provider, 'end', None))
+        except Exception as e:
+            events.put((provider, 'error', e))
+        finally:
+            # Fecha a ligação do provedor (ex.: o stream HTTP do Hugging Face)
+            chunks.close()
+
+    def _stream_hedged(self, stream: GenerationStream) -> Iterator[str]:
+        """
+        Streaming com cobertura: se o Gemini não enviar o primeiro token dentro do
+        atraso de cobertura, o Hugging Face é lançado em paralelo. O primeiro a
+        enviar texto vence; a ligação do outro é fechada a partir daqui (a
+        thread que o lê pode estar bloqueada à espera do próximo pedaço) e a
+        autorização do seu disjuntor é devolvida.
+
+        Devolve (no fim do gerador) False se não chegou a chamar o primário, por
+        estar em cache ou com o disjuntor aberto, para que o fluxo sequencial
+        trate o pedido; True caso contrário.
+        """
+        streamers = {
+            PRIMARY_PROVIDER: self._stream_with_gemini,
+            SECONDARY_PROVIDER: self._stream_with_huggingface,
+        }
+        cache_keys = {
+            provider: self._cache_key(provider, self._model_name(provider), stream.prompt, self._generation_params(provider, stream.max_tokens))
+            for provider in streamers
+        }
+        if self.response_cache.get(cache_keys[PRIMARY_PROVIDER]) or not self._acquire(PRIMARY_PROVIDER):
+            return False
+
+        events: "queue.Queue" = queue.Queue()
+        stops: Dict[str, threading.Event] = {}
+        starts: Dict[str, float] = {}
+        connections: Dict[str, List[Any]] = {}
+        # Provedores cujo disjuntor já recebeu o resultado (sucesso, falha ou devolução)
+        settled: set = set()
+
+        def launch(provider: str) -> None:
+            stops[provider] = threading.Event()
+            starts[provider] = time.monotonic()
+            connections[provider] = []
+            threading.Thread(
+                target=self._pump_stream,
+                args=(provider, streamers[provider], stream, events, stops[provider], connections[provider]),
+                name=f"llm-stream-{provider}",
+                daemon=True
+            ).start()
+
+        def abandon(provider: str) -> None:
+            """Para o stream de um provedor que já não é necessário e devolve a autorização do disjuntor."""
+            stops[provider].set()
+            for connection in list(connections[provider]):
+                try:
+                    connection.close()
+                except Exception as e:
+                    logger.debug(f"Erro ao fechar o stream do {provider}: {e}")
+            if provider not in settled:
+                settled.add(provider)
+                self.breakers[provider].release()
+
+        policy = self.hedging['first_token']
+        policy.record_request()
+        delay = policy.delay()
+        deadline = time.monotonic() + delay
+        logger.info(f"🧠 A gerar análise em streaming com o {PRIMARY_PROVIDER} (com cobertura)...")
+        launch(PRIMARY_PROVIDER)
+        running = {PRIMARY_PROVIDER}
+        hedged = False
+        secondary_tried = False
+        winner = first_chunk = None
+
+        try:
+            # 1. Espera pelo primeiro pedaço de texto de qualquer um dos provedores
+            while winner is None and running:
+                timeout = None if secondary_tried else max(0.0, deadline - time.monotonic())
+                try:
+                    provider, kind, value = events.get(timeout=timeout)
+                except queue.Empty:
+                    secondary_tried = True
+                    if self._acquire(SECONDARY_PROVIDER):
+                        logger.info(f"⏱️ Gemini sem primeiro token após {delay:.1f}s. A lançar stream de cobertura...")
+                        policy.record_hedge()
+                        hedged = True
+                        launch(SECONDARY_PROVIDER)
+                        running.add(SECONDARY_PROVIDER)
+                    continue
+
+                if kind == 'chunk':
+                    winner, first_chunk = provider, value
+                    break
+
+                running.discard(provider)
+                settled.add(provider)
+                self.breakers[provider].record_failure(time.monotonic() - starts[provider])
+                logger.warning(f"⚠️ Stream do {provider} falhou antes do primeiro token: {value or 'sem conteúdo'}.")
+                if not secondary_tried:
+                    # O primário falhou antes do atraso de cobertura: fallback normal
+                    secondary_tried = True
+                    if self._acquire(SECONDARY_PROVIDER):
+                        launch(SECONDARY_PROVIDER)
+                        running.add(SECONDARY_PROVIDER)
+
+            if winner is None:
+                logger.critical("❌ Todos os provedores de IA falharam. Não foi possível gerar a análise.")
+                return True
+
+            latency = time.monotonic() - starts[winner]
+            for provider in running - {winner}:
+                abandon(provider)
+                if provider == PRIMARY_PROVIDER:
+                    # Limite inferior da latência do primário, para o percentil não ficar enviesado
+                    policy.record_latency(time.monotonic() - starts[provider])
+            if winner == PRIMARY_PROVIDER:
+                policy.record_latency(latency)
+            if hedged:
+                policy.record_win(winner)
+                logger.info(f"🏁 {winner} enviou o primeiro token do pedido coberto.")
+
+            # 2. Transmite o resto do stream do vencedor
+            stream.provider, stream.model = winner, self._model_name(winner)
+            parts = [first_chunk]
+            try:
+                yield first_chunk
+                while True:
+                    provider, kind, value = events.get()
+                    if provider != winner:
+                        continue
+                    if kind == 'chunk':
+                        parts.append(value)
+                        yield value
+                    elif kind == 'end':
+                        break
+                    else:
+                        settled.add(winner)
+                        self.breakers[winner].record_failure(latency)
+                        logger.error(f"❌ Stream do {winner} interrompido após {len(''.join(parts))} caracteres: {value}")
+                        return True
+            except GeneratorExit:
+                settled.add(winner)
+                self.breakers[winner].record_success(latency)
+                raise
+
+            settled.add(winner)
+            self.breakers[winner].record_success(latency)
+            logger.info(f"✅ Stream do {winner} concluído.")
+            self.response_cache.set(cache_keys[winner], "".join(parts))
+            stream.completed = True
+            return True
+        finally:
+            # Fecha tudo o que ainda corre (ex.: o vencedor, se o consumidor desistiu)
+            for provider in stops:
+                abandon(provider)
+
+    def generate_analysis(self, prompt: str, max_tokens: int = 8192) -> Optional[str]:
+        """Gera a análise e devolve apenas o texto (ver generate_analysis_with_metadata)."""
+        result = self.generate_analysis_with_metadata(prompt, max_tokens)
+        return result['text'] if result else None
+
 # --- Instância Global ---
 # Cria uma única instância do AIManager para ser usada em toda a aplicação.
 ai_manager = AIManager()
@@ -0,0 +1,138 @@
+# Ficheiro: src/services/async_runtime.py
+
+import asyncio
+import logging
+import os
+import threading
+from typing import Any, Awaitable, Dict, Optional
+
+import httpx
+
+from config import Config
+from services.http_client import IDEMPOTENT_METHODS, RETRY_STATUS_CODES, http_client
+from services.metrics import metrics_registry
+
+logger = logging.getLogger(__name__)
+
+class AsyncRuntime:
+    """
+    Event loop asyncio dedicado, um por processo (worker do gunicorn), a correr
+    numa thread em segundo plano, com um cliente httpx.AsyncClient partilhado.
+
+    Com ASYNC_IO_ENABLED=true, as APIs síncronas dos serviços (multi_search,
+    extract_content, perform_deep_search, generate_analysis...) passam a ser
+    uma camada fina sobre as versões assíncronas: submetem a corrotina a este
+    loop com run() e esperam pelo resultado. Centenas de pedidos HTTP podem
+    estar em curso ao mesmo tempo sem uma thread por pedido.
+
+    O loop é criado no primeiro uso e recriado se o processo tiver sido
+    bifurcado (fork) depois disso.
+    """
+    def __init__(
+        self,
+        enabled: bool = False,
+        max_connections: int = 200,
+        max_keepalive_connections: int = 50,
+        max_retries: int = 2,
+        backoff_factor: float = 0.5
+    ):
+        self.enabled = enabled
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.in_flight = 0
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None or self._pid != os.getpid():
+                self._loop = asyncio.new_event_loop()
+                self._client = None
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._loop.run_forever, name="async-runtime", daemon=True)
+                self._thread.start()
+                logger.info(f"✅ Event loop assíncrono iniciado (processo {self._pid}).")
+            return self._loop
+
+    def run(self, coro: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+        """
+        Executa uma corrotina no loop partilhado e espera pelo resultado.
+        Não pode ser chamado a partir do próprio loop (bloquearia o loop).
+        """
+        loop = self._ensure_loop()
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("AsyncRuntime.run() chamado dentro do event loop; use 'await'.")
+        return asyncio.run_coroutine_threadsafe(coro, loop).result(timeout)
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Cliente HTTP assíncrono do loop atual (criado no primeiro uso)."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive_connections
+                ),
+                # O mesmo comportamento do 'requests' usado no caminho síncrono
+                follow_redirects=True
+            )
+        return self._client
+
+    async def request(self, method: str, url: str, provider: str, **kwargs) -> httpx.Response:
+        """
+        Versão assíncrona de http_client.request: o mesmo timeout por provedor e
+        as mesmas novas tentativas (só em pedidos idempotentes, em falhas de
+        ligação ou respostas 5xx, com backoff exponencial; nunca depois de um
+        timeout de leitura nem em respostas 429).
+        """
+        kwargs.setdefault("timeout", http_client.timeout_for(provider))
+        retries = self.max_retries if method.upper() in IDEMPOTENT_METHODS else 0
+        self.requests += 1
+        self.in_flight += 1
+        try:
+            for attempt in range(retries + 1):
+                try:
+                    response = await self.client.request(method, url, **kwargs)
+                except (httpx.ReadTimeout, httpx.ReadError):
+                    raise
+                except httpx.TransportError:
+                    if attempt >= retries:
+                        raise
+                else:
+                    if response.status_code not in RETRY_STATUS_CODES or attempt >= retries:
+                        return response
+                    await response.aclose()
+                await asyncio.sleep(self.backoff_factor * (2 ** attempt))
+        finally:
+            self.in_flight -= 1
+
+    async def get(self, url: str, provider: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, provider, **kwargs)
+
+    async def post(self, url: str, provider: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, provider, **kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "loop_running": bool(self._loop and self._loop.is_running() and self._pid == os.getpid()),
+            "requests": self.requests,
+            "in_flight": self.in_flight,
+        }
+
+# --- Instância Global ---
+async_runtime = AsyncRuntime(
+    enabled=Config.ASYNC_IO_ENABLED,
+    max_connections=Config.ASYNC_HTTP_MAX_CONNECTIONS,
+    max_keepalive_connections=Config.ASYNC_HTTP_MAX_KEEPALIVE,
+    max_retries=Config.HTTP_MAX_RETRIES,
+    backoff_factor=Config.HTTP_RETRY_BACKOFF
+)
+metrics_registry.register("async_runtime", async_runtime.stats)
@@ -0,0 +1,186 @@
+# Ficheiro: src/services/batch_analysis.py
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config import Config
+from .admission_controller import AdmissionController, analysis_admission
+from .deep_search_service import DeepSearchSources, ExtractionScope, NO_RESULTS_MESSAGE, deep_search_service
+from .enhanced_analysis_engine import enhanced_analysis_engine
+from .progress import ProgressCallback, emit_progress
+from .request_hash import analysis_input_hash
+
+logger = logging.getLogger(__name__)
+
+# Fases de um lote, usadas no progresso do job
+BATCH_PHASES = ["shared_search", "analyses"]
+
+# Executa uma análise com o contexto web já recolhido e retorna (resultado, status_code)
+ItemPipeline = Callable[[Dict[str, Any], str], Tuple[Dict[str, Any], int]]
+# Retorna a análise guardada reutilizável para o hash dos dados de entrada, se existir
+ReuseLookup = Callable[[str], Optional[Dict[str, Any]]]
+
+class BatchAnalysisService:
+    """
+    Executa um lote de análises (vários segmentos/produtos) partilhando o
+    trabalho comum, em vez de N análises independentes:
+
+    1. Itens com os mesmos dados (após normalização) são analisados uma só vez
+       e análises idênticas guardadas recentemente são reutilizadas.
+    2. Pesquisa partilhada: uma busca profunda por consulta distinta, com as
+       extrações de páginas deduplicadas em todo o lote (ExtractionScope).
+       Cada análise recebe o contexto construído a partir dessas fontes.
+    3. As análises, cujo custo é a geração do relatório pela IA, correm com no
+       máximo 'llm_concurrency' em simultâneo para todo o lote (no modo
+       'sharded', cada uma faz até REPORT_SECTION_CONCURRENCY pedidos). Com um
+       'admission', cada análise pede também um lugar a esse controlador, tal
+       como um pedido síncrono, e liberta-o quando termina.
+
+    Cada item concluído é anunciado num evento 'batch_item' (índice e status);
+    os resultados seguem apenas no resumo final, para não ficarem repetidos no
+    histórico de eventos do job.
+    """
+    def __init__(
+        self,
+        max_items: int = 50,
+        search_concurrency: int = 4,
+        llm_concurrency: int = 2,
+        admission: Optional[AdmissionController] = None
+    ):
+        self.max_items = max_items
+        self.search_concurrency = max(1, search_concurrency)
+        self.llm_concurrency = max(1, llm_concurrency)
+        self.admission = admission
+        logger.info(f"✅ Batch Analysis Service inicializado (até {max_items} análises por lote, {self.llm_concurrency} em simultâneo).")
+
+    def _gather_sources(self, queries: List[str], scope: ExtractionScope) -> Dict[str, Optional[DeepSearchSources]]:
+        """Uma busca profunda por consulta distinta, em paralelo e com as extrações partilhadas."""
+        def gather(query: str) -> Optional[DeepSearchSources]:
+            try:
+                return deep_search_service.gather_sources(query, scope=scope)
+            except Exception as e:
+                logger.error(f"❌ Erro na busca partilhada para '{query}': {e}")
+                return None
+
+        with ThreadPoolExecutor(max_workers=self.search_concurrency, thread_name_prefix="batch-search") as executor:
+            return dict(zip(queries, executor.map(gather, queries)))
+
+    @staticmethod
+    def _finish_item(
+        results: List[Optional[Dict[str, Any]]],
+        indexes: List[int],
+        result: Dict[str, Any],
+        status_code: int,
+        progress_callback: Optional[ProgressCallback]
+    ) -> None:
+        for index in indexes:
+            results[index] = {"index": index, "status_code": status_code, "result": result}
+            emit_progress(progress_callback, "batch_item", index=index, status_code=status_code)
+
+    def run(
+        self,
+        items: List[Dict[str, Any]],
+        run_item: ItemPipeline,
+        find_reusable: Optional[ReuseLookup] = None,
+        progress_callback: Optional[ProgressCallback] = None
+    ) -> Tuple[Dict[str, Any], int]:
+        """
+        Executa o lote.
+
+        Args:
+            items: Dados de cada análise (já validados).
+            run_item: Pipeline de uma análise, chamado com (dados, contexto web).
+            find_reusable: Pesquisa opcional de análises guardadas pelo hash dos dados.
+            progress_callback: Recebe as fases do lote e um evento 'batch_item' (índice e status) por item.
+
+        Returns:
+            Um tuplo (resumo com os resultados pela ordem dos itens, status_code HTTP).
+        """
+        start = time.monotonic()
+        logger.info(f"📦 Iniciando lote de {len(items)} análises.")
+        results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+
+        # --- Passo 1: Agrupar itens idênticos e reutilizar análises guardadas ---
+        groups: Dict[str, List[int]] = {}
+        for index, item in enumerate(items):
+            groups.setdefault(analysis_input_hash(item), []).append(index)
+
+        pending: Dict[str, List[int]] = {}
+        reused = 0
+        for input_hash, indexes in groups.items():
+            existing = find_reusable(input_hash) if find_reusable else None
+            if existing:
+                self._finish_item(results, indexes, existing, 200, progress_callback)
+                reused += len(indexes)
+            else:
+                pending[input_hash] = indexes
+
+        # --- Passo 2: Uma busca por consulta distinta, com extrações partilhadas ---
+        queries = {
+            input_hash: enhanced_analysis_engine.generate_search_query(items[indexes[0]])
+            for input_hash, indexes in pending.items()
+        }
+        distinct_queries = list(dict.fromkeys(queries.values()))
+        scope = ExtractionScope()
+        emit_progress(progress_callback, "phase", phase="shared_search", status="started")
+        sources = self._gather_sources(distinct_queries, scope) if distinct_queries else {}
+        emit_progress(
+            progress_callback, "phase", phase="shared_search", status="completed",
+            consultas=len(distinct_queries), **scope.stats()
+        )
+
+        # --- Passo 3: Análises, com um limite de gerações em simultâneo para todo o lote ---
+        def analyse(input_hash: str) -> bool:
+            indexes = pending[input_hash]
+            item = items[indexes[0]]
+            query_sources = sources.get(queries[input_hash])
+            web_context = deep_search_service.build_context(item, query_sources) if query_sources else NO_RESULTS_MESSAGE
+            if self.admission:
+                self.admission.acquire(block=True)
+            item_start = time.monotonic()
+            try:
+                result, status_code = run_item(item, web_context)
+            except Exception as e:
+                logger.error(f"❌ Erro inesperado na análise {indexes[0]} do lote: {e}")
+                result, status_code = {"error": "Ocorreu um erro inesperado no servidor."}, 500
+            finally:
+                if self.admission:
+                    self.admission.release(time.monotonic() - item_start)
+            self._finish_item(results, indexes, result, status_code, progress_callback)
+            return status_code < 400
+
+        emit_progress(progress_callback, "phase", phase="analyses", status="started")
+        with ThreadPoolExecutor(max_workers=self.llm_concurrency, thread_name_prefix="batch-analysis") as executor:
+            succeeded = dict(zip(pending, executor.map(analyse, pending)))
+        emit_progress(progress_callback, "phase", phase="analyses", status="completed")
+
+        failed = sum(len(pending[input_hash]) for input_hash, ok in succeeded.items() if not ok)
+        summary = {
+            "total": len(items),
+            "analisados": len(pending),
+            "reutilizados": reused,
+            "duplicados": len(items) - len(groups),
+            "falhados": failed,
+            "consultas_distintas": len(distinct_queries),
+            **scope.stats(),
+            "duracao_s": round(time.monotonic() - start, 2),
+            "resultados": results,
+        }
+        logger.info(
+            f"🏁 Lote concluído: {len(items)} itens, {len(pending)} analisados, {reused} reutilizados, "
+            f"{len(distinct_queries)} buscas e {scope.extractions} extrações em {summary['duracao_s']}s."
+        )
+        if items and failed == len(items):
+            summary["error"] = "Todas as análises do lote falharam."
+            return summary, 500
+        return summary, 200
+
+# --- Instância Global ---
+batch_analysis_service = BatchAnalysisService(
+    max_items=Config.BATCH_MAX_ITEMS,
+    search_concurrency=Config.BATCH_SEARCH_CONCURRENCY,
+    llm_concurrency=Config.BATCH_LLM_CONCURRENCY,
+    admission=analysis_admission
+)
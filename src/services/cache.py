@@ -0,0 +1,297 @@
+# Ficheiro: src/services/cache.py
+
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Callable, Dict, Any, Optional, Tuple
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+def normalize_text(text: str) -> str:
+    """
+    Normaliza texto para ser usado como chave de cache: minúsculas,
+    sem acentos e com os espaços colapsados.
+    Ex.: "  Marketing   DIGITÁL " -> "marketing digital"
+    """
+    if not text:
+        return ""
+    text = unicodedata.normalize('NFKD', str(text))
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return re.sub(r'\s+', ' ', text).strip().lower()
+
+
+class MemoryCacheBackend:
+    """
+    Backend em memória com TTL e despejo LRU. Rápido, mas local a cada processo
+    e perdido num reinício.
+    """
+    name = "memory"
+
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._data.get(key)
+            if not entry:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, ttl: float) -> None:
+        with self._lock:
+            self._data[key] = (time.time() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def size(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+
+class SQLiteCacheBackend:
+    """
+    Backend persistente em SQLite, partilhado entre os workers do gunicorn e
+    mantido entre reinícios. Despeja as entradas menos usadas recentemente quando
+    excede o número máximo de entradas ou o tamanho máximo em bytes.
+    """
+    name = "sqlite"
+
+    def __init__(self, path: str, max_entries: int = 1000, max_bytes: Optional[int] = None):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " expires_at REAL NOT NULL,"
+                " last_access REAL NOT NULL,"
+                " size INTEGER NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_last_access ON cache (last_access)")
+
+    def _connect(self) -> sqlite3.Connection:
+        # Uma ligação por operação: simples, segura entre threads e entre processos.
+        return sqlite3.connect(self.path, timeout=10)
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT value FROM cache WHERE key = ? AND expires_at > ?", (key, now)
+                ).fetchone()
+                if not row:
+                    return None
+                conn.execute("UPDATE cache SET last_access = ? WHERE key = ?", (now, key))
+                return row[0]
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Erro ao ler da cache SQLite ({self.path}): {e}")
+            return None
+
+    def set(self, key: str, value: str, ttl: float) -> None:
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache (key, value, expires_at, last_access, size) VALUES (?, ?, ?, ?, ?)",
+                    (key, value, now + ttl, now, len(value.encode('utf-8')))
+                )
+                self._evict(conn, now)
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Erro ao escrever na cache SQLite ({self.path}): {e}")
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        """Remove entradas expiradas e, se necessário, as menos usadas recentemente."""
+        conn.execute("DELETE FROM cache WHERE expires_at <= ?", (now,))
+
+        count = conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        if self.max_entries and count > self.max_entries:
+            conn.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY last_access LIMIT ?)",
+                (count - self.max_entries,)
+            )
+
+        if self.max_bytes:
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+            if total > self.max_bytes:
+                excess = total - self.max_bytes
+                freed = 0
+                victims = []
+                for key, size in conn.execute("SELECT key, size FROM cache ORDER BY last_access"):
+                    victims.append((key,))
+                    freed += size
+                    if freed >= excess:
+                        break
+                conn.executemany("DELETE FROM cache WHERE key = ?", victims)
+
+    def delete(self, key: str) -> None:
+        try:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Erro ao apagar da cache SQLite ({self.path}): {e}")
+
+    def size(self) -> int:
+        try:
+            with self._connect() as conn:
+                return conn.execute("SELECT COUNT(*) FROM cache WHERE expires_at > ?", (time.time(),)).fetchone()[0]
+        except sqlite3.Error:
+            return 0
+
+
+class TTLCache:
+    """
+    Cache com TTL sobre um backend plugável. Os valores são guardados em JSON,
+    pelo que cada leitura devolve uma cópia independente do valor guardado.
+    Os contadores de hits/misses são locais a cada processo.
+    """
+    def __init__(self, name: str, backend, ttl: float):
+        self.name = name
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def get(self, key: str) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        raw = self.backend.get(key)
+        with self._lock:
+            if raw is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        if not self.enabled:
+            return
+        try:
+            raw = json.dumps(value, ensure_ascii=False)
+        except (TypeError, ValueError) as e:
+            logger.warning(f"⚠️ Valor não serializável para a cache '{self.name}': {e}")
+            return
+        self.backend.set(key, raw, ttl if ttl is not None else self.ttl)
+
+    def delete(self, key: str) -> None:
+        self.backend.delete(key)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {
+            "backend": self.backend.name,
+            "enabled": self.enabled,
+            "ttl_seconds": self.ttl,
+            "entries": self.backend.size(),
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / total, 3) if total else 0.0,
+        }
+
+
+class MemoCache:
+    """
+    Memoização LRU em memória para funções puras. Ao contrário da TTLCache, os
+    valores não são serializados nem copiados: cada leitura devolve o próprio
+    objeto guardado, que por isso deve ser imutável (ver services.frozen).
+    """
+    def __init__(self, name: str, max_entries: int = 256):
+        self.name = name
+        self.max_entries = max_entries
+        self._data: "OrderedDict[Any, Any]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def get_or_compute(self, key: Any, compute: Callable[[], Any]) -> Any:
+        """Devolve o valor guardado para 'key' ou calcula-o (fora do lock) e guarda-o."""
+        if not self.enabled:
+            return compute()
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+
+        value = compute()
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits, misses, entries = self.hits, self.misses, len(self._data)
+        total = hits + misses
+        return {
+            "backend": "memory",
+            "enabled": self.enabled,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / total, 3) if total else 0.0,
+        }
+
+
+def create_cache(
+    name: str,
+    ttl: float,
+    max_entries: int = 1000,
+    max_bytes: Optional[int] = None,
+    backend: Optional[str] = None
+) -> TTLCache:
+    """
+    Cria uma cache com o backend configurado em CACHE_BACKEND ('memory' ou 'sqlite').
+    O backend SQLite guarda um ficheiro '<name>.sqlite3' em CACHE_DIR.
+    """
+    backend = backend or Config.CACHE_BACKEND
+    if backend == "sqlite":
+        path = os.path.join(Config.CACHE_DIR, f"{name}.sqlite3")
+        try:
+            return TTLCache(name, SQLiteCacheBackend(path, max_entries=max_entries, max_bytes=max_bytes), ttl)
+        except (sqlite3.Error, OSError) as e:
+            logger.error(f"❌ Falha ao abrir a cache SQLite '{path}': {e}. A usar cache em memória.")
+    return TTLCache(name, MemoryCacheBackend(max_entries=max_entries), ttl)
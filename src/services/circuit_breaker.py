@@ -0,0 +1,174 @@
+# Ficheiro: src/services/circuit_breaker.py
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from config import Config
+from services.metrics import metrics_registry
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Disjuntor por provedor, com três estados:
+
+    - closed: os pedidos passam e o resultado de cada um é registado numa janela
+      deslizante de 'window_seconds';
+    - open: a taxa de erros (ou de chamadas lentas) da janela ultrapassou o limite,
+      por isso os pedidos são recusados de imediato durante 'open_seconds';
+    - half_open: terminada a pausa, um único pedido de teste passa; se correr bem
+      o disjuntor fecha, se falhar volta a abrir.
+
+    Quem chama deve pedir autorização com allow_request() e, se a obtiver,
+    registar sempre o resultado com record_success() ou record_failure().
+    """
+    def __init__(
+        self,
+        name: str,
+        slow_call_seconds: Optional[float] = None,
+        window_seconds: float = 120,
+        min_calls: int = 4,
+        failure_rate: float = 0.5,
+        slow_call_rate: float = 0.8,
+        open_seconds: float = 30,
+        enabled: bool = True
+    ):
+        self.name = name
+        self.slow_call_seconds = slow_call_seconds
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_rate = slow_call_rate
+        self.open_seconds = open_seconds
+        self.enabled = enabled
+
+        self.state = CLOSED
+        # (instante, sucesso, lenta) de cada chamada dentro da janela
+        self._calls: Deque[Tuple[float, bool, bool]] = deque()
+        self._opened_at = 0.0
+        self._probe_started: Optional[float] = None
+        self._lock = threading.Lock()
+        self.times_opened = 0
+        self.rejected = 0
+        _breakers.append(self)
+
+    def _trim(self, now: float) -> None:
+        while self._calls and now - self._calls[0][0] > self.window_seconds:
+            self._calls.popleft()
+
+    def _open(self, now: float, reason: str) -> None:
+        self.state = OPEN
+        self._opened_at = now
+        self._probe_started = None
+        self.times_opened += 1
+        logger.warning(f"🔌 Disjuntor '{self.name}' aberto ({reason}). Pedidos recusados durante {self.open_seconds:.0f}s.")
+
+    def allow_request(self) -> bool:
+        """True se o pedido pode seguir para o provedor."""
+        if not self.enabled:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and now - self._opened_at >= self.open_seconds:
+                self.state = HALF_OPEN
+                self._probe_started = None
+            if self.state == HALF_OPEN:
+                # Um teste de cada vez; um teste que nunca registou resultado expira
+                if self._probe_started is None or now - self._probe_started >= self.open_seconds:
+                    self._probe_started = now
+                    logger.info(f"🔎 Disjuntor '{self.name}' meio-aberto: a testar o provedor.")
+                    return True
+            self.rejected += 1
+            return False
+
+    def release(self) -> None:
+        """Devolve uma autorização que não chegou a ser usada (ex.: pedido recusado por outro motivo)."""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probe_started = None
+
+    def record_success(self, duration: float = 0.0) -> None:
+        self._record(True, duration)
+
+    def record_failure(self, duration: float = 0.0) -> None:
+        self._record(False, duration)
+
+    def _record(self, success: bool, duration: float) -> None:
+        slow = self.slow_call_seconds is not None and duration > self.slow_call_seconds
+        now = time.monotonic()
+        with self._lock:
+            if self.state == HALF_OPEN:
+                if success and not slow:
+                    self.state = CLOSED
+                    self._calls.clear()
+                    self._probe_started = None
+                    logger.info(f"✅ Disjuntor '{self.name}' fechado: o provedor recuperou.")
+                else:
+                    self._open(now, "o pedido de teste falhou")
+                return
+            if self.state == OPEN:
+                # Pedidos iniciados antes de o disjuntor abrir
+                return
+
+            self._calls.append((now, success, slow))
+            self._trim(now)
+            total = len(self._calls)
+            if total < self.min_calls:
+                return
+            failures = sum(1 for _, ok, _ in self._calls if not ok)
+            slow_calls = sum(1 for _, _, is_slow in self._calls if is_slow)
+            if failures / total >= self.failure_rate:
+                self._open(now, f"{failures}/{total} falhas em {self.window_seconds:.0f}s")
+            elif slow_calls / total >= self.slow_call_rate:
+                self._open(now, f"{slow_calls}/{total} chamadas acima de {self.slow_call_seconds:.0f}s")
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            self._trim(now)
+            total = len(self._calls)
+            failures = sum(1 for _, ok, _ in self._calls if not ok)
+            slow_calls = sum(1 for _, _, is_slow in self._calls if is_slow)
+            return {
+                "state": self.state,
+                "calls": total,
+                "failure_rate": round(failures / total, 3) if total else 0.0,
+                "slow_call_rate": round(slow_calls / total, 3) if total else 0.0,
+                "retry_in": round(max(0.0, self.open_seconds - (now - self._opened_at)), 1) if self.state == OPEN else 0.0,
+                "times_opened": self.times_opened,
+                "rejected": self.rejected,
+            }
+
+
+_breakers: List[CircuitBreaker] = []
+
+def create_breaker(name: str, provider: Optional[str] = None) -> CircuitBreaker:
+    """
+    Cria um disjuntor com os parâmetros da configuração. 'provider' indica a
+    entrada de CIRCUIT_BREAKER_SLOW_CALLS usada como limite de chamada lenta.
+    """
+    return CircuitBreaker(
+        name,
+        slow_call_seconds=Config.CIRCUIT_BREAKER_SLOW_CALLS.get(provider or name),
+        window_seconds=Config.CIRCUIT_BREAKER_WINDOW,
+        min_calls=Config.CIRCUIT_BREAKER_MIN_CALLS,
+        failure_rate=Config.CIRCUIT_BREAKER_FAILURE_RATE,
+        slow_call_rate=Config.CIRCUIT_BREAKER_SLOW_CALL_RATE,
+        open_seconds=Config.CIRCUIT_BREAKER_OPEN_SECONDS,
+        enabled=Config.CIRCUIT_BREAKER_ENABLED
+    )
+
+def _collect_stats() -> Dict[str, Any]:
+    return {breaker.name: breaker.stats() for breaker in _breakers}
+
+metrics_registry.register("circuit_breakers", _collect_stats)
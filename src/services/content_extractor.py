@@ -1,21 +1,45 @@
 # Ficheiro: src/services/content_extractor.py
 
+import asyncio
 import logging
+import httpx
 import requests
 import re
+import time
 from bs4 import BeautifulSoup
-from typing import Optional
+from typing import Optional, Dict, Any, Tuple
 
 # Importa a configuração para aceder à chave da ScrapingAnt
 from config import Config
+from services.async_runtime import async_runtime
+from services.cache import create_cache
+from services.circuit_breaker import create_breaker
+from services.http_client import http_client
+from services.metrics import metrics_registry
+from services.rate_limiter import rate_limiter
+from services.single_flight import AsyncSingleFlight, SingleFlight
 
 logger = logging.getLogger(__name__)
 
+# Respostas da ScrapingAnt que indicam um problema do serviço (chave, créditos,
+# limite de concorrência) e não da página pedida; os erros 5xx também contam.
+SCRAPINGANT_FAILURE_STATUS = {401, 403, 409, 429}
+
 class ContentExtractor:
     """
     Serviço robusto para extrair o conteúdo principal de uma página web.
     Utiliza uma estratégia primária (ScrapingAnt) e um fallback (requisição direta)
     para garantir a máxima chance de sucesso.
+
+    O texto limpo de cada URL fica numa cache em disco, com os cabeçalhos ETag e
+    Last-Modified da origem. Entradas frescas são servidas diretamente; entradas
+    antigas são revalidadas com um GET condicional (resposta 304 = sem alterações).
+
+    Limitação: a API da ScrapingAnt (a estratégia primária) devolve a página já
+    processada, sem os cabeçalhos da origem, pelo que as páginas obtidas por ela
+    ficam sem validadores e são extraídas de novo por inteiro quando deixam de
+    ser frescas (PAGE_CACHE_FRESH_TTL). Só as páginas obtidas pela requisição
+    direta são revalidadas.
     """
 
     def __init__(self):
@@ -24,6 +48,23 @@ class ContentExtractor:
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
         }
+        self.page_cache_fresh_ttl = Config.PAGE_CACHE_FRESH_TTL
+        self.page_cache = create_cache(
+            "page_content",
+            ttl=Config.PAGE_CACHE_MAX_AGE,
+            max_entries=Config.PAGE_CACHE_MAX_ENTRIES,
+            max_bytes=Config.PAGE_CACHE_MAX_BYTES,
+            backend=Config.PAGE_CACHE_BACKEND
+        )
+        metrics_registry.register("page_cache", self.page_cache.stats)
+        self._flight = SingleFlight("extract")
+        self._async_flight = AsyncSingleFlight("extract_async")
+        # Disjuntores por estratégia. Na requisição direta, só os erros de rede
+        # contam como falha: um 403 ou 404 diz respeito ao site, não à estratégia.
+        self.breakers = {
+            "scrapingant": create_breaker("extract:scrapingant", "scrapingant_extract"),
+            "direct": create_breaker("extract:direct", "direct"),
+        }
         logger.info("✅ Content Extractor inicializado.")
 
     def _clean_text(self, text: str) -> str:
@@ -48,6 +89,39 @@ class ContentExtractor:
         # Limita o tamanho final para não sobrecarregar a IA
         return cleaned_text[:15000]
 
+    def _allow(self, strategy: str) -> bool:
+        """
+        Consulta o disjuntor e o limite de pedidos da estratégia antes de a usar.
+        A requisição direta não tem limites configurados.
+        """
+        if not self.breakers[strategy].allow_request():
+            logger.info(f"🔌 Estratégia '{strategy}' ignorada: disjuntor aberto após falhas recentes.")
+            return False
+        if not rate_limiter.acquire(strategy):
+            self.breakers[strategy].release()
+            return False
+        return True
+
+    def _record_call(self, strategy: str, healthy: bool, start: float) -> None:
+        """Regista no disjuntor o resultado e a duração de uma extração."""
+        duration = time.monotonic() - start
+        if healthy:
+            self.breakers[strategy].record_success(duration)
+        else:
+            self.breakers[strategy].record_failure(duration)
+
+    def _scrapingant_request(self, url: str) -> Tuple[str, Dict[str, str], Dict[str, str]]:
+        """URL, parâmetros e cabeçalhos do pedido à API da ScrapingAnt."""
+        api_url = f"https://api.scrapingant.com/v2/general"
+        params = {'url': url, 'browser': 'false'} # 'browser': 'true' se precisar de renderização JS
+        headers = {'x-api-key': self.scrapingant_key}
+        return api_url, params, headers
+
+    @staticmethod
+    def _scrapingant_healthy(response: Any) -> bool:
+        """False se a resposta indicar um problema do serviço e não da página pedida."""
+        return response.status_code < 500 and response.status_code not in SCRAPINGANT_FAILURE_STATUS
+
     def _extract_with_scrapingant(self, url: str) -> Optional[str]:
         """
         Estratégia primária: usa a API da ScrapingAnt para obter o HTML,
@@ -56,57 +130,155 @@ class ContentExtractor:
         if not self.scrapingant_key:
             logger.warning("⚠️ Chave da ScrapingAnt não configurada. A saltar esta estratégia.")
             return None
-        
+        if not self._allow("scrapingant"):
+            return None
+
+        start = time.monotonic()
+        healthy = False
         try:
-            api_url = f"https://api.scrapingant.com/v2/general"
-            params = {'url': url, 'browser': 'false'} # 'browser': 'true' se precisar de renderização JS
-            headers = {'x-api-key': self.scrapingant_key}
+            api_url, params, headers = self._scrapingant_request(url)
             
-            response = requests.get(api_url, params=params, headers=headers, timeout=45)
+            response = http_client.get(api_url, provider="scrapingant_extract", params=params, headers=headers)
+            healthy = self._scrapingant_healthy(response)
+            rate_limiter.observe("scrapingant", response)
             response.raise_for_status() # Lança um erro para códigos de status ruins (4xx ou 5xx)
 
-            soup = BeautifulSoup(response.content, 'lxml')
-            
-            # Remove elementos de "ruído" (scripts, estilos, menus, rodapés, etc.)
-            for element in soup(["script", "style", "nav", "footer", "header", "aside", "form"]):
-                element.decompose()
-            
-            # Tenta encontrar o conteúdo principal da página
-            main_content = soup.find('main') or soup.find('article') or soup.find('div', class_=re.compile(r'content|main|article|post|body'))
-            
-            text = main_content.get_text(separator='\n', strip=True) if main_content else soup.get_text(separator='\n', strip=True)
-            
+            # Remove o ruído (scripts, estilos, menus, rodapés, etc.) e extrai o conteúdo principal
+            text = self._html_to_text(response.content)
+
             logger.info(f"✅ Conteúdo extraído com sucesso de {url} via ScrapingAnt.")
-            return self._clean_text(text)
+            return text
 
         except requests.RequestException as e:
             logger.warning(f"⚠️ Falha na extração com ScrapingAnt para {url}: {e}")
             return None
+        finally:
+            self._record_call("scrapingant", healthy, start)
+
+    def _html_to_text(self, html: bytes) -> str:
+        """Remove o ruído do HTML e devolve o texto limpo do conteúdo principal."""
+        soup = BeautifulSoup(html, 'lxml')
+
+        for element in soup(["script", "style", "nav", "footer", "header", "aside", "form"]):
+            element.decompose()
+
+        main_content = soup.find('main') or soup.find('article') or soup.find('div', class_=re.compile(r'content|main|article|post|body'))
+        text = main_content.get_text(separator='\n', strip=True) if main_content else soup.get_text(separator='\n', strip=True)
+        return self._clean_text(text)
 
-    def _extract_direct(self, url: str) -> Optional[str]:
+    def _direct_headers(self, cached_page: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        """Cabeçalhos da requisição direta, condicionais se houver uma entrada em cache."""
+        headers = dict(self.headers)
+        if cached_page:
+            if cached_page.get('etag'):
+                headers['If-None-Match'] = cached_page['etag']
+            if cached_page.get('last_modified'):
+                headers['If-Modified-Since'] = cached_page['last_modified']
+        return headers
+
+    @staticmethod
+    def _not_modified_page(url: str, response: Any, cached_page: Dict[str, Any]) -> Dict[str, Any]:
+        """Resultado de uma revalidação com resposta 304: o texto em cache continua válido."""
+        logger.info(f"♻️ Conteúdo de {url} não foi alterado (304).")
+        return {
+            'text': cached_page['text'],
+            'etag': response.headers.get('ETag') or cached_page.get('etag'),
+            'last_modified': response.headers.get('Last-Modified') or cached_page.get('last_modified'),
+            'not_modified': True
+        }
+
+    @staticmethod
+    def _direct_page(url: str, response: Any, text: str) -> Dict[str, Any]:
+        """Resultado de uma requisição direta bem-sucedida."""
+        logger.info(f"✅ Conteúdo extraído com sucesso de {url} via requisição direta.")
+        return {
+            'text': text,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'not_modified': False
+        }
+
+    def _extract_direct(self, url: str, cached_page: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
         """
         Estratégia de fallback: faz uma requisição HTTP direta para obter o HTML.
         Pode falhar em sites com proteção contra scraping.
+
+        Se for passada uma entrada da cache, o pedido é condicional
+        (If-None-Match / If-Modified-Since).
+
+        Returns:
+            Um dicionário com 'text', 'etag', 'last_modified' e 'not_modified',
+            ou None em caso de falha.
         """
+        if not self._allow("direct"):
+            return None
+
+        start = time.monotonic()
+        healthy = True
         try:
-            response = requests.get(url, headers=self.headers, timeout=20)
-            response.raise_for_status()
+            response = http_client.get(url, provider="direct", headers=self._direct_headers(cached_page))
 
-            soup = BeautifulSoup(response.content, 'lxml')
-            
-            for element in soup(["script", "style", "nav", "footer", "header", "aside", "form"]):
-                element.decompose()
-            
-            main_content = soup.find('main') or soup.find('article') or soup.find('div', class_=re.compile(r'content|main|article|post|body'))
-            text = main_content.get_text(separator='\n', strip=True) if main_content else soup.get_text(separator='\n', strip=True)
-            
-            logger.info(f"✅ Conteúdo extraído com sucesso de {url} via requisição direta.")
-            return self._clean_text(text)
+            if response.status_code == 304 and cached_page:
+                return self._not_modified_page(url, response, cached_page)
+
+            response.raise_for_status()
+            text = self._html_to_text(response.content)
+            return self._direct_page(url, response, text)
 
         except requests.RequestException as e:
             logger.warning(f"⚠️ Falha na extração direta para {url}: {e}")
+            healthy = not isinstance(e, (requests.ConnectionError, requests.Timeout))
+            return None
+        finally:
+            self._record_call("direct", healthy, start)
+
+    def _store_page(self, url: str, text: str, etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        """Guarda o texto extraído e os validadores HTTP na cache de páginas."""
+        self.page_cache.set(url, {
+            'text': text,
+            'etag': etag,
+            'last_modified': last_modified,
+            'fetched_at': time.time()
+        })
+
+    def _lookup_page(self, url: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """
+        Consulta a cache de páginas.
+
+        Returns:
+            Um tuplo (entrada a revalidar, texto fresco). O texto vem preenchido se a
+            entrada ainda estiver fresca; a entrada só vem preenchida se estiver
+            antiga mas tiver ETag ou Last-Modified para um GET condicional.
+        """
+        cached_page = self.page_cache.get(url)
+        if not cached_page:
+            return None, None
+
+        if time.time() - cached_page.get('fetched_at', 0) < self.page_cache_fresh_ttl:
+            logger.info(f"♻️ Conteúdo de {url} servido da cache.")
+            return None, cached_page['text']
+
+        # Sem ETag nem Last-Modified não há como revalidar: extrai de novo.
+        if not cached_page.get('etag') and not cached_page.get('last_modified'):
+            return None, None
+        return cached_page, None
+
+    def _get_cached_content(self, url: str) -> Optional[str]:
+        """
+        Devolve o conteúdo em cache se ainda estiver fresco ou se a origem
+        confirmar, via GET condicional, que a página não mudou.
+        """
+        cached_page, fresh_text = self._lookup_page(url)
+        if fresh_text or not cached_page:
+            return fresh_text
+
+        page = self._extract_direct(url, cached_page)
+        if not page or len(page['text']) <= 100:
             return None
 
+        self._store_page(url, page['text'], page['etag'], page['last_modified'])
+        return page['text']
+
     def extract_content(self, url: str) -> Optional[str]:
         """
         Orquestra a extração de conteúdo, tentando a melhor estratégia primeiro.
@@ -115,23 +287,141 @@ class ContentExtractor:
             logger.warning(f"URL inválida fornecida: {url}")
             return None
 
+        if async_runtime.enabled:
+            return async_runtime.run(self.extract_content_async(url))
+
+        # Extrações do mesmo URL em simultâneo partilham o mesmo download.
+        return self._flight.do(url, lambda: self._extract_with_cache(url))
+
+    def _extract_with_cache(self, url: str) -> Optional[str]:
+        """Extrai o conteúdo, servindo da cache sempre que possível."""
+        # 0. Serve da cache se a página for recente ou não tiver mudado
+        cached_content = self._get_cached_content(url)
+        if cached_content:
+            return cached_content
+
         logger.info(f"🚀 Iniciando extração de conteúdo para: {url}")
         
         # 1. Tenta a estratégia mais robusta primeiro (ScrapingAnt)
         content = self._extract_with_scrapingant(url)
+        # A ScrapingAnt não devolve os validadores da origem: estas páginas não são revalidadas
+        etag = last_modified = None
         
         # 2. Se a primeira falhar, tenta a requisição direta como fallback
         if not content:
             logger.info(f"🔄 ScrapingAnt falhou. A tentar requisição direta como fallback...")
-            content = self._extract_direct(url)
+            page = self._extract_direct(url)
+            if page:
+                content, etag, last_modified = page['text'], page['etag'], page['last_modified']
         
+        return self._finish_extraction(url, content, etag, last_modified)
+
+    def _finish_extraction(self, url: str, content: Optional[str], etag: Optional[str], last_modified: Optional[str]) -> Optional[str]:
+        """Guarda o conteúdo extraído na cache, se for substancial."""
         if content and len(content) > 100: # Considera sucesso se o conteúdo for substancial
             logger.info(f"✅ Extração de conteúdo para {url} concluída com sucesso.")
+            self._store_page(url, content, etag, last_modified)
             return content
         else:
             logger.error(f"❌ Todas as estratégias de extração falharam para {url}.")
             return None
 
+    # --- Caminho Assíncrono ---
+
+    async def _extract_with_scrapingant_async(self, url: str) -> Optional[str]:
+        """Versão assíncrona de _extract_with_scrapingant."""
+        if not self.scrapingant_key:
+            logger.warning("⚠️ Chave da ScrapingAnt não configurada. A saltar esta estratégia.")
+            return None
+        if not await asyncio.to_thread(self._allow, "scrapingant"):
+            return None
+
+        start = time.monotonic()
+        healthy = False
+        cancelled = False
+        try:
+            api_url, params, headers = self._scrapingant_request(url)
+            response = await async_runtime.get(api_url, provider="scrapingant_extract", params=params, headers=headers)
+            healthy = self._scrapingant_healthy(response)
+            await asyncio.to_thread(rate_limiter.observe, "scrapingant", response)
+            response.raise_for_status()
+
+            # O parsing do HTML ocupa o CPU: corre fora do event loop
+            text = await asyncio.to_thread(self._html_to_text, response.content)
+            logger.info(f"✅ Conteúdo extraído com sucesso de {url} via ScrapingAnt.")
+            return text
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+        except httpx.HTTPError as e:
+            logger.warning(f"⚠️ Falha na extração com ScrapingAnt para {url}: {e}")
+            return None
+        finally:
+            if cancelled:
+                self.breakers["scrapingant"].release()
+            else:
+                self._record_call("scrapingant", healthy, start)
+
+    async def _extract_direct_async(self, url: str, cached_page: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """Versão assíncrona de _extract_direct."""
+        if not await asyncio.to_thread(self._allow, "direct"):
+            return None
+
+        start = time.monotonic()
+        healthy = True
+        cancelled = False
+        try:
+            response = await async_runtime.get(url, provider="direct", headers=self._direct_headers(cached_page))
+
+            if response.status_code == 304 and cached_page:
+                return self._not_modified_page(url, response, cached_page)
+
+            response.raise_for_status()
+            text = await asyncio.to_thread(self._html_to_text, response.content)
+            return self._direct_page(url, response, text)
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+        except httpx.HTTPError as e:
+            logger.warning(f"⚠️ Falha na extração direta para {url}: {e}")
+            healthy = not isinstance(e, httpx.TransportError)
+            return None
+        finally:
+            if cancelled:
+                self.breakers["direct"].release()
+            else:
+                self._record_call("direct", healthy, start)
+
+    async def extract_content_async(self, url: str) -> Optional[str]:
+        """Versão assíncrona de extract_content, para correr no event loop partilhado."""
+        if not url or not url.startswith('http'):
+            logger.warning(f"URL inválida fornecida: {url}")
+            return None
+        return await self._async_flight.do(url, lambda: self._extract_with_cache_async(url))
+
+    async def _extract_with_cache_async(self, url: str) -> Optional[str]:
+        # A cache pode ser SQLite (I/O bloqueante): lida e escrita fora do event loop
+        cached_page, fresh_text = await asyncio.to_thread(self._lookup_page, url)
+        if fresh_text:
+            return fresh_text
+        if cached_page:
+            page = await self._extract_direct_async(url, cached_page)
+            if page and len(page['text']) > 100:
+                await asyncio.to_thread(self._store_page, url, page['text'], page['etag'], page['last_modified'])
+                return page['text']
+
+        logger.info(f"🚀 Iniciando extração de conteúdo para: {url}")
+        content = await self._extract_with_scrapingant_async(url)
+        # A ScrapingAnt não devolve os validadores da origem: estas páginas não são revalidadas
+        etag = last_modified = None
+        if not content:
+            logger.info(f"🔄 ScrapingAnt falhou. A tentar requisição direta como fallback...")
+            page = await self._extract_direct_async(url)
+            if page:
+                content, etag, last_modified = page['text'], page['etag'], page['last_modified']
+
+        return await asyncio.to_thread(self._finish_extraction, url, content, etag, last_modified)
+
 # --- Instância Global ---
 # Cria uma única instância para ser usada em toda a aplicação.
 content_extractor = ContentExtractor()
@@ -0,0 +1,209 @@
+# Ficheiro: src/services/context_packer.py
+
+import logging
+import math
+import re
+from collections import Counter
+from typing import Dict, Any, List, Set, Tuple
+
+from config import Config
+from services.cache import normalize_text
+
+logger = logging.getLogger(__name__)
+
+# Palavras demasiado comuns para distinguir um trecho de outro
+STOPWORDS = {
+    "a", "o", "as", "os", "um", "uma", "uns", "umas", "de", "da", "do", "das", "dos",
+    "em", "na", "no", "nas", "nos", "por", "para", "pra", "com", "sem", "sobre", "entre",
+    "e", "ou", "mas", "que", "se", "ao", "aos", "como", "mais", "menos", "muito", "muita",
+    "ja", "nao", "sim", "seu", "sua", "seus", "suas", "ele", "ela", "eles", "elas", "isso",
+    "isto", "esse", "essa", "este", "esta", "ser", "sao", "foi", "tem", "ter", "ha", "pelo",
+    "pela", "pelos", "pelas", "the", "and", "of", "to", "in", "for", "is", "on", "with",
+}
+
+# Aproximação usada para modelos em português: ~4 caracteres por token
+CHARS_PER_TOKEN = 4
+
+def estimate_tokens(text: str) -> int:
+    """Estimativa rápida do número de tokens de um texto."""
+    return max(1, math.ceil(len(text) / CHARS_PER_TOKEN))
+
+def tokenize(text: str) -> List[str]:
+    """Termos normalizados (sem acentos, minúsculas), sem stopwords nem palavras curtas."""
+    return [term for term in re.findall(r'\w+', normalize_text(text)) if len(term) > 2 and term not in STOPWORDS]
+
+
+class Passage:
+    """Um trecho de uma página, com a fonte e a posição de onde veio."""
+    def __init__(self, text: str, source_index: int, position: int):
+        self.text = text
+        self.source_index = source_index
+        self.position = position
+        self.terms = tokenize(text)
+        self.tokens = estimate_tokens(text)
+
+
+class BM25Index:
+    """Índice invertido local que ordena trechos pela relevância BM25 face a uma consulta."""
+    def __init__(self, passages: List[Passage], k1: float = 1.5, b: float = 0.75):
+        self.passages = passages
+        self.k1 = k1
+        self.b = b
+        self._term_freqs = [Counter(passage.terms) for passage in passages]
+        self._avg_length = (sum(len(p.terms) for p in passages) / len(passages)) if passages else 0
+        # termo -> índices dos trechos onde aparece
+        self._postings: Dict[str, List[int]] = {}
+        for index, freqs in enumerate(self._term_freqs):
+            for term in freqs:
+                self._postings.setdefault(term, []).append(index)
+
+    def _idf(self, term: str) -> float:
+        doc_freq = len(self._postings.get(term, []))
+        return math.log(1 + (len(self.passages) - doc_freq + 0.5) / (doc_freq + 0.5))
+
+    def scores(self, query_terms: List[str]) -> List[float]:
+        scores = [0.0] * len(self.passages)
+        for term in set(query_terms):
+            idf = self._idf(term)
+            for index in self._postings.get(term, []):
+                freq = self._term_freqs[index][term]
+                length = len(self.passages[index].terms)
+                norm = self.k1 * (1 - self.b + self.b * length / (self._avg_length or 1))
+                scores[index] += idf * freq * (self.k1 + 1) / (freq + norm)
+        return scores
+
+
+class ContextPacker:
+    """
+    Seleciona os trechos mais relevantes das páginas extraídas até preencher um
+    orçamento de tokens, em vez de colar as páginas inteiras no prompt.
+
+    As páginas são divididas em trechos, ordenados por BM25 face à consulta e aos
+    campos do formulário; trechos quase duplicados são descartados. O resultado
+    mantém a atribuição de cada trecho à sua fonte.
+    """
+    def __init__(self, token_budget: int = 6000, passage_chars: int = 800, duplicate_threshold: float = 0.8):
+        self.token_budget = token_budget
+        self.passage_chars = passage_chars
+        self.duplicate_threshold = duplicate_threshold
+
+    def _line_pieces(self, line: str) -> List[str]:
+        """Parte linhas demasiado longas por frases (e, em último caso, por tamanho)."""
+        if len(line) <= self.passage_chars:
+            return [line]
+        pieces = []
+        for sentence in re.split(r'(?<=[.!?])\s+', line):
+            while len(sentence) > self.passage_chars:
+                pieces.append(sentence[:self.passage_chars])
+                sentence = sentence[self.passage_chars:]
+            if sentence:
+                pieces.append(sentence)
+        return pieces
+
+    def split_passages(self, text: str, source_index: int) -> List[Passage]:
+        """Agrupa as linhas de uma página em trechos de até 'passage_chars' caracteres."""
+        passages: List[Passage] = []
+        current: List[str] = []
+        size = 0
+        lines = (piece for line in text.splitlines() if line.strip() for piece in self._line_pieces(line.strip()))
+        for line in lines:
+            if current and size + len(line) > self.passage_chars:
+                passages.append(Passage("\n".join(current), source_index, len(passages)))
+                current, size = [], 0
+            current.append(line)
+            size += len(line) + 1
+        if current:
+            passages.append(Passage("\n".join(current), source_index, len(passages)))
+        return passages
+
+    def _is_near_duplicate(self, terms: Set[str], selected_terms: List[Set[str]]) -> bool:
+        for other in selected_terms:
+            union = len(terms | other)
+            if union and len(terms & other) / union >= self.duplicate_threshold:
+                return True
+        return False
+
+    def select_passages(self, query_text: str, sources: List[Dict[str, Any]]) -> Tuple[List[Passage], int]:
+        """
+        Escolhe os trechos a incluir.
+
+        Returns:
+            Um tuplo (trechos escolhidos pela ordem das fontes, total de trechos disponíveis).
+        """
+        passages = [
+            passage
+            for index, source in enumerate(sources)
+            for passage in self.split_passages(source.get('content') or "", index)
+        ]
+        if not passages:
+            return [], 0
+
+        scores = BM25Index(passages).scores(tokenize(query_text))
+        # Mais relevantes primeiro; em caso de empate, fontes mais bem classificadas e trechos iniciais
+        ranked = sorted(
+            range(len(passages)),
+            key=lambda i: (-scores[i], passages[i].source_index, passages[i].position)
+        )
+
+        selected: List[Passage] = []
+        selected_terms: List[Set[str]] = []
+        used_tokens = 0
+        for index in ranked:
+            passage = passages[index]
+            if used_tokens + passage.tokens > self.token_budget:
+                continue
+            terms = set(passage.terms)
+            if terms and self._is_near_duplicate(terms, selected_terms):
+                continue
+            selected.append(passage)
+            selected_terms.append(terms)
+            used_tokens += passage.tokens
+
+        selected.sort(key=lambda p: (p.source_index, p.position))
+        return selected, len(passages)
+
+    def pack(self, query_text: str, sources: List[Dict[str, Any]]) -> Tuple[str, Dict[str, Any]]:
+        """
+        Monta o bloco de contexto com os melhores trechos, agrupados por fonte.
+
+        Args:
+            query_text: A consulta e os campos do formulário usados para ordenar os trechos.
+            sources: Lista de fontes com 'title', 'url' e 'content', pela ordem do ranking.
+
+        Returns:
+            Um tuplo (texto para o prompt, estatísticas da seleção).
+        """
+        selected, total_passages = self.select_passages(query_text, sources)
+
+        blocks = []
+        sources_used = 0
+        for index, source in enumerate(sources):
+            source_passages = [p.text for p in selected if p.source_index == index]
+            if not source_passages:
+                continue
+            sources_used += 1
+            blocks.append(
+                f"--- INÍCIO DA FONTE ---\n"
+                f"Título: {source.get('title', 'Não disponível')}\n"
+                f"URL: {source.get('url')}\n"
+                f"Trechos Relevantes:\n" + "\n[...]\n".join(source_passages) + "\n"
+                f"--- FIM DA FONTE ---\n\n"
+            )
+
+        stats = {
+            "trechos_selecionados": len(selected),
+            "trechos_disponiveis": total_passages,
+            "fontes_usadas": sources_used,
+            "tokens_estimados": sum(p.tokens for p in selected),
+        }
+        logger.info(
+            f"📦 Contexto compactado: {stats['trechos_selecionados']}/{total_passages} trechos, "
+            f"~{stats['tokens_estimados']} tokens de {sources_used} fontes."
+        )
+        return "".join(blocks), stats
+
+# --- Instância Global ---
+context_packer = ContextPacker(
+    token_budget=Config.WEB_CONTEXT_TOKEN_BUDGET,
+    passage_chars=Config.WEB_CONTEXT_PASSAGE_CHARS
+)
@@ -1,84 +1,464 @@
 # Ficheiro: src/services/deep_search_service.py
 
+import asyncio
 import logging
-from typing import Dict, Any
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
+from typing import Awaitable, Callable, Dict, Any, List, Optional
 from datetime import datetime
+from urllib.parse import urlparse
 
 # Importa os serviços que serão orquestrados
+from .async_runtime import async_runtime
 from .search_manager import search_manager
 from .content_extractor import content_extractor
+from .context_packer import context_packer
+from .progress import ProgressCallback, emit_progress
+from .text_fingerprint import FingerprintIndex
+from config import Config
 
 logger = logging.getLogger(__name__)
 
+NO_RESULTS_MESSAGE = "A pesquisa na web não encontrou fontes relevantes para a sua consulta. A análise será baseada apenas nos dados fornecidos."
+
+
+class DeepSearchSources:
+    """Resultado da pesquisa e das extrações de uma consulta, antes de ser consolidado num contexto."""
+    def __init__(self, query: str, search_results: List[Dict[str, Any]], total_results: int, pages: Dict[int, str]):
+        self.query = query
+        self.search_results = search_results
+        self.total_results = total_results
+        self.pages = pages
+
+
+class _ScopedExtraction:
+    """Uma extração dentro de um ExtractionScope, partilhada por todas as buscas que pedem o mesmo URL."""
+    def __init__(self):
+        self.done = threading.Event()
+        self.content: Optional[str] = None
+        # A busca que a iniciou terminou antes de a fazer: quem esperava tenta de novo
+        self.abandoned = False
+
+
+class ExtractionScope:
+    """
+    Âmbito de extração partilhado por várias buscas (ex.: um lote de análises):
+    cada URL é extraído no máximo uma vez e as buscas seguintes recebem o mesmo
+    conteúdo, mesmo que a cache de páginas esteja desativada. Uma extração que
+    falhe não é repetida dentro do âmbito; uma que não chegou a ser feita
+    (a busca que a pediu terminou antes) volta a poder ser pedida.
+    """
+    def __init__(self):
+        self._calls: Dict[str, _ScopedExtraction] = {}
+        # Tarefas do caminho assíncrono (todas no event loop partilhado)
+        self._tasks: Dict[str, "asyncio.Future"] = {}
+        self._lock = threading.Lock()
+        self.extractions = 0
+        self.shared = 0
+
+    def extract(
+        self,
+        url: str,
+        extract: Callable[[], Optional[str]],
+        cancelled: Callable[[], bool] = lambda: False
+    ) -> Optional[str]:
+        while True:
+            with self._lock:
+                call = self._calls.get(url)
+                leader = call is None
+                if leader:
+                    call = self._calls[url] = _ScopedExtraction()
+                    self.extractions += 1
+                else:
+                    self.shared += 1
+
+            if not leader:
+                call.done.wait()
+                if call.abandoned:
+                    continue
+                return call.content
+            try:
+                call.content = extract()
+                return call.content
+            finally:
+                if call.content is None and cancelled():
+                    with self._lock:
+                        call.abandoned = True
+                        self._calls.pop(url, None)
+                        self.extractions -= 1
+                call.done.set()
+
+    async def extract_async(self, url: str, extract: Callable[[], Awaitable[Optional[str]]]) -> Optional[str]:
+        task = self._tasks.get(url)
+        if task is None:
+            task = self._tasks[url] = asyncio.ensure_future(extract())
+            self.extractions += 1
+        else:
+            self.shared += 1
+        # Cancelar uma das buscas não cancela a extração partilhada com as outras
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, int]:
+        return {"urls_extraidos": self.extractions, "extracoes_partilhadas": self.shared}
+
 class DeepSearchService:
     """
     Serviço de busca profunda que orquestra o SearchManager e o ContentExtractor
     para recolher e consolidar informações da web de forma robusta.
+
+    perform_deep_search_async faz o mesmo no event loop partilhado, com uma
+    tarefa asyncio (e não uma thread) por página; com ASYNC_IO_ENABLED=true,
+    perform_deep_search delega nela.
     """
+    # Tamanho mínimo (em caracteres) para uma página ser considerada substancial (~30 palavras)
+    MIN_CONTENT_LENGTH = 150
+    # Snippets mais curtos do que isto (em palavras) não são comparados: o fingerprint seria pouco fiável
+    MIN_SNIPPET_WORDS = 12
+
     def __init__(self):
-        """Inicializa o serviço de busca profunda."""
+        """Inicializa o serviço de busca profunda e os limites de concorrência da extração."""
+        self.max_workers = Config.DEEP_SEARCH_MAX_WORKERS
+        self.per_host_limit = Config.DEEP_SEARCH_PER_HOST_LIMIT
+        self.deadline_seconds = Config.DEEP_SEARCH_DEADLINE
+        self.target_pages = Config.DEEP_SEARCH_TARGET_PAGES
+        self.deduplicate = Config.DEEP_SEARCH_DEDUPLICATE
+        self.max_duplicate_distance = Config.NEAR_DUPLICATE_MAX_DISTANCE
+        self._host_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._host_lock = threading.Lock()
+        # Semáforos por host do caminho assíncrono, válidos apenas no loop onde foram criados
+        self._async_host_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._async_semaphores_loop: Optional[asyncio.AbstractEventLoop] = None
         logger.info("✅ DeepSearch Service (orquestrador) inicializado.")
 
+    def _host_semaphore(self, url: str) -> threading.BoundedSemaphore:
+        """Retorna o semáforo que limita as extrações simultâneas para o host do URL."""
+        host = urlparse(url).netloc.lower()
+        with self._host_lock:
+            if host not in self._host_semaphores:
+                self._host_semaphores[host] = threading.BoundedSemaphore(self.per_host_limit)
+            return self._host_semaphores[host]
+
+    def _extract_with_limits(
+        self,
+        url: str,
+        stop_event: threading.Event,
+        scope: Optional[ExtractionScope] = None
+    ) -> Optional[str]:
+        """Extrai o conteúdo de um URL respeitando o limite por host (uma só vez por âmbito, se indicado)."""
+        if scope is not None:
+            return scope.extract(url, lambda: self._extract_with_limits(url, stop_event), stop_event.is_set)
+        with self._host_semaphore(url):
+            # A busca pode já ter terminado enquanto esperávamos pela vez deste host
+            if stop_event.is_set():
+                return None
+            return content_extractor.extract_content(url)
+
+    async def _extract_with_limits_async(self, url: str, scope: Optional[ExtractionScope] = None) -> Optional[str]:
+        """Versão assíncrona de _extract_with_limits."""
+        if scope is not None:
+            return await scope.extract_async(url, lambda: self._extract_with_limits_async(url))
+        loop = asyncio.get_running_loop()
+        if self._async_semaphores_loop is not loop:
+            self._async_host_semaphores = {}
+            self._async_semaphores_loop = loop
+        host = urlparse(url).netloc.lower()
+        semaphore = self._async_host_semaphores.setdefault(host, asyncio.Semaphore(self.per_host_limit))
+        async with semaphore:
+            return await content_extractor.extract_content_async(url)
+
+    def _drop_duplicate_snippets(self, search_results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Remove os resultados cujo snippet é quase igual ao de um resultado mais bem
+        classificado (artigos replicados ou espelhos), antes de gastar um download.
+        """
+        index = FingerprintIndex(self.max_duplicate_distance)
+        unique_results = []
+        for result in search_results:
+            snippet = result.get('snippet') or ""
+            if len(snippet.split()) >= self.MIN_SNIPPET_WORDS:
+                duplicate_of = index.add_if_new(snippet, result.get('url'))
+                if duplicate_of:
+                    logger.info(f"🪞 A saltar {result.get('url')}: snippet quase igual ao de {duplicate_of}.")
+                    continue
+            unique_results.append(result)
+        return unique_results
+
+    def _accept_page(
+        self,
+        rank: int,
+        content: Optional[str],
+        search_results: List[Dict[str, Any]],
+        pages: Dict[int, str],
+        fingerprints: FingerprintIndex,
+        progress_callback: Optional[ProgressCallback]
+    ) -> bool:
+        """
+        Guarda o conteúdo de uma página se for substancial e não for quase igual
+        a uma já guardada.
+
+        Returns:
+            True se o número alvo de páginas foi atingido.
+        """
+        if not content or len(content) <= self.MIN_CONTENT_LENGTH:
+            return False
+        if self.deduplicate:
+            duplicate_of = fingerprints.add_if_new(content, rank)
+            if duplicate_of is not None:
+                logger.info(
+                    f"🪞 Conteúdo de {search_results[rank].get('url')} é quase igual ao de "
+                    f"{search_results[duplicate_of].get('url')}. Descartado."
+                )
+                return False
+        pages[rank] = content
+        emit_progress(
+            progress_callback, "page_extracted",
+            url=search_results[rank].get('url'), title=search_results[rank].get('title'),
+            rank=rank, characters=len(content)
+        )
+        if self.target_pages and len(pages) >= self.target_pages:
+            logger.info(f"🎯 {len(pages)} páginas substanciais recolhidas. A terminar a extração mais cedo.")
+            return True
+        return False
+
+    def _extract_pages(
+        self,
+        search_results: List[Dict[str, Any]],
+        deadline: float,
+        progress_callback: Optional[ProgressCallback],
+        scope: Optional[ExtractionScope] = None
+    ) -> Dict[int, str]:
+        """
+        Extrai em paralelo o conteúdo dos resultados da pesquisa.
+
+        Para assim que o número alvo de páginas substanciais é atingido ou o prazo
+        global expira. As extrações ainda pendentes são canceladas e os seus
+        resultados ignorados. Páginas quase iguais a uma já extraída são
+        descartadas e não contam para o número alvo.
+
+        Returns:
+            Um dicionário {posição no ranking: conteúdo} com as páginas substanciais.
+        """
+        pages: Dict[int, str] = {}
+        fingerprints = FingerprintIndex(self.max_duplicate_distance)
+        stop_event = threading.Event()
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="deep-search")
+
+        futures = {}
+        for rank, result in enumerate(search_results):
+            url = result.get('url')
+            if url:
+                logger.info(f"📄 A extrair conteúdo de: {result.get('title', url)}")
+                futures[executor.submit(self._extract_with_limits, url, stop_event, scope)] = rank
+
+        try:
+            for future in as_completed(futures, timeout=max(deadline - time.monotonic(), 0)):
+                rank = futures[future]
+                try:
+                    content = future.result()
+                except Exception as e:
+                    logger.warning(f"⚠️ Erro ao extrair {search_results[rank].get('url')}: {e}")
+                    continue
+
+                if self._accept_page(rank, content, search_results, pages, fingerprints, progress_callback):
+                    break
+        except FuturesTimeoutError:
+            logger.warning(f"⏱️ Prazo da busca profunda esgotado. A continuar com {len(pages)} páginas extraídas.")
+        finally:
+            stop_event.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        return pages
+
+    async def _extract_pages_async(
+        self,
+        search_results: List[Dict[str, Any]],
+        deadline: float,
+        progress_callback: Optional[ProgressCallback],
+        scope: Optional[ExtractionScope] = None
+    ) -> Dict[int, str]:
+        """Versão assíncrona de _extract_pages: as extrações pendentes no fim são canceladas."""
+        pages: Dict[int, str] = {}
+        fingerprints = FingerprintIndex(self.max_duplicate_distance)
+
+        tasks = {}
+        for rank, result in enumerate(search_results):
+            url = result.get('url')
+            if url:
+                logger.info(f"📄 A extrair conteúdo de: {result.get('title', url)}")
+                tasks[asyncio.ensure_future(self._extract_with_limits_async(url, scope))] = rank
+
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, timeout=max(deadline - time.monotonic(), 0), return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    logger.warning(f"⏱️ Prazo da busca profunda esgotado. A continuar com {len(pages)} páginas extraídas.")
+                    break
+                for task in sorted(done, key=lambda t: tasks[t]):
+                    rank = tasks[task]
+                    if task.exception():
+                        logger.warning(f"⚠️ Erro ao extrair {search_results[rank].get('url')}: {task.exception()}")
+                        continue
+                    if self._accept_page(rank, task.result(), search_results, pages, fingerprints, progress_callback):
+                        return pages
+        finally:
+            for task in pending:
+                task.cancel()
+
+        return pages
+
+    def _prepare_results(
+        self,
+        query: str,
+        search_results: List[Dict[str, Any]],
+        progress_callback: Optional[ProgressCallback]
+    ) -> List[Dict[str, Any]]:
+        """Anuncia os resultados da pesquisa e remove os que têm snippets quase duplicados."""
+        emit_progress(
+            progress_callback, "search_results", query=query,
+            results=[{"title": r.get('title'), "url": r.get('url'), "source": r.get('source')} for r in search_results]
+        )
+        if self.deduplicate:
+            return self._drop_duplicate_snippets(search_results)
+        return search_results
+
     def perform_deep_search(
         self,
         query: str,
         context_data: Dict[str, Any],
-        max_results: int = 10
+        max_results: int = 10,
+        progress_callback: Optional[ProgressCallback] = None
     ) -> str:
         """
         Executa o processo completo de busca profunda:
         1. Obtém URLs relevantes através do SearchManager.
-        2. Extrai o conteúdo de cada URL através do ContentExtractor.
-        3. Consolida todo o conteúdo num único texto formatado para a IA.
+        2. Extrai em paralelo o conteúdo das URLs através do ContentExtractor,
+           com limite por host e um prazo global para toda a busca.
+        3. Consolida o conteúdo, pela ordem do ranking, num único texto formatado para a IA.
         
         Args:
             query: A consulta de pesquisa principal.
             context_data: Dados adicionais do formulário para dar contexto.
             max_results: O número máximo de resultados de pesquisa a processar.
+            progress_callback: Função opcional que recebe os resultados da pesquisa
+                               e cada página extraída à medida que ficam prontos.
         
         Returns:
             Uma string formatada com todo o conteúdo recolhido ou uma mensagem de erro.
         """
+        if async_runtime.enabled:
+            return async_runtime.run(self.perform_deep_search_async(query, context_data, max_results, progress_callback))
+
+        sources = self.gather_sources(query, max_results, progress_callback)
+        return self.build_context(context_data, sources) if sources else NO_RESULTS_MESSAGE
+
+    async def perform_deep_search_async(
+        self,
+        query: str,
+        context_data: Dict[str, Any],
+        max_results: int = 10,
+        progress_callback: Optional[ProgressCallback] = None
+    ) -> str:
+        """Versão assíncrona de perform_deep_search, para correr no event loop partilhado."""
+        sources = await self.gather_sources_async(query, max_results, progress_callback)
+        return self.build_context(context_data, sources) if sources else NO_RESULTS_MESSAGE
+
+    def gather_sources(
+        self,
+        query: str,
+        max_results: int = 10,
+        progress_callback: Optional[ProgressCallback] = None,
+        scope: Optional[ExtractionScope] = None
+    ) -> Optional[DeepSearchSources]:
+        """
+        Passos 1 e 2 de perform_deep_search: pesquisa e extrai as páginas, sem
+        as consolidar. Permite que várias análises com a mesma consulta
+        partilhem uma única busca, cada uma com o seu contexto (build_context).
+
+        Returns:
+            As fontes recolhidas ou None se a pesquisa não devolveu resultados.
+        """
+        if async_runtime.enabled:
+            return async_runtime.run(self.gather_sources_async(query, max_results, progress_callback, scope))
+
         logger.info(f"🚀 Iniciando busca profunda orquestrada para: '{query}'")
+        deadline = time.monotonic() + self.deadline_seconds
         
         # --- Passo 1: Obter URLs relevantes ---
         # Chama o search_manager para obter uma lista de links das melhores fontes.
         search_results = search_manager.multi_search(query, max_results=max_results)
+        if not search_results:
+            emit_progress(progress_callback, "search_results", query=query, results=[])
+            logger.warning("A busca profunda não retornou resultados. A análise pode ser limitada.")
+            return None
+
+        total_results = len(search_results)
+        search_results = self._prepare_results(query, search_results, progress_callback)
 
+        # --- Passo 2: Extrair conteúdo das URLs em paralelo ---
+        pages = self._extract_pages(search_results, deadline, progress_callback, scope)
+        return DeepSearchSources(query, search_results, total_results, pages)
+
+    async def gather_sources_async(
+        self,
+        query: str,
+        max_results: int = 10,
+        progress_callback: Optional[ProgressCallback] = None,
+        scope: Optional[ExtractionScope] = None
+    ) -> Optional[DeepSearchSources]:
+        """Versão assíncrona de gather_sources."""
+        logger.info(f"🚀 Iniciando busca profunda orquestrada (assíncrona) para: '{query}'")
+        deadline = time.monotonic() + self.deadline_seconds
+
+        search_results = await search_manager.multi_search_async(query, max_results=max_results)
         if not search_results:
+            emit_progress(progress_callback, "search_results", query=query, results=[])
             logger.warning("A busca profunda não retornou resultados. A análise pode ser limitada.")
-            return "A pesquisa na web não encontrou fontes relevantes para a sua consulta. A análise será baseada apenas nos dados fornecidos."
+            return None
+
+        total_results = len(search_results)
+        search_results = self._prepare_results(query, search_results, progress_callback)
+        pages = await self._extract_pages_async(search_results, deadline, progress_callback, scope)
+        return DeepSearchSources(query, search_results, total_results, pages)
 
-        # --- Passo 2: Extrair conteúdo de cada URL ---
-        # Itera sobre os resultados da busca e usa o content_extractor para obter o texto.
+    def build_context(self, context_data: Dict[str, Any], sources: DeepSearchSources) -> str:
+        """Consolida as páginas extraídas, pela ordem do ranking, no texto enviado à IA."""
+        query, search_results, total_results, pages = (
+            sources.query, sources.search_results, sources.total_results, sources.pages
+        )
+        # --- Passo 3: Consolidar o conteúdo pela ordem do ranking da pesquisa ---
         combined_content = f"CONTEXTO DA PESQUISA NA WEB PARA A CONSULTA: '{query}'\n\n"
-        pages_processed_count = 0
+        extracted_sources = [
+            {"title": result.get('title', 'Não disponível'), "url": result.get('url'), "content": pages[rank]}
+            for rank, result in enumerate(search_results) if pages.get(rank)
+        ]
+        pages_processed_count = len(extracted_sources)
 
-        for result in search_results:
-            url = result.get('url')
-            if not url:
-                continue
-            
-            logger.info(f"📄 A extrair conteúdo de: {result.get('title', url)}")
-            content = content_extractor.extract_content(url)
-            
-            # Apenas adiciona o conteúdo se for substancial
-            if content and len(content) > 150: # Mínimo de ~30 palavras
-                pages_processed_count += 1
+        if extracted_sources and context_packer.token_budget > 0:
+            # Apenas os trechos mais relevantes para a consulta e o formulário, dentro do orçamento de tokens
+            query_text = " ".join([query] + [str(v) for v in context_data.values() if isinstance(v, str)])
+            packed_content, _ = context_packer.pack(query_text, extracted_sources)
+            combined_content += packed_content
+        else:
+            for source in extracted_sources:
                 combined_content += f"--- INÍCIO DA FONTE ---\n"
-                combined_content += f"Título: {result.get('title', 'Não disponível')}\n"
-                combined_content += f"URL: {url}\n"
-                combined_content += f"Conteúdo Extraído:\n{content}\n"
+                combined_content += f"Título: {source['title']}\n"
+                combined_content += f"URL: {source['url']}\n"
+                combined_content += f"Conteúdo Extraído:\n{source['content']}\n"
                 combined_content += f"--- FIM DA FONTE ---\n\n"
         
         if pages_processed_count == 0:
             logger.error("❌ A busca encontrou fontes, mas a extração de conteúdo falhou para todas.")
             return "A pesquisa na web encontrou fontes, mas não foi possível extrair conteúdo detalhado. A análise pode ser limitada."
             
-        # --- Passo 3: Adicionar metadados ao relatório final ---
+        # --- Passo 4: Adicionar metadados ao relatório final ---
         combined_content += f"--- RESUMO DA PESQUISA ---\n"
-        combined_content += f"Data da Pesquisa: {datetime.now().strftime('%d/%m/%Y %H:%M')}\n"
-        combined_content += f"Total de Fontes Encontradas: {len(search_results)}\n"
+        # Apenas a data: a hora mudaria o prompt a cada minuto e impediria reutilizar respostas em cache.
+        combined_content += f"Data da Pesquisa: {datetime.now().strftime('%d/%m/%Y')}\n"
+        combined_content += f"Total de Fontes Encontradas: {total_results}\n"
         combined_content += f"Páginas com Conteúdo Relevante Extraído: {pages_processed_count}\n"
         
         logger.info(f"✅ Busca profunda concluída. {pages_processed_count} páginas processadas.")
@@ -2,96 +2,67 @@
 
 import logging
 import json
-from typing import Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+from config import Config
 
 from .deep_search_service import deep_search_service
 from .ai_manager import ai_manager
 from .psychological_analysis_engine import psychological_analysis_engine
+from .future_prediction_engine import future_prediction_engine
+from .phase_scheduler import PhaseScheduler
+from .progress import ProgressCallback, emit_progress
+from .streaming_json_parser import StreamingJSONParser, parse_llm_json
 
 logger = logging.getLogger(__name__)
 
-class EnhancedAnalysisEngine:
-    def __init__(self):
-        logger.info("✅ Enhanced Analysis Engine (Modo Psicológico Avançado) inicializado.")
-
-    def _generate_search_query(self, data: Dict[str, Any]) -> str:
-        if data.get('query'):
-            return data['query']
-        
-        segmento = data.get('segmento', '')
-        produto = data.get('produto', '')
-        publico = data.get('publico', '')
-        
-        query_parts = [
-            "análise de mercado", segmento, produto,
-            f"para {publico}" if publico else "",
-            "tendências Brasil 2025", "oportunidades e desafios"
-        ]
-        return " ".join(filter(None, query_parts))
-
-    def _build_final_prompt(self, user_data: Dict[str, Any], web_context: str) -> str:
-        user_data.pop('query', None)
-
-        prompt = f"""
-# MISSÃO: ANÁLISE DE MERCADO ESTRATÉGICA E PSICOLÓGICA PROFUNDA (NÍVEL MESTRE)
-
-Você é um consultor de negócios de classe mundial especializado em psicologia de vendas e análise comportamental. 
-Sua tarefa é gerar um relatório COMPLETO e ACIONÁVEL seguindo ESTRITAMENTE a estrutura JSON abaixo.
-
-## 1. DADOS FORNECIDOS PELO UTILIZADOR:
-```json
-{json.dumps(user_data, indent=2, ensure_ascii=False)}
-```
-
-## 2. CONTEXTO RECOLHIDO DA WEB:
-{web_context}
-
-## 3. ESTRUTURA OBRIGATÓRIA DO RELATÓRIO JSON:
+# Tamanho mínimo (em caracteres) de cada evento 'llm_chunk', para não gerar um evento por token
+STREAM_CHUNK_MIN_CHARS = 200
 
-{{
-  "resumo_executivo": "Parágrafo conciso com principais insights e recomendações estratégicas",
-  
-  "analise_mercado": {{
+# Estrutura JSON de cada secção do relatório final, pela ordem em que aparece.
+# O prompt completo junta todas as secções; no modo de geração por secções
+# (REPORT_GENERATION_MODE=sharded) cada grupo de REPORT_SECTION_GROUPS é pedido à parte.
+REPORT_SECTION_SCHEMAS: Dict[str, str] = {
+    "resumo_executivo": '"Parágrafo conciso com principais insights e recomendações estratégicas"',
+    "analise_mercado": """{
     "tamanho_mercado": "Estimativa do tamanho do mercado",
     "principais_tendencias": ["Tendência 1", "Tendência 2", "Tendência 3", "Tendência 4", "Tendência 5"],
     "oportunidades": ["Oportunidade 1", "Oportunidade 2", "Oportunidade 3", "Oportunidade 4"],
     "ameacas": ["Ameaça 1", "Ameaça 2", "Ameaça 3", "Ameaça 4"],
     "nivel_competitividade": "Alto/Médio/Baixo com justificativa"
-  }},
-  
-  "analise_concorrencia": [
-    {{
+  }""",
+    "analise_concorrencia": """[
+    {
       "nome": "Nome do Concorrente",
       "pontos_fortes": ["Força 1", "Força 2", "Força 3"],
       "pontos_fracos": ["Fraqueza 1", "Fraqueza 2", "Fraqueza 3"],
       "posicionamento": "Como se posiciona no mercado",
       "preco_medio": "Faixa de preço praticada"
-    }}
-  ],
-  
-  "estrategia_posicionamento": {{
+    }
+  ]""",
+    "estrategia_posicionamento": """{
     "diferenciacao": "Principal diferencial competitivo",
     "proposta_valor_unica": "Proposta de valor única e clara",
     "publico_alvo_primario": "Definição precisa do público principal",
     "mensagem_central": "Mensagem principal para comunicação"
-  }},
-  
-  "avatar_psicologico_profundo": {{
-    "perfil_demografico": {{
+  }""",
+    "avatar_psicologico_profundo": """{
+    "perfil_demografico": {
       "idade_media": "Faixa etária",
       "genero_predominante": "Masculino/Feminino/Misto",
       "escolaridade": "Nível educacional",
       "renda_familiar": "Faixa de renda",
       "localizacao": "Região geográfica principal"
-    }},
-    "perfil_psicografico": {{
+    },
+    "perfil_psicografico": {
       "arquetipo_dominante": "Arquétipo psicológico principal",
       "nivel_ansiedade": "Alto/Médio/Baixo",
       "orientacao_temporal": "Passado/Presente/Futuro",
       "motivacao_primaria": "Principal motivação",
       "medo_primario": "Principal medo",
       "linguagem_preferida": "Tipo de linguagem que ressoa"
-    }},
+    },
     "dores_viscerais": [
       "Dor emocional profunda 1",
       "Dor emocional profunda 2", 
@@ -123,114 +94,109 @@ Sua tarefa é gerar um relatório COMPLETO e ACIONÁVEL seguindo ESTRITAMENTE a
       "Gatilho emocional 2",
       "Gatilho emocional 3"
     ]
-  }},
-  
-  "drivers_mentais_customizados": [
-    {{
+  }""",
+    "drivers_mentais_customizados": """[
+    {
       "nome": "Nome Impactante do Driver",
       "categoria": "Emocional/Racional",
       "gatilho_central": "Emoção ou lógica core que ativa",
       "mecanica_psicologica": "Como funciona no cérebro",
       "momento_instalacao": "Quando usar na jornada",
-      "roteiro_ativacao": {{
+      "roteiro_ativacao": {
         "pergunta_abertura": "Pergunta que expõe a ferida",
         "historia_analogia": "História ou analogia que ilustra",
         "metafora_visual": "Metáfora que ancora na memória",
         "comando_acao": "Comando que direciona comportamento"
-      }},
+      },
       "frases_ancoragem": [
         "Frase memorável 1",
         "Frase memorável 2",
         "Frase memorável 3"
       ]
-    }}
-  ],
-  
-  "mapeamento_objecoes": {{
-    "objecoes_universais": {{
-      "tempo": {{
+    }
+  ]""",
+    "mapeamento_objecoes": """{
+    "objecoes_universais": {
+      "tempo": {
         "probabilidade": "Alta/Média/Baixa",
         "tratamento": "Como neutralizar",
         "script_neutralizacao": "Script específico"
-      }},
-      "dinheiro": {{
+      },
+      "dinheiro": {
         "probabilidade": "Alta/Média/Baixa", 
         "tratamento": "Como neutralizar",
         "script_neutralizacao": "Script específico"
-      }},
-      "confianca": {{
+      },
+      "confianca": {
         "probabilidade": "Alta/Média/Baixa",
         "tratamento": "Como neutralizar", 
         "script_neutralizacao": "Script específico"
-      }}
-    }},
-    "objecoes_ocultas": {{
-      "autossuficiencia": {{
+      }
+    },
+    "objecoes_ocultas": {
+      "autossuficiencia": {
         "probabilidade": "Alta/Média/Baixa",
         "sinais": ["Sinal 1", "Sinal 2"],
         "tratamento": "Como neutralizar"
-      }},
-      "medo_mudanca": {{
+      },
+      "medo_mudanca": {
         "probabilidade": "Alta/Média/Baixa",
         "sinais": ["Sinal 1", "Sinal 2"],
         "tratamento": "Como neutralizar"
-      }}
-    }}
-  }},
-  
-  "arsenal_provas_visuais": [
-    {{
+      }
+    }
+  }""",
+    "arsenal_provas_visuais": """[
+    {
       "nome_impactante": "Nome da Prova Visual",
       "conceito_alvo": "Conceito que precisa ser provado",
       "categoria": "Destruidora de Objeção/Criadora de Urgência/Instaladora de Crença",
-      "experimento_fisico": {{
+      "experimento_fisico": {
         "materiais": ["Material 1", "Material 2"],
         "setup": "Como preparar",
         "execucao": "Passo a passo da demonstração",
         "climax": "Momento do impacto",
         "bridge": "Como conectar com a vida real"
-      }},
+      },
       "analogia_perfeita": "Assim como X → Na sua vida Y",
       "momento_ideal": "Quando usar na apresentação"
-    }}
-  ],
-  
-  "estrategia_pre_pitch": {{
-    "sequencia_psicologica": {{
-      "fase_despertar": {{
+    }
+  ]""",
+    "estrategia_pre_pitch": """{
+    "sequencia_psicologica": {
+      "fase_despertar": {
         "duracao_minutos": "5-7",
         "objetivo": "Quebrar padrão e criar consciência",
         "drivers_usar": ["Driver 1", "Driver 2"],
         "tecnicas": ["Técnica 1", "Técnica 2"]
-      }},
-      "fase_amplificar": {{
+      },
+      "fase_amplificar": {
         "duracao_minutos": "8-12", 
         "objetivo": "Amplificar desejo e criar tensão",
         "drivers_usar": ["Driver 3", "Driver 4"],
         "tecnicas": ["Técnica 3", "Técnica 4"]
-      }},
-      "fase_pressionar": {{
+      },
+      "fase_pressionar": {
         "duracao_minutos": "5-8",
         "objetivo": "Criar urgência e necessidade", 
         "drivers_usar": ["Driver 5", "Driver 6"],
         "tecnicas": ["Técnica 5", "Técnica 6"]
-      }},
-      "fase_direcionar": {{
+      },
+      "fase_direcionar": {
         "duracao_minutos": "3-5",
         "objetivo": "Apresentar caminho e forçar decisão",
         "drivers_usar": ["Driver 7"],
         "tecnicas": ["Técnica 7"]
-      }}
-    }},
-    "pontes_transicao": {{
+      }
+    },
+    "pontes_transicao": {
       "emocao_para_logica": "Script de transição",
       "problema_para_solucao": "Script de transição", 
       "urgencia_para_acao": "Script de transição"
-    }}
-  }},
-  
-  "plano_acao_90_dias": {{
-    "primeiros_30_dias": {{
+    }
+  }""",
+    "plano_acao_90_dias": """{
+    "primeiros_30_dias": {
       "foco": "Foco principal do período",
       "objetivos": ["Objetivo 1", "Objetivo 2", "Objetivo 3"],
       "acoes_especificas": [
@@ -240,8 +206,8 @@ Sua tarefa é gerar um relatório COMPLETO e ACIONÁVEL seguindo ESTRITAMENTE a
         "Ação específica 4"
       ],
       "metricas": ["Métrica 1", "Métrica 2"]
-    }},
-    "segundos_30_dias": {{
+    },
+    "segundos_30_dias": {
       "foco": "Foco principal do período",
       "objetivos": ["Objetivo 1", "Objetivo 2", "Objetivo 3"],
       "acoes_especificas": [
@@ -251,8 +217,8 @@ Sua tarefa é gerar um relatório COMPLETO e ACIONÁVEL seguindo ESTRITAMENTE a
         "Ação específica 4"
       ],
       "metricas": ["Métrica 1", "Métrica 2"]
-    }},
-    "terceiros_30_dias": {{
+    },
+    "terceiros_30_dias": {
       "foco": "Foco principal do período",
       "objetivos": ["Objetivo 1", "Objetivo 2", "Objetivo 3"],
       "acoes_especificas": [
@@ -262,24 +228,23 @@ Sua tarefa é gerar um relatório COMPLETO e ACIONÁVEL seguindo ESTRITAMENTE a
         "Ação específica 4"
       ],
       "metricas": ["Métrica 1", "Métrica 2"]
-    }}
-  }},
-  
-  "plano_implementacao": {{
-    "cronograma_preparacao": {{
+    }
+  }""",
+    "plano_implementacao": """{
+    "cronograma_preparacao": {
       "2_3_dias_antes": [
         "Atividade preparatória 1",
         "Atividade preparatória 2",
         "Atividade preparatória 3"
       ]
-    }},
-    "checkpoints_execucao": {{
+    },
+    "checkpoints_execucao": {
       "minuto_5": "Primeiro driver instalado",
       "minuto_15": "Primeira prova visual executada", 
       "minuto_30": "Objeções antecipadas",
       "minuto_45": "Pré-pitch iniciado"
-    }},
-    "metricas_sucesso": {{
+    },
+    "metricas_sucesso": {
       "durante_apresentacao": [
         "Métrica 1",
         "Métrica 2",
@@ -290,14 +255,88 @@ Sua tarefa é gerar um relatório COMPLETO e ACIONÁVEL seguindo ESTRITAMENTE a
         "Métrica 2",
         "Métrica 3"
       ]
-    }},
-    "kit_emergencia": {{
+    },
+    "kit_emergencia": {
       "objecoes_inesperadas": "Como lidar",
       "falhas_tecnicas": "Plano B",
       "resistencia_alta": "Técnicas de recuperação"
-    }}
-  }}
-}}
+    }
+  }""",
+}
+
+# Grupos de secções gerados em paralelo no modo 'sharded'. Secções pequenas e
+# relacionadas partilham um pedido para não repetir o contexto web vezes demais.
+REPORT_SECTION_GROUPS: List[List[str]] = [
+    ["resumo_executivo", "analise_mercado", "estrategia_posicionamento"],
+    ["analise_concorrencia"],
+    ["avatar_psicologico_profundo"],
+    ["drivers_mentais_customizados"],
+    ["mapeamento_objecoes"],
+    ["arsenal_provas_visuais"],
+    ["estrategia_pre_pitch"],
+    ["plano_acao_90_dias", "plano_implementacao"],
+]
+
+class EnhancedAnalysisEngine:
+    def __init__(self):
+        logger.info("✅ Enhanced Analysis Engine (Modo Psicológico Avançado) inicializado.")
+
+    def generate_search_query(self, data: Dict[str, Any]) -> str:
+        """Consulta usada na pesquisa web: a indicada pelo utilizador ou uma gerada a partir do formulário."""
+        if data.get('query'):
+            return data['query']
+        
+        segmento = data.get('segmento', '')
+        produto = data.get('produto', '')
+        publico = data.get('publico', '')
+        
+        query_parts = [
+            "análise de mercado", segmento, produto,
+            f"para {publico}" if publico else "",
+            "tendências Brasil 2025", "oportunidades e desafios"
+        ]
+        return " ".join(filter(None, query_parts))
+
+    def _format_report_schema(self, sections: List[str]) -> str:
+        """Monta a estrutura JSON pedida à IA a partir das secções indicadas."""
+        entries = [f'  "{name}": {REPORT_SECTION_SCHEMAS[name]}' for name in sections]
+        return "{\n" + ",\n  \n".join(entries) + "\n}"
+
+    def _build_final_prompt(
+        self,
+        user_data: Dict[str, Any],
+        web_context: str,
+        sections: Optional[List[str]] = None
+    ) -> str:
+        """
+        Constrói o prompt do relatório. Sem 'sections', pede o relatório completo;
+        caso contrário, pede apenas as secções indicadas (modo por secções).
+        """
+        user_data.pop('query', None)
+        schema = self._format_report_schema(sections or list(REPORT_SECTION_SCHEMAS))
+        if sections:
+            task = ("Sua tarefa é gerar APENAS as secções abaixo de um relatório maior, "
+                    "seguindo ESTRITAMENTE a estrutura JSON indicada.")
+        else:
+            task = "Sua tarefa é gerar um relatório COMPLETO e ACIONÁVEL seguindo ESTRITAMENTE a estrutura JSON abaixo."
+
+        prompt = f"""
+# MISSÃO: ANÁLISE DE MERCADO ESTRATÉGICA E PSICOLÓGICA PROFUNDA (NÍVEL MESTRE)
+
+Você é um consultor de negócios de classe mundial especializado em psicologia de vendas e análise comportamental. 
+{task}
+
+## 1. DADOS FORNECIDOS PELO UTILIZADOR:
+```json
+{json.dumps(user_data, indent=2, ensure_ascii=False)}
+```
+
+## 2. CONTEXTO RECOLHIDO DA WEB:
+{web_context}
+
+## 3. ESTRUTURA OBRIGATÓRIA DO RELATÓRIO JSON:
+
+{schema}
 
 **REGRAS CRÍTICAS:**
 - A resposta DEVE ser APENAS o JSON válido, começando com {{ e terminando com }}
@@ -308,46 +347,270 @@ Sua tarefa é gerar um relatório COMPLETO e ACIONÁVEL seguindo ESTRITAMENTE a
 """
         return prompt
 
-    def generate_comprehensive_analysis(self, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        logger.info(f"🚀 Iniciando análise psicológica avançada para: {data.get('segmento')}")
+    def _generate_report_streaming(
+        self,
+        final_prompt: str,
+        progress_callback: ProgressCallback
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Gera o relatório completo em streaming: o texto é reencaminhado à medida
+        que é gerado e cada secção é enviada assim que o seu JSON fecha.
+        """
+        stream = ai_manager.generate_analysis_stream(final_prompt, max_tokens=12000)
+        parser = StreamingJSONParser()
+        buffer = ""
+        for chunk in stream:
+            buffer += chunk
+            if len(buffer) >= STREAM_CHUNK_MIN_CHARS:
+                emit_progress(progress_callback, "llm_chunk", text=buffer)
+                buffer = ""
+            for section, content in parser.feed(chunk):
+                emit_progress(progress_callback, "section_ready", section=section, content=content)
+        if buffer:
+            emit_progress(progress_callback, "llm_chunk", text=buffer)
 
-        try:
-            # Fase 1: Análise Psicológica Profunda
+        if not stream.text:
+            return None
+        truncated = stream.result() is None
+        if truncated:
+            # Stream interrompido a meio: o texto parcial ainda pode ser reparado
+            logger.warning("⚠️ Geração interrompida. A tentar aproveitar o texto parcial.")
+        return {
+            'text': stream.text,
+            'metadata': {
+                'provedor': stream.provider,
+                'modelo': stream.model,
+                'cache': stream.cached,
+                'interrompida': truncated
+            }
+        }
+
+    def _generate_section_group(
+        self,
+        user_data: Dict[str, Any],
+        web_context: str,
+        group: List[str]
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Gera um grupo de secções do relatório, repetindo o pedido (sem cache)
+        se alguma das secções vier em falta ou truncada. Esgotadas as tentativas,
+        fica com o que foi possível recuperar.
+        """
+        prompt = self._build_final_prompt(user_data, web_context, group)
+        sections: Dict[str, Any] = {}
+        result = None
+        attempts = 0
+
+        for attempt in range(1 + Config.REPORT_SECTION_RETRIES):
+            attempts = attempt + 1
+            result = ai_manager.generate_analysis_with_metadata(
+                prompt, max_tokens=Config.REPORT_SECTION_MAX_TOKENS, use_cache=(attempt == 0)
+            )
+            if result:
+                parsed, repaired = parse_llm_json(result['text'])
+                sections = {name: parsed[name] for name in group if parsed and name in parsed}
+                # Uma resposta reparada está truncada: vale a pena pedir de novo
+                if len(sections) == len(group) and not repaired:
+                    break
+            logger.warning(f"⚠️ Secções {group} incompletas (tentativa {attempts}).")
+
+        metadata = {
+            'seccoes': group,
+            'tentativas': attempts,
+            'provedor': result['provider'] if result else None,
+            'modelo': result['model'] if result else None,
+            'cache': result['cached'] if result else False
+        }
+        return sections, metadata
+
+    def _generate_report_sharded(
+        self,
+        user_data: Dict[str, Any],
+        web_context: str,
+        progress_callback: Optional[ProgressCallback]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Gera o relatório por grupos de secções em paralelo, com no máximo
+        REPORT_SECTION_CONCURRENCY pedidos em simultâneo, e junta-os na mesma
+        estrutura do relatório completo.
+        """
+        logger.info(f"🧩 A gerar o relatório em {len(REPORT_SECTION_GROUPS)} partes em paralelo...")
+        # Remove o campo antes de partilhar os dados entre threads
+        user_data.pop('query', None)
+        sections: Dict[str, Any] = {}
+        groups_metadata = []
+
+        with ThreadPoolExecutor(max_workers=Config.REPORT_SECTION_CONCURRENCY, thread_name_prefix="report-section") as executor:
+            futures = [
+                executor.submit(self._generate_section_group, user_data, web_context, group)
+                for group in REPORT_SECTION_GROUPS
+            ]
+            for future in as_completed(futures):
+                group_sections, group_metadata = future.result()
+                groups_metadata.append(group_metadata)
+                for name, content in group_sections.items():
+                    sections[name] = content
+                    emit_progress(progress_callback, "section_ready", section=name, content=content)
+
+        if not sections:
+            return None
+
+        missing = [name for name in REPORT_SECTION_SCHEMAS if name not in sections]
+        if missing:
+            logger.warning(f"⚠️ Secções em falta no relatório: {missing}")
+        return {
+            # Mantém a ordem das secções do relatório completo
+            'sections': {name: sections[name] for name in REPORT_SECTION_SCHEMAS if name in sections},
+            'metadata': {'modo': 'seccoes', 'grupos': groups_metadata, 'seccoes_em_falta': missing}
+        }
+
+    def _tracked_phase(
+        self,
+        name: str,
+        func: Callable[[Dict[str, Any]], Any],
+        progress_callback: Optional[ProgressCallback]
+    ) -> Callable[[Dict[str, Any]], Any]:
+        """Envolve a função de uma fase com os eventos de início, fim e falha."""
+        def run(dependencies: Dict[str, Any]) -> Any:
+            emit_progress(progress_callback, "phase", phase=name, status="started")
+            try:
+                result = func(dependencies)
+            except Exception:
+                emit_progress(progress_callback, "phase", phase=name, status="failed")
+                raise
+            emit_progress(progress_callback, "phase", phase=name, status="completed")
+            return result
+        return run
+
+    def _build_phase_scheduler(
+        self,
+        data: Dict[str, Any],
+        progress_callback: Optional[ProgressCallback],
+        web_context: Optional[str] = None
+    ) -> PhaseScheduler:
+        """
+        Define o grafo de fases da análise. A análise psicológica, a pesquisa web
+        e a predição de tendências são independentes e correm em paralelo; a
+        geração do relatório aguarda pelas três. Se 'web_context' for indicado
+        (ex.: partilhado por um lote de análises), a pesquisa web não é repetida.
+        """
+        def psychological_phase(_: Dict[str, Any]) -> Dict[str, Any]:
             logger.info("🧠 Executando análise psicológica profunda...")
-            psychological_analysis = psychological_analysis_engine.generate_comprehensive_psychological_analysis(data)
-            
-            # Fase 2: Pesquisa Web Contextual
+            analysis = psychological_analysis_engine.generate_comprehensive_psychological_analysis(data)
+            emit_progress(progress_callback, "psychological_analysis", analysis=analysis)
+            return analysis
+
+        def web_search_phase(_: Dict[str, Any]) -> str:
+            if web_context is not None:
+                logger.info("🔍 A usar o contexto web já recolhido.")
+                return web_context
             logger.info("🔍 Realizando pesquisa web contextual...")
-            search_query = self._generate_search_query(data)
-            web_context = deep_search_service.perform_deep_search(search_query, data)
-            
-            # Fase 3: Geração do Relatório Final via IA
+            search_query = self.generate_search_query(data)
+            return deep_search_service.perform_deep_search(search_query, data, progress_callback=progress_callback)
+
+        def future_prediction_phase(_: Dict[str, Any]) -> Dict[str, Any]:
+            logger.info("🔮 Gerando predições de tendências para o segmento...")
+            return future_prediction_engine.predict_market_future(data.get('segmento', ''))
+
+        def report_phase(dependencies: Dict[str, Any]) -> Optional[Dict[str, Any]]:
             logger.info("🤖 Gerando relatório final integrado...")
-            
-            # Combina análise psicológica com contexto web
+            # Combina análise psicológica e predições com o contexto web
             enhanced_data = data.copy()
-            enhanced_data['analise_psicologica'] = psychological_analysis
-            
-            final_prompt = self._build_final_prompt(enhanced_data, web_context)
-            analysis_text = ai_manager.generate_analysis(final_prompt, max_tokens=12000)
+            enhanced_data['analise_psicologica'] = dependencies['psychological_analysis']
+            if dependencies.get('future_prediction'):
+                enhanced_data['predicao_futuro'] = dependencies['future_prediction']
+
+            if Config.REPORT_GENERATION_MODE == "sharded":
+                return self._generate_report_sharded(enhanced_data, dependencies['web_search'], progress_callback)
 
-            if not analysis_text:
+            final_prompt = self._build_final_prompt(enhanced_data, dependencies['web_search'])
+            if not progress_callback:
+                result = ai_manager.generate_analysis_with_metadata(final_prompt, max_tokens=12000)
+                if not result:
+                    return None
+                return {
+                    'text': result['text'],
+                    'metadata': {'provedor': result['provider'], 'modelo': result['model'], 'cache': result['cached']}
+                }
+            return self._generate_report_streaming(final_prompt, progress_callback)
+
+        scheduler = PhaseScheduler(max_workers=3)
+        scheduler.add_phase(
+            "psychological_analysis",
+            self._tracked_phase("psychological_analysis", psychological_phase, progress_callback)
+        )
+        scheduler.add_phase(
+            "web_search",
+            self._tracked_phase("web_search", web_search_phase, progress_callback)
+        )
+        scheduler.add_phase(
+            "future_prediction",
+            self._tracked_phase("future_prediction", future_prediction_phase, progress_callback),
+            optional=True
+        )
+        scheduler.add_phase(
+            "report_generation",
+            self._tracked_phase("report_generation", report_phase, progress_callback),
+            depends_on=["psychological_analysis", "web_search", "future_prediction"]
+        )
+        return scheduler
+
+    def generate_comprehensive_analysis(
+        self,
+        data: Dict[str, Any],
+        progress_callback: Optional[ProgressCallback] = None,
+        web_context: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Executa o pipeline completo de análise.
+
+        Args:
+            data: Dados do formulário do utilizador.
+            progress_callback: Função opcional que recebe eventos de progresso
+                               (ex.: início e fim de cada fase).
+            web_context: Contexto da pesquisa web já recolhido; se indicado,
+                         substitui a pesquisa web desta análise.
+        """
+        logger.info(f"🚀 Iniciando análise psicológica avançada para: {data.get('segmento')}")
+
+        scheduler = self._build_phase_scheduler(data, progress_callback, web_context)
+        psychological_analysis: Dict[str, Any] = {}
+
+        try:
+            # Fases 1 a 3: Análise psicológica, pesquisa web e predições (em paralelo),
+            # seguidas da geração do relatório final via IA
+            phase_results = scheduler.run()
+            psychological_analysis = phase_results['psychological_analysis']
+            report = phase_results['report_generation']
+            execution_metadata = scheduler.execution_metadata()
+            if report:
+                # Identifica o provedor e o modelo usados e se a resposta veio da cache
+                execution_metadata['geracao_ia'] = report['metadata']
+            logger.info(
+                f"⏱️ Fases concluídas em {execution_metadata['duracao_total_s']}s. "
+                f"Caminho crítico: {' -> '.join(execution_metadata['caminho_critico'])}"
+            )
+
+            if not report:
                 logger.error("❌ Falha na geração do relatório pela IA.")
                 # Retorna análise psicológica como fallback
                 return {
                     "status": "partial_success",
                     "message": "Análise psicológica completa, mas falha na geração do relatório final",
-                    **psychological_analysis
+                    **psychological_analysis,
+                    "metadados_execucao": execution_metadata
                 }
 
-            # Processa resposta da IA
-            json_text = analysis_text.strip()
-            if json_text.startswith("```json"):
-                json_text = json_text[7:]
-            if json_text.endswith("```"):
-                json_text = json_text[:-3]
-            
-            analysis_json = json.loads(json_text)
+            # Fase 4: Processa resposta da IA (ignora ```json e repara JSON truncado)
+            if 'sections' in report:
+                analysis_json, repaired = report['sections'], False
+            else:
+                analysis_json, repaired = parse_llm_json(report['text'])
+            if analysis_json is None:
+                raise json.JSONDecodeError("Nenhum objeto JSON na resposta da IA", report['text'], 0)
+            if repaired:
+                logger.warning("⚠️ O JSON da IA estava incompleto e foi reparado.")
+                execution_metadata['relatorio_reparado'] = True
             
             # Integra análise psicológica detalhada
             if 'avatar_psicologico_profundo' not in analysis_json:
@@ -358,7 +621,9 @@ Sua tarefa é gerar um relatório COMPLETO e ACIONÁVEL seguindo ESTRITAMENTE a
                 
             if 'arsenal_provas_visuais' not in analysis_json:
                 analysis_json['arsenal_provas_visuais'] = psychological_analysis['arsenal_provas_visuais']
-            
+
+            analysis_json['metadados_execucao'] = execution_metadata
+            emit_progress(progress_callback, "report_parsed", sections=list(analysis_json.keys()))
             logger.info("✅ Análise psicológica avançada concluída com sucesso!")
             return analysis_json
             
@@ -367,7 +632,8 @@ Sua tarefa é gerar um relatório COMPLETO e ACIONÁVEL seguindo ESTRITAMENTE a
             return {
                 "status": "fallback_success", 
                 "message": "Análise psicológica completa (formato IA inválido)",
-                **psychological_analysis
+                **psychological_analysis,
+                "metadados_execucao": scheduler.execution_metadata()
             }
         except Exception as e:
             logger.error(f"❌ Erro na análise: {e}")
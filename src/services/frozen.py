@@ -0,0 +1,67 @@
+# Ficheiro: src/services/frozen.py
+
+from typing import Any, NoReturn
+
+def _read_only(self, *args: Any, **kwargs: Any) -> NoReturn:
+    raise TypeError(f"{type(self).__name__} é só de leitura; use copy.deepcopy() para obter uma cópia alterável")
+
+
+class FrozenDict(dict):
+    """
+    Dicionário só de leitura, usado para partilhar resultados em cache entre
+    pedidos sem os copiar. Continua a ser um dict (json.dumps, jsonify e
+    isinstance funcionam), mas qualquer alteração levanta TypeError.
+
+    copy() devolve um dict normal (cópia superficial) e copy.deepcopy()
+    devolve uma cópia totalmente alterável de toda a árvore.
+    """
+    __slots__ = ()
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __copy__(self) -> dict:
+        return dict(self)
+
+    def __deepcopy__(self, memo: dict) -> dict:
+        return thaw(self)
+
+    def __reduce__(self):
+        return (type(self), (dict(self),))
+
+
+class FrozenList(list):
+    """Lista só de leitura, equivalente ao FrozenDict para listas."""
+    __slots__ = ()
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    append = clear = extend = insert = pop = remove = reverse = sort = _read_only
+
+    def __copy__(self) -> list:
+        return list(self)
+
+    def __deepcopy__(self, memo: dict) -> list:
+        return thaw(self)
+
+    def __reduce__(self):
+        return (type(self), (list(self),))
+
+
+def freeze(value: Any) -> Any:
+    """Converte recursivamente dicts, listas e tuplos em FrozenDict/FrozenList."""
+    if isinstance(value, FrozenDict) or isinstance(value, FrozenList):
+        return value
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return FrozenList(freeze(item) for item in value)
+    return value
+
+
+def thaw(value: Any) -> Any:
+    """Cópia alterável (dicts e listas normais) de uma árvore congelada por freeze()."""
+    if isinstance(value, dict):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [thaw(item) for item in value]
+    return value
@@ -3,6 +3,8 @@
 import logging
 from typing import Dict, List, Any
 
+from .knowledge_base import knowledge_base
+
 logger = logging.getLogger(__name__)
 
 class FuturePredictionEngine:
@@ -12,56 +14,16 @@ class FuturePredictionEngine:
     fornecer previsões e cenários futuros. Na versão atual, ele seleciona
     tendências relevantes com base no segmento do utilizador. Pode ser expandido
     no futuro para usar modelos de IA preditivos.
+
+    As tendências e os seus segmentos-chave vêm da base de conhecimento
+    partilhada (ver KnowledgeBase), recarregada quando o ficheiro muda.
     """
     def __init__(self):
         """
-        Inicializa o motor e carrega a base de conhecimento de tendências.
+        Inicializa o motor. A base de conhecimento é carregada pelo KnowledgeBase.
         """
-        self.trend_database = self._load_trend_database()
         logger.info("✅ Future Prediction Engine inicializado com a base de conhecimento de tendências.")
 
-    def _load_trend_database(self) -> Dict[str, Dict[str, Any]]:
-        """
-        Define uma base de conhecimento de tendências de mercado globais e tecnológicas.
-        """
-        return {
-            "ia_generativa": {
-                "nome": "Inteligência Artificial Generativa",
-                "descricao": "A IA que cria conteúdo (texto, imagens, código) irá automatizar tarefas criativas e analíticas, tornando-se uma ferramenta essencial em quase todos os setores.",
-                "impacto_esperado": "Disruptivo",
-                "timeline": "2024-2027",
-                "segmentos_chave": ["produtos digitais", "consultoria", "marketing", "educacao"]
-            },
-            "hiper_automacao": {
-                "nome": "Hiper-Automação",
-                "descricao": "A combinação de IA, Machine Learning e RPA (Robotic Process Automation) para automatizar processos de negócios cada vez mais complexos.",
-                "impacto_esperado": "Transformacional",
-                "timeline": "2024-2030",
-                "segmentos_chave": ["e-commerce", "consultoria", "fintech", "saas"]
-            },
-            "sustentabilidade_esg": {
-                "nome": "Sustentabilidade e ESG",
-                "descricao": "Os consumidores e investidores exigem cada vez mais que as empresas demonstrem responsabilidade ambiental, social e de governança (ESG).",
-                "impacto_esperado": "Obrigatório",
-                "timeline": "2024-indefinido",
-                "segmentos_chave": ["e-commerce", "consultoria", "qualquer negócio B2C"]
-            },
-            "economia_da_paixao": {
-                "nome": "Economia da Paixão (Passion Economy)",
-                "descricao": "Criadores de conteúdo, especialistas e artistas estão a monetizar as suas paixões e a construir negócios em torno de nichos de audiência.",
-                "impacto_esperado": "Crescimento Exponencial",
-                "timeline": "2024-2028",
-                "segmentos_chave": ["produtos digitais", "educacao", "consultoria"]
-            },
-            "personalizacao_extrema": {
-                "nome": "Personalização Extrema",
-                "descricao": "Utilizar dados e IA para oferecer produtos, serviços e experiências totalmente personalizados para cada cliente individualmente.",
-                "impacto_esperado": "Diferencial Competitivo Crítico",
-                "timeline": "2024-2026",
-                "segmentos_chave": ["e-commerce", "produtos digitais", "saas"]
-            }
-        }
-
     def predict_market_future(self, segmento: str) -> Dict[str, Any]:
         """
         Analisa o segmento de mercado e retorna as tendências futuras mais relevantes.
@@ -74,20 +36,14 @@ class FuturePredictionEngine:
         """
         logger.info(f"A gerar previsões futuras para o segmento: {segmento}")
         
-        relevant_trends = []
-        segmento_lower = segmento.lower()
+        knowledge = knowledge_base.current()
 
         # Seleciona as tendências mais relevantes para o segmento do utilizador
-        for key, trend in self.trend_database.items():
-            if any(s in segmento_lower for s in trend["segmentos_chave"]):
-                relevant_trends.append(trend)
+        relevant_trends = [trend.to_dict() for trend in knowledge.trends_for(segmento)]
         
         # Se nenhuma tendência específica for encontrada, retorna as mais genéricas
         if not relevant_trends:
-            relevant_trends = [
-                self.trend_database["ia_generativa"],
-                self.trend_database["hiper_automacao"]
-            ]
+            relevant_trends = [knowledge.trends[key].to_dict() for key in knowledge.default_trends if key in knowledge.trends]
             
         # Gera oportunidades e ameaças com base nas tendências selecionadas
         opportunities = [
@@ -0,0 +1,77 @@
+# Ficheiro: src/services/hedging.py
+
+import math
+import threading
+from collections import deque
+from typing import Any, Deque, Dict
+
+class HedgingPolicy:
+    """
+    Política de pedidos de cobertura (hedging) para o provedor primário de IA.
+
+    Guarda as latências recentes do primário e calcula o atraso de cobertura como
+    um percentil dessas latências: se o primário ainda não respondeu ao fim desse
+    tempo, vale a pena lançar o secundário em paralelo. Até haver amostras
+    suficientes usa 'default_delay'; o atraso nunca desce abaixo de 'min_delay'.
+
+    Conta também quantos pedidos foram cobertos e qual dos provedores ganhou,
+    para afinar o equilíbrio entre custo e latência.
+    """
+    def __init__(
+        self,
+        name: str,
+        percentile: float = 95,
+        min_delay: float = 5.0,
+        default_delay: float = 30.0,
+        min_samples: int = 20,
+        max_samples: int = 200
+    ):
+        self.name = name
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.default_delay = default_delay
+        self.min_samples = min_samples
+        self._latencies: Deque[float] = deque(maxlen=max_samples)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.hedged = 0
+        self.wins: Dict[str, int] = {}
+
+    def record_latency(self, seconds: float) -> None:
+        """Regista a latência de uma resposta bem-sucedida do primário."""
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def delay(self) -> float:
+        """Tempo (segundos) a esperar pelo primário antes de lançar o secundário."""
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return max(self.min_delay, self.default_delay)
+            ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, max(0, math.ceil(self.percentile / 100 * len(ordered)) - 1))
+        return max(self.min_delay, ordered[index])
+
+    def record_request(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+    def record_hedge(self) -> None:
+        with self._lock:
+            self.hedged += 1
+
+    def record_win(self, provider: str) -> None:
+        """Regista qual provedor respondeu primeiro num pedido coberto."""
+        with self._lock:
+            self.wins[provider] = self.wins.get(provider, 0) + 1
+
+    def stats(self) -> Dict[str, Any]:
+        delay = self.delay()
+        with self._lock:
+            return {
+                "hedge_delay": round(delay, 2),
+                "samples": len(self._latencies),
+                "requests": self.requests,
+                "hedged": self.hedged,
+                "hedge_rate": round(self.hedged / self.requests, 3) if self.requests else 0.0,
+                "wins": dict(self.wins),
+            }
@@ -0,0 +1,95 @@
+# Ficheiro: src/services/http_client.py
+
+import logging
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Dict, Optional
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Apenas pedidos idempotentes são repetidos automaticamente.
+IDEMPOTENT_METHODS = frozenset(["GET", "HEAD", "OPTIONS"])
+# 429 não é repetido aqui: cada nova tentativa gastaria quota (Google CSE, créditos
+# ScrapingAnt) sem passar pelo rate_limiter, e o Retry-After do servidor não tem limite.
+# A resposta 429 chega ao serviço, que a regista no rate_limiter e no disjuntor.
+RETRY_STATUS_CODES = (500, 502, 503, 504)
+
+class HTTPClient:
+    """
+    Camada HTTP partilhada por todos os serviços que comunicam com APIs externas.
+
+    Usa uma única sessão 'requests' com pools de ligações por host e keep-alive,
+    evitando um novo handshake TCP/TLS em cada chamada. Pedidos idempotentes
+    (GET/HEAD) são repetidos com backoff exponencial em falhas de ligação ou
+    respostas 5xx; pedidos POST nunca são repetidos. Um pedido que expirou à
+    espera da resposta não é repetido, para não multiplicar o timeout (e
+    ultrapassar os prazos da busca profunda). Cada provedor tem o seu próprio
+    timeout, definido em HTTP_TIMEOUTS.
+    """
+    def __init__(
+        self,
+        pool_connections: int = 20,
+        pool_maxsize: int = 20,
+        max_retries: int = 2,
+        backoff_factor: float = 0.5,
+        timeouts: Optional[Dict[str, float]] = None,
+        default_timeout: float = 30
+    ):
+        self.timeouts = timeouts or {}
+        self.default_timeout = default_timeout
+
+        retry = Retry(
+            total=max_retries,
+            # Sem novas tentativas depois de o pedido ter sido enviado (inclui timeouts de leitura)
+            read=0,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=IDEMPOTENT_METHODS,
+            respect_retry_after_header=False,
+            # Devolve a última resposta em vez de lançar uma exceção,
+            # para que cada serviço trate o código de estado como já fazia.
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        logger.info(f"✅ Cliente HTTP partilhado inicializado (pool: {pool_maxsize} ligações por host, {max_retries} tentativas).")
+
+    def timeout_for(self, provider: str) -> float:
+        """Devolve o timeout configurado para um provedor."""
+        return self.timeouts.get(provider, self.default_timeout)
+
+    def request(self, method: str, url: str, provider: str, **kwargs) -> requests.Response:
+        """
+        Executa um pedido HTTP através da sessão partilhada.
+
+        Args:
+            method: O método HTTP ('GET', 'POST', ...).
+            url: O URL de destino.
+            provider: Nome do provedor, usado para escolher o timeout.
+            **kwargs: Argumentos aceites por requests.Session.request.
+        """
+        kwargs.setdefault("timeout", self.timeout_for(provider))
+        return self.session.request(method, url, **kwargs)
+
+    def get(self, url: str, provider: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, provider, **kwargs)
+
+    def post(self, url: str, provider: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, provider, **kwargs)
+
+# --- Instância Global ---
+# Uma única sessão por processo, partilhada por todos os serviços.
+http_client = HTTPClient(
+    pool_connections=Config.HTTP_POOL_CONNECTIONS,
+    pool_maxsize=Config.HTTP_POOL_MAXSIZE,
+    max_retries=Config.HTTP_MAX_RETRIES,
+    backoff_factor=Config.HTTP_RETRY_BACKOFF,
+    timeouts=Config.HTTP_TIMEOUTS,
+    default_timeout=Config.HTTP_DEFAULT_TIMEOUT
+)
@@ -1,14 +1,42 @@
 # Ficheiro: src/services/huggingface_client.py
 
+import json
 import logging
 import requests
-from typing import Optional
+from typing import Iterator, Optional
 
 # Importa a configuração centralizada para aceder à chave de API e nomes de modelos
 from config import Config
+from services.http_client import http_client
+from services.rate_limiter import rate_limiter
 
 logger = logging.getLogger(__name__)
 
+def iter_tgi_stream(response: requests.Response) -> Iterator[str]:
+    """
+    Lê uma resposta em streaming no formato do Text Generation Inference
+    (linhas 'data: {...}' de Server-Sent Events) e devolve o texto de cada token.
+    Lança RuntimeError se o servidor reportar um erro a meio do stream.
+    """
+    try:
+        for line in response.iter_lines(decode_unicode=True):
+            if not line or not line.startswith("data:"):
+                continue
+            data = line[5:].strip()
+            if data == "[DONE]":
+                break
+            event = json.loads(data)
+            if event.get("error"):
+                raise RuntimeError(event["error"])
+            token = event.get("token") or {}
+            # Tokens especiais (ex.: fim de sequência) não fazem parte do texto
+            if token.get("special"):
+                continue
+            if token.get("text"):
+                yield token["text"]
+    finally:
+        response.close()
+
 class HuggingFaceClient:
     """
     Cliente para interagir com a Hugging Face Inference API.
@@ -55,9 +83,14 @@ class HuggingFaceClient:
             }
         }
 
+        # A conta é a mesma do AIManager: partilha o limite de pedidos e a quota diária
+        if not rate_limiter.acquire("huggingface"):
+            return None
+
         logger.info(f"🤖 A enviar pedido para a API do Hugging Face (Modelo: {model_name})...")
         try:
-            response = requests.post(api_url, headers=headers, json=payload, timeout=90) # Timeout mais longo para modelos maiores
+            response = http_client.post(api_url, provider="huggingface_client", headers=headers, json=payload) # Timeout mais longo para modelos maiores
+            rate_limiter.observe("huggingface", response)
 
             if response.status_code == 200:
                 result = response.json()
@@ -0,0 +1,291 @@
+# Ficheiro: src/services/job_manager.py
+
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import Executor, ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Deque, Dict, Any, List, Optional, Tuple
+
+from config import Config
+from .admission_controller import AdmissionController, analysis_admission
+from .progress import ProgressCallback
+
+logger = logging.getLogger(__name__)
+
+# Fases do pipeline de análise, pela ordem em que são normalmente concluídas.
+ANALYSIS_PHASES = ["psychological_analysis", "web_search", "future_prediction", "report_generation"]
+
+class AnalysisJob:
+    """
+    Representa uma análise executada em segundo plano.
+    Guarda o estado, o progresso por fase e o resultado final.
+
+    O histórico de eventos guarda no máximo 'max_events' eventos (os mais
+    antigos são descartados) e, quando o job termina, perde os 'llm_chunk',
+    que só interessam enquanto o relatório está a ser gerado.
+    """
+    def __init__(
+        self,
+        payload: Dict[str, Any],
+        dedupe_key: Optional[str] = None,
+        phases: Optional[List[str]] = None,
+        max_events: int = 2000
+    ):
+        self.id = uuid.uuid4().hex
+        self.payload = payload
+        # Hash dos dados normalizados, usado para reaproveitar jobs idênticos em curso
+        self.dedupe_key = dedupe_key
+        self.status = "queued"
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.phases: Dict[str, Dict[str, Any]] = {
+            phase: {"status": "pending"} for phase in (phases or ANALYSIS_PHASES)
+        }
+        self.result: Optional[Dict[str, Any]] = None
+        self.status_code: Optional[int] = None
+        self.error: Optional[str] = None
+        # Histórico de eventos de progresso, consumido pelo stream SSE.
+        self.events: Deque[Dict[str, Any]] = deque(maxlen=max_events)
+        self._last_event_id = 0
+
+    def add_event(self, event: str, data: Dict[str, Any]) -> None:
+        self._last_event_id += 1
+        self.events.append({"id": self._last_event_id, "event": event, "data": data})
+
+    def events_after(self, after_id: int) -> List[Dict[str, Any]]:
+        """
+        Eventos com ID superior a 'after_id'. O evento 'done' é devolvido com o
+        resultado do job, que não é guardado no histórico para não o duplicar.
+        """
+        return [
+            {**event, "data": {**event["data"], "result": self.result}} if event["event"] == "done" else event
+            for event in self.events if event["id"] > after_id
+        ]
+
+    def drop_chunk_events(self) -> None:
+        """Descarta os eventos 'llm_chunk' (texto parcial do relatório) de um job terminado."""
+        self.events = deque((event for event in self.events if event["event"] != "llm_chunk"), maxlen=self.events.maxlen)
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in ("completed", "failed")
+
+    def _progress_percent(self) -> int:
+        if self.is_finished:
+            return 100
+        completed = sum(1 for p in self.phases.values() if p["status"] == "completed")
+        return int(completed * 100 / len(self.phases)) if self.phases else 0
+
+    def to_dict(self, include_result: bool = True) -> Dict[str, Any]:
+        """Serializa o job para ser devolvido pela API."""
+        data = {
+            "job_id": self.id,
+            "status": self.status,
+            "created_at": datetime.fromtimestamp(self.created_at).isoformat(),
+            "started_at": datetime.fromtimestamp(self.started_at).isoformat() if self.started_at else None,
+            "finished_at": datetime.fromtimestamp(self.finished_at).isoformat() if self.finished_at else None,
+            "progress": {
+                "percent": self._progress_percent(),
+                "phases": {name: dict(info) for name, info in self.phases.items()},
+            },
+        }
+        if self.error:
+            data["error"] = self.error
+        if include_result and self.is_finished:
+            data["result"] = self.result
+        return data
+
+
+class JobManager:
+    """
+    Executa análises em segundo plano num pool limitado de workers.
+
+    O pool é interno ao processo por defeito, mas qualquer `concurrent.futures.Executor`
+    pode ser injetado. Com vários workers do gunicorn, cada processo tem o seu próprio
+    registo de jobs, pelo que o polling deve chegar ao mesmo processo (sticky sessions)
+    ou o servidor deve correr com um único processo e várias threads.
+
+    Com um 'admission' (AdmissionController), cada job só começa quando obtém um
+    lugar desse controlador, partilhando o limite de análises em simultâneo com
+    os pedidos síncronos; até lá, o job continua no estado 'queued'. Jobs
+    submetidos com admit=False (lotes) não pedem esse lugar: o pipeline pede um
+    por cada análise que executa.
+    """
+    def __init__(
+        self,
+        max_workers: int = 4,
+        max_pending: int = 32,
+        result_ttl: int = 3600,
+        max_events: int = 2000,
+        executor: Optional[Executor] = None,
+        admission: Optional[AdmissionController] = None
+    ):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.result_ttl = result_ttl
+        self.max_events = max_events
+        self.admission = admission
+        self._executor = executor or ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="analysis-job"
+        )
+        self._jobs: Dict[str, AnalysisJob] = {}
+        self._lock = threading.Lock()
+        # Acorda os clientes SSE sempre que um job recebe novos eventos.
+        self._events_available = threading.Condition(self._lock)
+        logger.info(f"✅ Job Manager inicializado ({max_workers} workers, fila máxima de {max_pending}).")
+
+    def _purge_expired(self) -> None:
+        """Remove jobs terminados há mais tempo do que o TTL configurado."""
+        now = time.time()
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.is_finished and job.finished_at and now - job.finished_at > self.result_ttl
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def _active_count(self) -> int:
+        return sum(1 for job in self._jobs.values() if not job.is_finished)
+
+    def submit(
+        self,
+        pipeline: Callable[[Dict[str, Any], ProgressCallback], Any],
+        payload: Dict[str, Any],
+        dedupe_key: Optional[str] = None,
+        phases: Optional[List[str]] = None,
+        admit: bool = True
+    ) -> Optional[AnalysisJob]:
+        """
+        Agenda a execução do pipeline para o payload fornecido.
+
+        Args:
+            pipeline: Função que recebe (payload, progress_callback) e retorna
+                      (resultado, status_code).
+            payload: Dados validados do pedido de análise.
+            dedupe_key: Chave opcional; se já existir um job ativo com a mesma
+                        chave, esse job é devolvido em vez de criar outro.
+            phases: Fases reportadas no progresso do job (por defeito, ANALYSIS_PHASES).
+            admit: Se False, o job não pede um lugar ao 'admission' antes de
+                   começar (o pipeline gere a admissão do seu trabalho).
+
+        Returns:
+            O job criado (ou o job idêntico já em curso) ou None se a fila estiver cheia.
+        """
+        with self._lock:
+            self._purge_expired()
+            if dedupe_key:
+                for existing in self._jobs.values():
+                    if existing.dedupe_key == dedupe_key and not existing.is_finished:
+                        logger.info(f"🔗 Análise idêntica já em curso. A reutilizar o job {existing.id}.")
+                        return existing
+            if self._active_count() >= self.max_pending:
+                logger.warning("⚠️ Fila de análises assíncronas cheia. Pedido rejeitado.")
+                return None
+            job = AnalysisJob(payload, dedupe_key, phases, self.max_events)
+            self._jobs[job.id] = job
+
+        self._executor.submit(self._run_job, job, pipeline, admit)
+        logger.info(f"📥 Análise agendada em segundo plano. Job ID: {job.id}")
+        return job
+
+    def _run_job(self, job: AnalysisJob, pipeline: Callable, admit: bool = True) -> None:
+        admission = self.admission if admit else None
+        if admission:
+            admission.acquire(block=True)
+        with self._lock:
+            job.status = "running"
+            job.started_at = time.time()
+
+        start = time.monotonic()
+        result, status_code, error = None, 500, None
+        try:
+            result, status_code = pipeline(job.payload, lambda event, data: self._on_progress(job, event, data))
+            if status_code >= 400:
+                error = (result or {}).get("error", "Falha na análise.")
+        except Exception as e:
+            logger.error(f"❌ Erro inesperado no job {job.id}: {e}")
+            error = "Ocorreu um erro inesperado no servidor."
+        finally:
+            if admission:
+                admission.release(time.monotonic() - start)
+            # O estado final e o evento 'done' são publicados de forma atómica,
+            # para que nenhum cliente SSE veja o job terminado sem o evento final.
+            with self._lock:
+                job.result = result
+                job.status_code = status_code
+                job.error = error
+                job.status = "failed" if error else "completed"
+                job.finished_at = time.time()
+                job.drop_chunk_events()
+                job.add_event("done", {
+                    "status": job.status,
+                    "error": job.error
+                })
+                self._events_available.notify_all()
+            logger.info(f"🏁 Job {job.id} terminado com estado '{job.status}'.")
+
+    def _on_progress(self, job: AnalysisJob, event: str, data: Dict[str, Any]) -> None:
+        """
+        Regista o evento no histórico do job e atualiza o progresso por fase.
+        """
+        with self._lock:
+            job.add_event(event, data)
+            self._events_available.notify_all()
+
+            phase = data.get("phase")
+            status = data.get("status")
+            if event != "phase" or not phase or not status:
+                return
+            entry = job.phases.setdefault(phase, {"status": "pending"})
+            entry["status"] = status
+            if status == "started":
+                entry["started_at"] = datetime.now().isoformat()
+            else:
+                entry["finished_at"] = datetime.now().isoformat()
+
+    def get_snapshot(self, job_id: str, include_result: bool = True) -> Optional[Dict[str, Any]]:
+        """Retorna uma cópia serializável e consistente do estado do job."""
+        with self._lock:
+            self._purge_expired()
+            job = self._jobs.get(job_id)
+            return job.to_dict(include_result=include_result) if job else None
+
+    def wait_for_events(
+        self,
+        job_id: str,
+        after_id: int = 0,
+        timeout: float = 15.0
+    ) -> Tuple[Optional[List[Dict[str, Any]]], bool]:
+        """
+        Aguarda por eventos do job com ID superior a 'after_id'.
+
+        Returns:
+            Um tuplo (eventos novos, job terminado). Os eventos são None se o
+            job não existir. Uma lista vazia indica que o tempo de espera expirou.
+        """
+        deadline = time.time() + timeout
+        with self._events_available:
+            while True:
+                job = self._jobs.get(job_id)
+                if not job:
+                    return None, True
+                if job.events and job.events[-1]["id"] > after_id:
+                    return job.events_after(after_id), job.is_finished
+                remaining = deadline - time.time()
+                if job.is_finished or remaining <= 0:
+                    return [], job.is_finished
+                self._events_available.wait(remaining)
+
+# --- Instância Global ---
+# Cria uma única instância para ser usada em toda a aplicação.
+job_manager = JobManager(
+    max_workers=Config.ANALYSIS_JOB_WORKERS,
+    max_pending=Config.ANALYSIS_JOB_MAX_PENDING,
+    result_ttl=Config.ANALYSIS_JOB_RESULT_TTL,
+    max_events=Config.ANALYSIS_JOB_MAX_EVENTS,
+    admission=analysis_admission
+)
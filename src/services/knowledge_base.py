@@ -0,0 +1,222 @@
+# Ficheiro: src/services/knowledge_base.py
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+from config import Config
+from services.metrics import metrics_registry
+from services.segment_classifier import SegmentClassifier
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "knowledge_base.json")
+
+
+class Record:
+    """
+    Registo imutável da base de conhecimento. Cada subclasse declara os seus
+    campos em __slots__ (o primeiro é sempre 'key'); listas são guardadas como
+    tuplos e voltam a ser listas em to_dict().
+    """
+    __slots__ = ("key",)
+
+    def __init__(self, key: str, data: Dict[str, Any]):
+        object.__setattr__(self, "key", key)
+        for field in self.__slots__[1:]:
+            value = data.get(field)
+            object.__setattr__(self, field, tuple(value) if isinstance(value, list) else value)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"{type(self).__name__} é imutável")
+
+    def to_dict(self, include_key: bool = False) -> Dict[str, Any]:
+        """Os campos do registo num dicionário novo (com 'key' primeiro, se pedido)."""
+        data = {"key": self.key} if include_key else {}
+        for field in self.__slots__[1:]:
+            value = getattr(self, field)
+            if value is not None:
+                data[field] = list(value) if isinstance(value, tuple) else value
+        return data
+
+
+class MentalDriver(Record):
+    __slots__ = ("key", "nome", "categoria", "gatilho", "mecanica", "ativacao", "momento_instalacao")
+
+
+class Objection(Record):
+    __slots__ = ("key", "descricao", "raiz_emocional", "sinais", "tratamento")
+
+
+class UniversalDriver(Record):
+    __slots__ = ("key", "nome", "categoria", "descricao", "exemplo_aplicacao")
+
+
+class MarketTrend(Record):
+    __slots__ = ("key", "nome", "descricao", "impacto_esperado", "timeline", "segmentos_chave")
+
+
+class SegmentRule:
+    """
+    Regra de geração de uma lista (dores, desejos, objeções...): os itens base,
+    os itens acrescentados acima de um preço e os de cada categoria de segmento,
+    por esta ordem, limitados a 'limite' itens.
+    """
+    __slots__ = ("base", "por_preco", "por_categoria", "limite")
+
+    def __init__(self, data: Dict[str, Any]):
+        self.base: Tuple[str, ...] = tuple(data.get("base", []))
+        self.por_preco: Tuple[Tuple[float, Tuple[str, ...]], ...] = tuple(
+            (float(step["acima_de"]), tuple(step["itens"])) for step in data.get("por_preco", [])
+        )
+        self.por_categoria: Tuple[Tuple[str, Tuple[str, ...]], ...] = tuple(
+            (tag, tuple(items)) for tag, items in data.get("por_categoria", {}).items()
+        )
+        self.limite: Optional[int] = data.get("limite")
+
+    def apply(self, segment_tags: FrozenSet[str], preco: Any = None) -> List[str]:
+        items = list(self.base)
+        if preco:
+            for threshold, extra in self.por_preco:
+                if preco > threshold:
+                    items.extend(extra)
+        for tag, extra in self.por_categoria:
+            if tag in segment_tags:
+                items.extend(extra)
+        return items[:self.limite] if self.limite else items
+
+
+class KnowledgeSnapshot:
+    """
+    Conteúdo de uma versão do ficheiro da base de conhecimento, com os índices
+    já construídos. Nunca é alterado: um recarregamento cria um snapshot novo.
+    """
+    __slots__ = (
+        "version", "mtime", "loaded_at",
+        "drivers", "objections",
+        "universal_drivers", "trends", "default_trends",
+        "segment_classifier", "trend_classifier", "profiles", "default_profile", "rules",
+    )
+
+    def __init__(self, data: Dict[str, Any], mtime: float):
+        self.version = data.get("versao")
+        self.mtime = mtime
+        self.loaded_at = time.time()
+
+        self.drivers: Dict[str, MentalDriver] = {
+            key: MentalDriver(key, value) for key, value in data["drivers_mentais"].items()
+        }
+
+        # {"universais": {...}, "ocultas": {...}}
+        self.objections: Dict[str, Dict[str, Objection]] = {
+            group: {key: Objection(key, value) for key, value in entries.items()}
+            for group, entries in data["objecoes"].items()
+        }
+
+        self.universal_drivers: Dict[str, UniversalDriver] = {
+            key: UniversalDriver(key, value) for key, value in data["drivers_universais"].items()
+        }
+        self.trends: Dict[str, MarketTrend] = {
+            key: MarketTrend(key, value) for key, value in data["tendencias"].items()
+        }
+        self.default_trends: Tuple[str, ...] = tuple(data.get("tendencias_padrao", []))
+
+        segments = data["segmentos"]
+        self.segment_classifier = SegmentClassifier(segments["palavras_chave"])
+        # Índice palavra-chave -> tendências, com a mesma normalização dos segmentos
+        self.trend_classifier = SegmentClassifier({key: trend.segmentos_chave for key, trend in self.trends.items()})
+        self.profiles: Tuple[Tuple[FrozenSet[str], Dict[str, Any]], ...] = tuple(
+            (frozenset(entry["categorias"]), entry["perfil"]) for entry in segments["perfis"]
+        )
+        self.default_profile: Dict[str, Any] = segments["perfil_padrao"]
+        self.rules: Dict[str, SegmentRule] = {name: SegmentRule(rule) for name, rule in data["regras"].items()}
+
+    def profile_for(self, segment_tags: FrozenSet[str]) -> Dict[str, Any]:
+        """Perfil psicográfico da primeira entrada cujas categorias estão no segmento."""
+        for categories, profile in self.profiles:
+            if categories & segment_tags:
+                return dict(profile)
+        return dict(self.default_profile)
+
+    def trends_for(self, segmento: str) -> List[MarketTrend]:
+        """Tendências cujos segmentos-chave aparecem no segmento, pela ordem do ficheiro."""
+        matched = self.trend_classifier.classify(segmento)
+        return [trend for key, trend in self.trends.items() if key in matched]
+
+
+class KnowledgeBase:
+    """
+    Carregador partilhado da base de conhecimento (drivers mentais, objeções,
+    tendências e regras por segmento), guardada num ficheiro JSON versionado.
+
+    O ficheiro é lido uma vez por processo; current() devolve o snapshot atual
+    e, no máximo a cada 'reload_interval' segundos, verifica se a data de
+    modificação do ficheiro mudou para o recarregar sem reiniciar os workers.
+    Um ficheiro inválido é ignorado e o snapshot anterior continua em uso.
+    """
+    def __init__(self, path: str, reload_interval: float = 10.0):
+        self.path = path
+        self.reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._next_check = 0.0
+        self._failed_mtime: Optional[float] = None
+        self.reloads = 0
+        self._snapshot = self._load()
+        logger.info(f"✅ Base de conhecimento carregada (versão {self._snapshot.version}, {len(self._snapshot.drivers)} drivers mentais).")
+
+    def _load(self) -> KnowledgeSnapshot:
+        mtime = os.path.getmtime(self.path)
+        with open(self.path, "r", encoding="utf-8") as f:
+            return KnowledgeSnapshot(json.load(f), mtime)
+
+    def current(self) -> KnowledgeSnapshot:
+        """Snapshot atual da base de conhecimento (recarregado se o ficheiro mudou)."""
+        if self.reload_interval > 0 and time.monotonic() >= self._next_check:
+            self._reload_if_changed()
+        return self._snapshot
+
+    def _reload_if_changed(self) -> None:
+        # Só uma thread verifica o ficheiro; as outras continuam com o snapshot atual
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            self._next_check = time.monotonic() + self.reload_interval
+            try:
+                mtime = os.path.getmtime(self.path)
+            except OSError as e:
+                logger.warning(f"⚠️ Base de conhecimento inacessível ({self.path}): {e}. A manter a versão carregada.")
+                return
+            if mtime == self._snapshot.mtime or mtime == self._failed_mtime:
+                return
+            try:
+                snapshot = self._load()
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                self._failed_mtime = mtime
+                logger.error(f"❌ Falha ao recarregar a base de conhecimento: {e}. A manter a versão {self._snapshot.version}.")
+                return
+            self._snapshot = snapshot
+            self.reloads += 1
+            logger.info(f"🔄 Base de conhecimento recarregada (versão {snapshot.version}).")
+        finally:
+            self._lock.release()
+
+    def stats(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        return {
+            "version": snapshot.version,
+            "loaded_at": snapshot.loaded_at,
+            "reloads": self.reloads,
+            "drivers": len(snapshot.drivers),
+            "trends": len(snapshot.trends),
+            "segment_profiles": len(snapshot.profiles),
+        }
+
+# --- Instância Global ---
+knowledge_base = KnowledgeBase(
+    Config.KNOWLEDGE_BASE_PATH or DEFAULT_PATH,
+    reload_interval=Config.KNOWLEDGE_BASE_RELOAD_INTERVAL
+)
+metrics_registry.register("knowledge_base", knowledge_base.stats)
@@ -0,0 +1,37 @@
+# Ficheiro: src/services/metrics.py
+
+import logging
+import threading
+from typing import Callable, Dict, Any
+
+logger = logging.getLogger(__name__)
+
+class MetricsRegistry:
+    """
+    Registo central de métricas internas (caches, filas, provedores...).
+    Cada serviço regista uma função que devolve um dicionário com o seu estado
+    atual; o endpoint /api/metrics recolhe todas as métricas num único JSON.
+    """
+    def __init__(self):
+        self._collectors: Dict[str, Callable[[], Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, collector: Callable[[], Dict[str, Any]]) -> None:
+        with self._lock:
+            self._collectors[name] = collector
+
+    def collect(self) -> Dict[str, Any]:
+        with self._lock:
+            collectors = dict(self._collectors)
+
+        metrics = {}
+        for name, collector in collectors.items():
+            try:
+                metrics[name] = collector()
+            except Exception as e:
+                logger.warning(f"⚠️ Falha ao recolher métricas de '{name}': {e}")
+                metrics[name] = {"error": str(e)}
+        return metrics
+
+# --- Instância Global ---
+metrics_registry = MetricsRegistry()
@@ -0,0 +1,139 @@
+# Ficheiro: src/services/phase_scheduler.py
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class Phase:
+    """Uma fase do pipeline: função a executar e as fases de que depende."""
+    def __init__(self, name: str, func: Callable[[Dict[str, Any]], Any], depends_on: List[str], optional: bool):
+        self.name = name
+        self.func = func
+        self.depends_on = depends_on
+        self.optional = optional
+
+
+class PhaseScheduler:
+    """
+    Executa um pequeno grafo (DAG) de fases, lançando em paralelo todas as fases
+    cujas dependências já terminaram.
+
+    Cada função de fase recebe um dicionário com os resultados das fases de que
+    depende. Se uma fase obrigatória falhar, as fases dependentes não são executadas
+    e a primeira exceção é relançada no fim. Uma fase opcional que falhe produz
+    None e não bloqueia as restantes.
+    """
+    def __init__(self, max_workers: int = 4):
+        self.max_workers = max_workers
+        self._phases: Dict[str, Phase] = {}
+        # Tempos da última execução, relativos ao início do run()
+        self.timings: Dict[str, Dict[str, Any]] = {}
+        self.total_duration = 0.0
+
+    def add_phase(
+        self,
+        name: str,
+        func: Callable[[Dict[str, Any]], Any],
+        depends_on: Optional[List[str]] = None,
+        optional: bool = False
+    ) -> "PhaseScheduler":
+        for dependency in depends_on or []:
+            if dependency not in self._phases:
+                raise ValueError(f"A fase '{name}' depende de '{dependency}', que ainda não foi definida.")
+        self._phases[name] = Phase(name, func, list(depends_on or []), optional)
+        return self
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Executa todas as fases respeitando as dependências.
+
+        Returns:
+            Um dicionário com os resultados de cada fase.
+        """
+        results: Dict[str, Any] = {}
+        self.timings = {}
+        pending = dict(self._phases)
+        running = {}
+        # Fases obrigatórias que falharam ou foram saltadas
+        blocked = set()
+        failure: Optional[BaseException] = None
+        start = time.perf_counter()
+
+        def execute(phase: Phase) -> Any:
+            phase_start = time.perf_counter()
+            try:
+                return phase.func({dep: results.get(dep) for dep in phase.depends_on})
+            finally:
+                self.timings[phase.name] = {
+                    "inicio_s": round(phase_start - start, 3),
+                    "duracao_s": round(time.perf_counter() - phase_start, 3),
+                }
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="phase") as executor:
+            while pending or running:
+                # Lança todas as fases cujas dependências já estão concluídas
+                for name, phase in list(pending.items()):
+                    if all(dep in results for dep in phase.depends_on):
+                        del pending[name]
+                        running[executor.submit(execute, phase)] = phase
+                    elif any(dep in blocked for dep in phase.depends_on):
+                        # Uma dependência obrigatória falhou: esta fase não pode correr
+                        del pending[name]
+                        blocked.add(name)
+                        self.timings[name] = {"status": "skipped"}
+
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    phase = running.pop(future)
+                    try:
+                        results[phase.name] = future.result()
+                        self.timings[phase.name]["status"] = "completed"
+                    except Exception as e:
+                        self.timings[phase.name]["status"] = "failed"
+                        if phase.optional:
+                            logger.warning(f"⚠️ Fase opcional '{phase.name}' falhou: {e}")
+                            results[phase.name] = None
+                        else:
+                            logger.error(f"❌ Fase '{phase.name}' falhou: {e}")
+                            blocked.add(phase.name)
+                            failure = failure or e
+
+        self.total_duration = round(time.perf_counter() - start, 3)
+        if failure:
+            raise failure
+        return results
+
+    def critical_path(self) -> List[str]:
+        """
+        Calcula o caminho crítico da última execução: parte da fase que terminou
+        mais tarde e recua sempre pela dependência que terminou por último.
+        """
+        def end_of(name: str) -> float:
+            timing = self.timings.get(name, {})
+            return timing.get("inicio_s", 0) + timing.get("duracao_s", 0)
+
+        executed = [name for name in self._phases if "duracao_s" in self.timings.get(name, {})]
+        if not executed:
+            return []
+
+        path = [max(executed, key=end_of)]
+        while True:
+            dependencies = [d for d in self._phases[path[-1]].depends_on if d in executed]
+            if not dependencies:
+                break
+            path.append(max(dependencies, key=end_of))
+        return list(reversed(path))
+
+    def execution_metadata(self) -> Dict[str, Any]:
+        """Resumo dos tempos por fase, para incluir nos metadados do resultado."""
+        return {
+            "fases": self.timings,
+            "caminho_critico": self.critical_path(),
+            "duracao_total_s": self.total_duration,
+        }
@@ -0,0 +1,23 @@
+# Ficheiro: src/services/progress.py
+
+import logging
+from typing import Callable, Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# Assinatura dos callbacks de progresso usados ao longo do pipeline de análise:
+# callback(evento, dados). Ex.: callback("phase", {"phase": "web_search", "status": "started"})
+ProgressCallback = Callable[[str, Dict[str, Any]], None]
+
+def emit_progress(callback: Optional[ProgressCallback], event: str, **data: Any) -> None:
+    """
+    Envia um evento de progresso para o callback fornecido, se existir.
+    Uma falha no callback nunca deve interromper o pipeline de análise,
+    por isso qualquer exceção é apenas registada.
+    """
+    if not callback:
+        return
+    try:
+        callback(event, data)
+    except Exception as e:
+        logger.warning(f"⚠️ Falha ao reportar progresso ('{event}'): {e}")
@@ -1,9 +1,15 @@
 # Ficheiro: src/services/psychological_analysis_engine.py
 
 import logging
-from typing import Dict, Any, List
+from typing import Dict, Any, FrozenSet, List, Tuple
 import json
 
+from config import Config
+from services.cache import MemoCache, normalize_text
+from services.frozen import freeze
+from services.knowledge_base import knowledge_base
+from services.metrics import metrics_registry
+
 logger = logging.getLogger(__name__)
 
 class PsychologicalAnalysisEngine:
@@ -11,288 +17,21 @@ class PsychologicalAnalysisEngine:
     Motor de Análise Psicológica Profunda baseado nos documentos anexos.
     Implementa os sistemas de Drivers Mentais, Pré-Pitch Invisível, 
     Engenharia Anti-Objeção e Provas Visuais.
+
+    O catálogo de drivers e objeções e as regras por segmento estão na base
+    de conhecimento (ver KnowledgeBase), que pode ser alterada sem deploy.
+
+    A análise completa depende apenas do segmento, produto, público e preço,
+    pelo que é memorizada numa cache LRU e devolvida como uma árvore só de
+    leitura (FrozenDict), partilhada entre pedidos sem cópias.
     """
     
     def __init__(self):
-        self.drivers_mentais = self._load_drivers_mentais()
-        self.objecoes_universais = self._load_objecoes_universais()
-        self.provas_visuais = self._load_provas_visuais()
+        # Drivers, objeções e regras por segmento vêm da base de conhecimento partilhada
+        self.analysis_cache = MemoCache("psychological_analysis", max_entries=Config.PSYCH_ANALYSIS_CACHE_MAX_ENTRIES)
+        metrics_registry.register("psychological_analysis_cache", self.analysis_cache.stats)
         logger.info("✅ Psychological Analysis Engine inicializado.")
 
-    def _load_drivers_mentais(self) -> Dict[str, Dict[str, Any]]:
-        """Carrega os 19 drivers mentais universais do documento anexo."""
-        return {
-            "ferida_exposta": {
-                "nome": "Ferida Exposta",
-                "categoria": "Emocional Primário",
-                "gatilho": "Dor não resolvida",
-                "mecanica": "Trazer à consciência o que foi reprimido",
-                "ativacao": "Você ainda [comportamento doloroso] mesmo sabendo que [consequência]?",
-                "momento_instalacao": "Abertura - Quebra de padrão"
-            },
-            "trofeu_secreto": {
-                "nome": "Troféu Secreto",
-                "categoria": "Emocional Primário",
-                "gatilho": "Desejo inconfessável",
-                "mecanica": "Validar ambições 'proibidas'",
-                "ativacao": "Não é sobre dinheiro, é sobre [desejo real oculto]",
-                "momento_instalacao": "Desenvolvimento - Amplificação"
-            },
-            "inveja_produtiva": {
-                "nome": "Inveja Produtiva",
-                "categoria": "Emocional Primário",
-                "gatilho": "Comparação com pares",
-                "mecanica": "Transformar inveja em combustível",
-                "ativacao": "Enquanto você [situação atual], outros como você [resultado desejado]",
-                "momento_instalacao": "Desenvolvimento - Tensão"
-            },
-            "relogio_psicologico": {
-                "nome": "Relógio Psicológico",
-                "categoria": "Emocional Primário",
-                "gatilho": "Urgência existencial",
-                "mecanica": "Tempo como recurso finito",
-                "ativacao": "Quantos [período] você ainda vai [desperdício]?",
-                "momento_instalacao": "Pré-pitch - Urgência"
-            },
-            "identidade_aprisionada": {
-                "nome": "Identidade Aprisionada",
-                "categoria": "Emocional Primário",
-                "gatilho": "Conflito entre quem é e quem poderia ser",
-                "mecanica": "Expor a máscara social",
-                "ativacao": "Você não é [rótulo limitante], você é [potencial real]",
-                "momento_instalacao": "Desenvolvimento - Transformação"
-            },
-            "custo_invisivel": {
-                "nome": "Custo Invisível",
-                "categoria": "Emocional Primário",
-                "gatilho": "Perda não percebida",
-                "mecanica": "Quantificar o preço da inação",
-                "ativacao": "Cada dia sem [solução] custa [perda específica]",
-                "momento_instalacao": "Pré-pitch - Pressão"
-            },
-            "ambicao_expandida": {
-                "nome": "Ambição Expandida",
-                "categoria": "Emocional Primário",
-                "gatilho": "Sonhos pequenos demais",
-                "mecanica": "Elevar o teto mental de possibilidades",
-                "ativacao": "Se o esforço é o mesmo, por que você está pedindo tão pouco?",
-                "momento_instalacao": "Desenvolvimento - Visão"
-            },
-            "diagnostico_brutal": {
-                "nome": "Diagnóstico Brutal",
-                "categoria": "Emocional Primário",
-                "gatilho": "Confronto com a realidade atual",
-                "mecanica": "Criar indignação produtiva com status quo",
-                "ativacao": "Olhe seus números/situação. Até quando você vai aceitar isso?",
-                "momento_instalacao": "Abertura - Consciência"
-            },
-            "ambiente_vampiro": {
-                "nome": "Ambiente Vampiro",
-                "categoria": "Emocional Primário",
-                "gatilho": "Consciência do entorno tóxico",
-                "mecanica": "Revelar como ambiente atual suga energia/potencial",
-                "ativacao": "Seu ambiente te impulsiona ou te mantém pequeno?",
-                "momento_instalacao": "Desenvolvimento - Justificativa"
-            },
-            "mentor_salvador": {
-                "nome": "Mentor Salvador",
-                "categoria": "Emocional Primário",
-                "gatilho": "Necessidade de orientação externa",
-                "mecanica": "Ativar desejo por figura de autoridade que acredita neles",
-                "ativacao": "Você precisa de alguém que veja seu potencial quando você não consegue",
-                "momento_instalacao": "Pré-pitch - Solução"
-            },
-            "coragem_necessaria": {
-                "nome": "Coragem Necessária",
-                "categoria": "Emocional Primário",
-                "gatilho": "Medo paralisante disfarçado",
-                "mecanica": "Transformar desculpas em decisões corajosas",
-                "ativacao": "Não é sobre condições perfeitas, é sobre decidir apesar do medo",
-                "momento_instalacao": "Fechamento - Ação"
-            },
-            "mecanismo_revelado": {
-                "nome": "Mecanismo Revelado",
-                "categoria": "Racional Complementar",
-                "gatilho": "Compreensão do 'como'",
-                "mecanica": "Desmistificar o complexo",
-                "ativacao": "É simplesmente [analogia simples], não [complicação percebida]",
-                "momento_instalacao": "Desenvolvimento - Clareza"
-            },
-            "prova_matematica": {
-                "nome": "Prova Matemática",
-                "categoria": "Racional Complementar",
-                "gatilho": "Certeza numérica",
-                "mecanica": "Equação irrefutável",
-                "ativacao": "Se você fizer X por Y dias = Resultado Z garantido",
-                "momento_instalacao": "Desenvolvimento - Lógica"
-            },
-            "padrao_oculto": {
-                "nome": "Padrão Oculto",
-                "categoria": "Racional Complementar",
-                "gatilho": "Insight revelador",
-                "mecanica": "Mostrar o que sempre esteve lá",
-                "ativacao": "Todos que conseguiram [resultado] fizeram [padrão específico]",
-                "momento_instalacao": "Desenvolvimento - Revelação"
-            },
-            "excecao_possivel": {
-                "nome": "Exceção Possível",
-                "categoria": "Racional Complementar",
-                "gatilho": "Quebra de limitação",
-                "mecanica": "Provar que regras podem ser quebradas",
-                "ativacao": "Diziam que [limitação], mas [prova contrária]",
-                "momento_instalacao": "Desenvolvimento - Possibilidade"
-            },
-            "atalho_etico": {
-                "nome": "Atalho Ético",
-                "categoria": "Racional Complementar",
-                "gatilho": "Eficiência sem culpa",
-                "mecanica": "Validar o caminho mais rápido",
-                "ativacao": "Por que sofrer [tempo longo] se existe [atalho comprovado]?",
-                "momento_instalacao": "Desenvolvimento - Eficiência"
-            },
-            "decisao_binaria": {
-                "nome": "Decisão Binária",
-                "categoria": "Racional Complementar",
-                "gatilho": "Simplificação radical",
-                "mecanica": "Eliminar zona cinzenta",
-                "ativacao": "Ou você [ação desejada] ou aceita [consequência dolorosa]",
-                "momento_instalacao": "Fechamento - Escolha"
-            },
-            "oportunidade_oculta": {
-                "nome": "Oportunidade Oculta",
-                "categoria": "Racional Complementar",
-                "gatilho": "Vantagem não percebida",
-                "mecanica": "Revelar demanda/chance óbvia mas ignorada",
-                "ativacao": "O mercado está gritando por [solução] e ninguém está ouvindo",
-                "momento_instalacao": "Abertura - Despertar"
-            },
-            "metodo_vs_sorte": {
-                "nome": "Método vs Sorte",
-                "categoria": "Racional Complementar",
-                "gatilho": "Caos vs sistema",
-                "mecanica": "Contrastar tentativa aleatória com caminho estruturado",
-                "ativacao": "Sem método você está cortando mata com foice. Com método, está na autoestrada",
-                "momento_instalacao": "Pré-pitch - Caminho"
-            }
-        }
-
-    def _load_objecoes_universais(self) -> Dict[str, Dict[str, Any]]:
-        """Carrega as objeções universais e ocultas do documento."""
-        return {
-            "universais": {
-                "tempo": {
-                    "descricao": "Isso não é prioridade para mim",
-                    "raiz_emocional": "Medo de comprometimento",
-                    "tratamento": "Drives de elevação de prioridade"
-                },
-                "dinheiro": {
-                    "descricao": "Minha vida não está tão ruim que precise investir",
-                    "raiz_emocional": "Desvalorização do problema",
-                    "tratamento": "Drives de justificação de investimento"
-                },
-                "confianca": {
-                    "descricao": "Me dê uma razão para acreditar",
-                    "raiz_emocional": "Experiências passadas negativas",
-                    "tratamento": "Drives de construção de confiança"
-                }
-            },
-            "ocultas": {
-                "autossuficiencia": {
-                    "descricao": "Acho que consigo sozinho",
-                    "raiz_emocional": "Orgulho/individualismo",
-                    "sinais": ["tentar sozinho", "resistência a ajuda", "linguagem técnica excessiva"],
-                    "tratamento": "Histórias de experts que precisaram de mentoria"
-                },
-                "sinal_fraqueza": {
-                    "descricao": "Aceitar ajuda é admitir fracasso",
-                    "raiz_emocional": "Medo de julgamento",
-                    "sinais": ["minimização de problemas", "resistência a expor vulnerabilidade"],
-                    "tratamento": "Reposicionamento de ajuda como aceleração"
-                },
-                "medo_novo": {
-                    "descricao": "Não tenho pressa",
-                    "raiz_emocional": "Conforto com mediocridade",
-                    "sinais": ["quando for a hora certa", "procrastinação disfarçada"],
-                    "tratamento": "Histórias de arrependimento por não agir"
-                },
-                "prioridades_desequilibradas": {
-                    "descricao": "Não é dinheiro",
-                    "raiz_emocional": "Hierarquia de valores distorcida",
-                    "sinais": ["gastos em outras áreas", "justificativas contraditórias"],
-                    "tratamento": "Comparação cruel entre investimentos"
-                },
-                "autoestima_destruida": {
-                    "descricao": "Não confio em mim",
-                    "raiz_emocional": "Histórico de fracassos",
-                    "sinais": ["já tentei antes", "autodesqualificação"],
-                    "tratamento": "Cases de pessoas piores que conseguiram"
-                }
-            }
-        }
-
-    def _load_provas_visuais(self) -> Dict[str, Dict[str, Any]]:
-        """Carrega templates de provas visuais do documento."""
-        return {
-            "destruidoras_objecao": {
-                "tempo": [
-                    {
-                        "nome": "Ampulheta do Dinheiro",
-                        "conceito": "Tempo perdido = dinheiro perdido",
-                        "experimento": "Ampulheta com moedas caindo representando perda diária",
-                        "analogia": "Cada grão que cai é uma oportunidade perdida"
-                    },
-                    {
-                        "nome": "Agenda dos 47 Apps",
-                        "conceito": "Tempo existe, está sendo desperdiçado",
-                        "experimento": "Mostrar celular com dezenas de apps de distração",
-                        "analogia": "Você tem tempo para 47 apps mas não para mudar sua vida?"
-                    }
-                ],
-                "dinheiro": [
-                    {
-                        "nome": "Cofrinho Furado",
-                        "conceito": "Gastos invisíveis vs investimento",
-                        "experimento": "Cofrinho com furos vs cofre lacrado",
-                        "analogia": "Sua vida financeira é o cofrinho furado"
-                    },
-                    {
-                        "nome": "Calculadora da Verdade",
-                        "conceito": "Custo real da inação",
-                        "experimento": "Calcular gastos supérfluos vs investimento em educação",
-                        "analogia": "R$200/mês em streaming vs R$2000 uma vez para transformar sua vida"
-                    }
-                ]
-            },
-            "criadoras_urgencia": [
-                {
-                    "nome": "Vela da Oportunidade",
-                    "conceito": "Tempo limitado real",
-                    "experimento": "Vela acesa que vai se apagando durante apresentação",
-                    "analogia": "Quando a vela apagar, a oportunidade se foi"
-                },
-                {
-                    "nome": "Trem da Estação",
-                    "conceito": "Momento único que não volta",
-                    "experimento": "Som de trem partindo + imagem de estação vazia",
-                    "analogia": "O trem da transformação está partindo. Você embarca ou fica na plataforma?"
-                }
-            ],
-            "instaladoras_crenca": [
-                {
-                    "nome": "Metamorfose da Lagarta",
-                    "conceito": "Transformação é possível e natural",
-                    "experimento": "Sequência visual lagarta → casulo → borboleta",
-                    "analogia": "Você está no casulo. A borboleta está esperando para sair"
-                },
-                {
-                    "nome": "Diamante do Carvão",
-                    "conceito": "Pressão certa gera transformação",
-                    "experimento": "Carvão + pressão = diamante (visual/metáfora)",
-                    "analogia": "A pressão que você sente é o que vai te transformar em diamante"
-                }
-            ]
-        }
-
     def analyze_avatar_psychology(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Realiza análise psicológica profunda do avatar baseada nos dados fornecidos.
@@ -302,21 +41,24 @@ class PsychologicalAnalysisEngine:
         produto = data.get('produto', '')
         publico = data.get('publico', '')
         preco = data.get('preco', 0)
+
+        # Categorias do segmento, identificadas uma única vez para todas as regras
+        segment_tags = knowledge_base.current().segment_classifier.classify(segmento)
         
         # Análise psicográfica baseada no segmento
-        perfil_psicologico = self._analyze_psychographic_profile(segmento, publico, preco)
+        perfil_psicologico = self._analyze_psychographic_profile(segment_tags, publico, preco)
         
         # Identificação de dores viscerais
-        dores_secretas = self._identify_visceral_pains(segmento, publico)
+        dores_secretas = self._identify_visceral_pains(segment_tags, publico)
         
         # Mapeamento de desejos ocultos
-        desejos_ardentes = self._map_hidden_desires(segmento, produto, preco)
+        desejos_ardentes = self._map_hidden_desires(segment_tags, produto, preco)
         
         # Identificação de medos paralisantes
-        medos_paralisantes = self._identify_paralyzing_fears(segmento, publico)
+        medos_paralisantes = self._identify_paralyzing_fears(segment_tags, publico)
         
         # Mapeamento de objeções reais
-        objecoes_reais = self._map_real_objections(segmento, preco)
+        objecoes_reais = self._map_real_objections(segment_tags, preco)
         
         return {
             "perfil_psicologico": perfil_psicologico,
@@ -325,144 +67,28 @@ class PsychologicalAnalysisEngine:
             "medos_paralisantes": medos_paralisantes,
             "objecoes_reais": objecoes_reais,
             "nivel_sofisticacao": self._assess_sophistication_level(segmento, preco),
-            "triggers_emocionais": self._identify_emotional_triggers(segmento, publico)
+            "triggers_emocionais": self._identify_emotional_triggers(segment_tags, publico)
         }
 
-    def _analyze_psychographic_profile(self, segmento: str, publico: str, preco: float) -> Dict[str, Any]:
+    def _analyze_psychographic_profile(self, segment_tags: FrozenSet[str], publico: str, preco: float) -> Dict[str, Any]:
         """Analisa o perfil psicográfico baseado no segmento e público."""
-        segmento_lower = segmento.lower()
-        
-        if any(term in segmento_lower for term in ['digital', 'online', 'marketing', 'vendas']):
-            return {
-                "arquetipo_dominante": "Empreendedor Digital",
-                "nivel_ansiedade": "Alto",
-                "orientacao_temporal": "Futuro",
-                "motivacao_primaria": "Liberdade financeira e reconhecimento",
-                "medo_primario": "Fracasso público e perda de status",
-                "linguagem_preferida": "Resultados, métricas, escalabilidade",
-                "referencias_culturais": "Gurus digitais, cases de sucesso, lifestyle"
-            }
-        elif any(term in segmento_lower for term in ['consultoria', 'coaching', 'mentoria']):
-            return {
-                "arquetipo_dominante": "Especialista/Mentor",
-                "nivel_ansiedade": "Médio-Alto",
-                "orientacao_temporal": "Presente-Futuro",
-                "motivacao_primaria": "Impacto e autoridade",
-                "medo_primario": "Perda de credibilidade",
-                "linguagem_preferida": "Transformação, metodologia, expertise",
-                "referencias_culturais": "Autoridades do nicho, certificações"
-            }
-        elif any(term in segmento_lower for term in ['ecommerce', 'loja', 'vendas']):
-            return {
-                "arquetipo_dominante": "Comerciante",
-                "nivel_ansiedade": "Alto",
-                "orientacao_temporal": "Presente",
-                "motivacao_primaria": "Lucro e crescimento",
-                "medo_primario": "Falência e perda de clientes",
-                "linguagem_preferida": "ROI, conversão, faturamento",
-                "referencias_culturais": "Cases de vendas, números de faturamento"
-            }
-        else:
-            return {
-                "arquetipo_dominante": "Profissional em Transição",
-                "nivel_ansiedade": "Médio",
-                "orientacao_temporal": "Presente-Futuro",
-                "motivacao_primaria": "Estabilidade e crescimento",
-                "medo_primario": "Estagnação e irrelevância",
-                "linguagem_preferida": "Oportunidade, desenvolvimento, segurança",
-                "referencias_culturais": "Histórias de transformação profissional"
-            }
+        return knowledge_base.current().profile_for(segment_tags)
 
-    def _identify_visceral_pains(self, segmento: str, publico: str) -> List[str]:
+    def _identify_visceral_pains(self, segment_tags: FrozenSet[str], publico: str) -> List[str]:
         """Identifica as dores mais viscerais e inconfessáveis do avatar."""
-        segmento_lower = segmento.lower()
-        
-        dores_base = [
-            "Acordar todos os dias sabendo que está desperdiçando seu potencial",
-            "Ver pessoas menos qualificadas conseguindo resultados melhores",
-            "Sentir que está enganando a si mesmo sobre estar 'bem assim mesmo'"
-        ]
-        
-        if 'digital' in segmento_lower or 'online' in segmento_lower:
-            dores_base.extend([
-                "Trabalhar 12 horas por dia para ganhar o que um funcionário ganha em 8",
-                "Ter que fingir sucesso nas redes sociais enquanto passa aperto financeiro",
-                "Ver ex-colegas de trabalho ganhando mais como CLT do que você como 'empreendedor'"
-            ])
-        
-        if 'consultoria' in segmento_lower or 'coaching' in segmento_lower:
-            dores_base.extend([
-                "Cobrar barato porque não acredita no próprio valor",
-                "Ter conhecimento mas não conseguir monetizar adequadamente",
-                "Ser visto como 'coach de Instagram' em vez de especialista sério"
-            ])
-        
-        return dores_base[:5]  # Retorna as 5 mais relevantes
+        return knowledge_base.current().rules["dores_secretas"].apply(segment_tags)
 
-    def _map_hidden_desires(self, segmento: str, produto: str, preco: float) -> List[str]:
+    def _map_hidden_desires(self, segment_tags: FrozenSet[str], produto: str, preco: float) -> List[str]:
         """Mapeia os desejos mais profundos e inconfessáveis."""
-        desejos_base = [
-            "Ser reconhecido como autoridade máxima no seu nicho",
-            "Ter liberdade financeira real, não apenas 'se virar'",
-            "Provar para quem duvidou que você estava certo"
-        ]
-        
-        if preco and preco > 1000:
-            desejos_base.extend([
-                "Fazer parte de um grupo seleto de pessoas de sucesso",
-                "Ter acesso a informações que a maioria não tem",
-                "Ser visto como alguém que 'chegou lá'"
-            ])
-        
-        segmento_lower = segmento.lower()
-        if 'digital' in segmento_lower:
-            desejos_base.extend([
-                "Trabalhar de qualquer lugar do mundo",
-                "Ter um negócio que funciona sem você",
-                "Ser exemplo de sucesso para outros empreendedores"
-            ])
-        
-        return desejos_base[:5]
+        return knowledge_base.current().rules["desejos_ardentes"].apply(segment_tags, preco)
 
-    def _identify_paralyzing_fears(self, segmento: str, publico: str) -> List[str]:
+    def _identify_paralyzing_fears(self, segment_tags: FrozenSet[str], publico: str) -> List[str]:
         """Identifica os medos que paralisam a ação."""
-        medos_base = [
-            "Investir e não dar certo, confirmando que você é um fracasso",
-            "Descobrir que o problema é você, não as circunstâncias",
-            "Ter que admitir que desperdiçou anos fazendo tudo errado"
-        ]
-        
-        segmento_lower = segmento.lower()
-        if any(term in segmento_lower for term in ['empreendedor', 'negócio', 'empresa']):
-            medos_base.extend([
-                "Falir e ter que voltar a ser empregado",
-                "Ser julgado pela família como 'sonhador irresponsável'",
-                "Descobrir que não tem o que é preciso para ser empresário"
-            ])
-        
-        return medos_base[:4]
+        return knowledge_base.current().rules["medos_paralisantes"].apply(segment_tags)
 
-    def _map_real_objections(self, segmento: str, preco: float) -> List[str]:
+    def _map_real_objections(self, segment_tags: FrozenSet[str], preco: float) -> List[str]:
         """Mapeia as objeções reais que surgirão."""
-        objecoes = [
-            "Não tenho tempo para mais uma coisa agora",
-            "Preciso pensar melhor / conversar com minha esposa",
-            "Já tentei coisas parecidas antes e não funcionou"
-        ]
-        
-        if preco and preco > 500:
-            objecoes.extend([
-                "Está muito caro para o meu momento atual",
-                "Não tenho certeza se vai funcionar para o meu caso específico"
-            ])
-        
-        if preco and preco > 2000:
-            objecoes.extend([
-                "Preciso ver se consigo um financiamento",
-                "Vou esperar uma promoção ou desconto"
-            ])
-        
-        return objecoes
+        return knowledge_base.current().rules["objecoes_reais"].apply(segment_tags, preco)
 
     def _assess_sophistication_level(self, segmento: str, preco: float) -> str:
         """Avalia o nível de sofisticação do mercado."""
@@ -475,23 +101,9 @@ class PsychologicalAnalysisEngine:
         else:
             return "Iniciante - Pouca experiência, precisa de educação básica"
 
-    def _identify_emotional_triggers(self, segmento: str, publico: str) -> List[str]:
+    def _identify_emotional_triggers(self, segment_tags: FrozenSet[str], publico: str) -> List[str]:
         """Identifica os gatilhos emocionais mais eficazes."""
-        triggers = [
-            "Comparação com pares que conseguiram sucesso",
-            "Urgência temporal (oportunidades perdidas)",
-            "Medo de arrependimento futuro"
-        ]
-        
-        segmento_lower = segmento.lower()
-        if 'digital' in segmento_lower:
-            triggers.extend([
-                "FOMO de tendências digitais",
-                "Medo de ficar para trás na tecnologia",
-                "Desejo de lifestyle digital"
-            ])
-        
-        return triggers
+        return knowledge_base.current().rules["triggers_emocionais"].apply(segment_tags)
 
     def create_mental_drivers_sequence(self, avatar_analysis: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -532,7 +144,8 @@ class PsychologicalAnalysisEngine:
         
         # Combina e retorna os drivers selecionados
         selected_keys = essential_drivers + specific_drivers[:3]
-        return [{"key": key, **self.drivers_mentais[key]} for key in selected_keys if key in self.drivers_mentais]
+        drivers = knowledge_base.current().drivers
+        return [drivers[key].to_dict(include_key=True) for key in selected_keys if key in drivers]
 
     def _sequence_drivers_psychologically(self, drivers: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Organiza os drivers na sequência psicológica ideal."""
@@ -697,6 +310,64 @@ class PsychologicalAnalysisEngine:
             "kit_implementacao": self._create_implementation_kit(visual_proofs)
         }
 
+    def _sequence_visual_proofs(self, visual_proofs: Dict[str, Any], drivers: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Organiza as PROVIs pela ordem da apresentação: primeiro as dos drivers,
+        pela sequência psicológica; depois a demonstração do método; por fim as
+        destruidoras de objeções, usadas quando a objeção surgir.
+        """
+        driver_order = {f"driver_{driver['key']}": index for index, driver in enumerate(drivers)}
+
+        def position(key: str) -> tuple:
+            if key in driver_order:
+                return (0, driver_order[key])
+            if key == "metodo_produto":
+                return (1, 0)
+            return (2, 0)
+
+        return [
+            {
+                "ordem": ordem,
+                "key": key,
+                "nome": visual_proofs[key].get("nome_impactante"),
+                "categoria": visual_proofs[key].get("categoria"),
+                "prioridade": visual_proofs[key].get("prioridade"),
+                "momento_ideal": visual_proofs[key].get("momento_ideal")
+            }
+            for ordem, key in enumerate(sorted(visual_proofs, key=position), start=1)
+        ]
+
+    def _map_strategic_moments(self, sequenced_proofs: List[Dict[str, Any]]) -> Dict[str, List[str]]:
+        """Agrupa os nomes das PROVIs pelo momento ideal de execução."""
+        moments: Dict[str, List[str]] = {}
+        for proof in sequenced_proofs:
+            moments.setdefault(proof.get("momento_ideal") or "A definir", []).append(proof.get("nome"))
+        return moments
+
+    def _create_implementation_kit(self, visual_proofs: Dict[str, Any]) -> Dict[str, Any]:
+        """Reúne os materiais e as PROVIs prioritárias para preparar a apresentação."""
+        materiais = sorted({
+            material
+            for proof in visual_proofs.values()
+            for material in proof.get("materiais", [])
+            if not material.startswith("A definir")
+        })
+        criticas = [
+            proof.get("nome_impactante") for proof in visual_proofs.values()
+            if str(proof.get("prioridade", "")).lower() in ("crítica", "critica")
+        ]
+        return {
+            "total_provas": len(visual_proofs),
+            "materiais_necessarios": materiais,
+            "provas_criticas": criticas,
+            "checklist_preparacao": [
+                "Separar e testar todos os materiais",
+                "Ensaiar cada PROVI com cronómetro",
+                "Preparar a frase-ponte de cada demonstração",
+                "Ter uma versão simplificada para falhas técnicas"
+            ]
+        }
+
     def _identify_concepts_to_prove(self, context: Dict[str, Any], drivers: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Identifica todos os conceitos que precisam de demonstração visual."""
         concepts = []
@@ -712,11 +383,11 @@ class PsychologicalAnalysisEngine:
             })
         
         # Conceitos de objeções universais
-        for objecao_key, objecao in self.objecoes_universais["universais"].items():
+        for objecao_key, objecao in knowledge_base.current().objections["universais"].items():
             concepts.append({
                 "key": f"objecao_{objecao_key}",
                 "name": f"Destruir Objeção: {objecao_key.title()}",
-                "concept": objecao["descricao"],
+                "concept": objecao.descricao,
                 "category": "destruir_objecao",
                 "priority": "critica"
             })
@@ -912,7 +583,36 @@ class PsychologicalAnalysisEngine:
     def generate_comprehensive_psychological_analysis(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Método principal que orquestra toda a análise psicológica completa.
+
+        O resultado é só de leitura e pode ser partilhado com outros pedidos;
+        quem o precisar de alterar deve usar copy.deepcopy(), que devolve uma
+        cópia normal (dicts e listas alteráveis).
+        """
+        inputs = {field: data[field] for field in ("segmento", "produto", "publico", "preco") if field in data}
+        return self.analysis_cache.get_or_compute(
+            self._analysis_cache_key(inputs),
+            lambda: freeze(self._build_comprehensive_analysis(inputs))
+        )
+
+    def _analysis_cache_key(self, inputs: Dict[str, Any]) -> Tuple[Any, ...]:
+        """
+        Chave da cache: os campos usados pela análise e a versão da base de
+        conhecimento. O segmento e o público são só classificados, por isso são
+        normalizados; o produto aparece no texto gerado e é usado tal como veio.
         """
+        snapshot = knowledge_base.current()
+        return (
+            snapshot.version,
+            snapshot.mtime,
+            normalize_text(inputs.get("segmento", "")),
+            normalize_text(inputs.get("publico", "")),
+            inputs.get("produto"),
+            # O preço em falta e o preço vazio são tratados de forma diferente nas PROVIs
+            "preco" in inputs,
+            repr(inputs.get("preco")),
+        )
+
+    def _build_comprehensive_analysis(self, data: Dict[str, Any]) -> Dict[str, Any]:
         logger.info("🧠 Iniciando análise psicológica profunda...")
         
         # Fase 1: Análise do Avatar
@@ -0,0 +1,216 @@
+# Ficheiro: src/services/rate_limiter.py
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+class RateLimiter:
+    """
+    Limitador de pedidos por provedor: um token bucket (pedidos por minuto, com
+    rajadas até esse valor) e uma quota diária, ambos guardados em SQLite para
+    serem partilhados entre os workers do gunicorn.
+
+    Se o bucket estiver vazio, acquire() espera até 'max_wait' segundos por um
+    token; se a quota diária (em UTC) estiver esgotada, recusa de imediato para
+    que o chamador passe ao provedor seguinte sem gastar um pedido.
+    Provedores sem limites configurados são sempre autorizados.
+    """
+    def __init__(self, path: str, limits: Dict[str, Dict[str, int]], max_wait: float = 2.0, enabled: bool = True):
+        self.path = path
+        self.limits = limits
+        self.max_wait = max_wait
+        self.enabled = enabled
+        # Evita repetir o aviso de quota esgotada em cada pedido do mesmo dia
+        self._exhausted_logged: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        if not enabled:
+            return
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with self._connect() as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS buckets ("
+                    " provider TEXT PRIMARY KEY,"
+                    " tokens REAL NOT NULL,"
+                    " updated_at REAL NOT NULL)"
+                )
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS quotas ("
+                    " provider TEXT NOT NULL,"
+                    " day TEXT NOT NULL,"
+                    " used INTEGER NOT NULL,"
+                    " PRIMARY KEY (provider, day))"
+                )
+        except sqlite3.Error as e:
+            logger.error(f"❌ Falha ao inicializar o limitador de pedidos ({path}): {e}. Limites desativados.")
+            self.enabled = False
+
+    def _connect(self) -> sqlite3.Connection:
+        # Transações geridas manualmente (BEGIN IMMEDIATE) para serializar os workers.
+        return sqlite3.connect(self.path, timeout=10, isolation_level=None)
+
+    @staticmethod
+    def _today() -> str:
+        return datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+    def _rate(self, provider: str) -> Tuple[float, float, int]:
+        """(capacidade do bucket, tokens por segundo, quota diária) de um provedor."""
+        limits = self.limits[provider]
+        per_minute = limits.get("per_minute", 0)
+        return float(per_minute), per_minute / 60.0, limits.get("daily", 0)
+
+    def _try_acquire(self, provider: str) -> Tuple[bool, float, Optional[str]]:
+        """
+        Tenta consumir um token e uma unidade da quota diária, numa só transação.
+
+        Returns:
+            Um tuplo (autorizado, segundos até haver um token, motivo da recusa).
+        """
+        capacity, rate, daily = self._rate(provider)
+        now = time.time()
+        day = self._today()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            used = 0
+            if daily:
+                row = conn.execute("SELECT used FROM quotas WHERE provider = ? AND day = ?", (provider, day)).fetchone()
+                used = row[0] if row else 0
+                if used >= daily:
+                    conn.execute("ROLLBACK")
+                    return False, 0.0, "quota"
+
+            if capacity:
+                row = conn.execute("SELECT tokens, updated_at FROM buckets WHERE provider = ?", (provider,)).fetchone()
+                tokens = capacity if not row else min(capacity, row[0] + (now - row[1]) * rate)
+                if tokens < 1:
+                    conn.execute("ROLLBACK")
+                    return False, (1 - tokens) / rate, "rate"
+                conn.execute(
+                    "INSERT OR REPLACE INTO buckets (provider, tokens, updated_at) VALUES (?, ?, ?)",
+                    (provider, tokens - 1, now)
+                )
+
+            if daily:
+                conn.execute(
+                    "INSERT OR REPLACE INTO quotas (provider, day, used) VALUES (?, ?, ?)",
+                    (provider, day, used + 1)
+                )
+            conn.execute("COMMIT")
+            return True, 0.0, None
+        except sqlite3.Error:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def acquire(self, provider: str) -> bool:
+        """True se o pedido ao provedor pode ser feito agora."""
+        if not self.enabled or provider not in self.limits:
+            return True
+
+        deadline = time.monotonic() + self.max_wait
+        while True:
+            try:
+                allowed, wait, reason = self._try_acquire(provider)
+            except sqlite3.Error as e:
+                # Um problema no limitador não deve bloquear os pedidos
+                logger.warning(f"⚠️ Erro no limitador de pedidos para '{provider}': {e}. Pedido autorizado.")
+                return True
+
+            if allowed:
+                return True
+            if reason == "quota":
+                self._log_exhausted(provider)
+                return False
+            if time.monotonic() + wait > deadline:
+                logger.info(f"🚦 Limite de pedidos por minuto de '{provider}' atingido. A saltar o provedor.")
+                return False
+            time.sleep(wait)
+
+    def _log_exhausted(self, provider: str) -> None:
+        day = self._today()
+        with self._lock:
+            if self._exhausted_logged.get(provider) == day:
+                return
+            self._exhausted_logged[provider] = day
+        logger.warning(f"🚦 Quota diária de '{provider}' esgotada ({self.limits[provider]['daily']} pedidos). O provedor será ignorado até amanhã (UTC).")
+
+    def throttle(self, provider: str, retry_after: Optional[float] = None) -> None:
+        """
+        Esvazia o bucket de um provedor que respondeu 429, para que os pedidos
+        seguintes esperem 'retry_after' segundos (por defeito, um minuto).
+        """
+        if not self.enabled or provider not in self.limits:
+            return
+        capacity, rate, _ = self._rate(provider)
+        if not capacity:
+            return
+        seconds = retry_after if retry_after and retry_after > 0 else 60.0
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO buckets (provider, tokens, updated_at) VALUES (?, ?, ?)",
+                    (provider, -seconds * rate, time.time())
+                )
+            logger.warning(f"🚦 '{provider}' respondeu 429. Novos pedidos em pausa durante {seconds:.0f}s.")
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Erro no limitador de pedidos para '{provider}': {e}")
+
+    def observe(self, provider: str, response: Any) -> None:
+        """Esvazia o bucket do provedor se a resposta HTTP for 429, respeitando o Retry-After."""
+        if response is not None and response.status_code == 429:
+            self.throttle(provider, _parse_retry_after(response.headers.get('Retry-After')))
+
+    def remaining(self) -> Dict[str, Any]:
+        """Quota restante hoje e tokens disponíveis de cada provedor limitado."""
+        if not self.enabled:
+            return {}
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                used = dict(conn.execute("SELECT provider, used FROM quotas WHERE day = ?", (self._today(),)).fetchall())
+                buckets = {row[0]: (row[1], row[2]) for row in conn.execute("SELECT provider, tokens, updated_at FROM buckets")}
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Erro ao ler o estado do limitador de pedidos: {e}")
+            return {}
+
+        status = {}
+        for provider in self.limits:
+            capacity, rate, daily = self._rate(provider)
+            tokens = capacity
+            if provider in buckets:
+                tokens = min(capacity, buckets[provider][0] + (now - buckets[provider][1]) * rate)
+            status[provider] = {
+                "daily_quota": daily or None,
+                "used_today": used.get(provider, 0),
+                "remaining_today": max(0, daily - used.get(provider, 0)) if daily else None,
+                "tokens_available": max(0, int(tokens)) if capacity else None,
+            }
+        return status
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Segundos indicados no cabeçalho Retry-After (apenas o formato numérico)."""
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+# --- Instância Global ---
+rate_limiter = RateLimiter(
+    path=os.path.join(Config.CACHE_DIR, "rate_limits.sqlite3"),
+    limits=Config.RATE_LIMITS,
+    max_wait=Config.RATE_LIMIT_MAX_WAIT,
+    enabled=Config.RATE_LIMIT_ENABLED
+)
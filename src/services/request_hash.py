@@ -0,0 +1,42 @@
+# Ficheiro: src/services/request_hash.py
+
+import hashlib
+import json
+from typing import Any, Dict
+
+from services.cache import normalize_text
+
+# Campos de controlo que não alteram o resultado da análise.
+IGNORED_FIELDS = {"async", "force_refresh"}
+
+def _normalize_value(value: Any) -> Any:
+    if isinstance(value, str):
+        return normalize_text(value)
+    if isinstance(value, dict):
+        return normalize_payload(value)
+    if isinstance(value, (list, tuple)):
+        return [_normalize_value(item) for item in value]
+    return value
+
+def normalize_payload(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Normaliza os dados de um pedido de análise: texto em minúsculas, sem acentos
+    e sem espaços repetidos; campos vazios e campos de controlo são ignorados.
+    """
+    normalized = {}
+    for key, value in data.items():
+        if key in IGNORED_FIELDS:
+            continue
+        value = _normalize_value(value)
+        if value in (None, "", [], {}):
+            continue
+        normalized[key] = value
+    return normalized
+
+def analysis_input_hash(data: Dict[str, Any]) -> str:
+    """
+    Hash SHA-256 dos dados normalizados de um pedido de análise.
+    Pedidos que diferem apenas em maiúsculas, acentos ou espaços têm o mesmo hash.
+    """
+    raw = json.dumps(normalize_payload(data), sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
@@ -1,20 +1,42 @@
 # Ficheiro: src/services/search_manager.py
 
+import asyncio
 import logging
-import requests
-from typing import List, Dict
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
+from typing import Any, Callable, List, Dict, Optional, Tuple
 from urllib.parse import quote_plus
 from bs4 import BeautifulSoup
 
 # Importa a configuração centralizada para aceder às chaves de API
 from config import Config
+from services.async_runtime import async_runtime
+from services.cache import create_cache, normalize_text
+from services.circuit_breaker import create_breaker
+from services.http_client import http_client
+from services.metrics import metrics_registry
+from services.rate_limiter import rate_limiter
+from services.single_flight import AsyncSingleFlight, SingleFlight
 
 logger = logging.getLogger(__name__)
 
+# Nomes dos provedores usados nos logs
+PROVIDER_LABELS = {"jina": "Jina AI", "google_cse": "Google CSE", "scrapingant": "ScrapingAnt"}
+
 class SearchManager:
     """
     Gerenciador de buscas 100% gratuito com sistema de fallback em camadas.
     Prioridade: Jina AI -> Google Custom Search -> ScrapingAnt.
+
+    No modo 'race' (SEARCH_MODE=race), os provedores são consultados em paralelo
+    e a busca termina assim que houver resultados suficientes ou o orçamento de
+    latência se esgotar.
+
+    Os resultados são guardados numa cache com TTL, indexada pela consulta
+    normalizada, para poupar as quotas dos provedores em consultas repetidas.
+
+    multi_search_async é a versão assíncrona (httpx no event loop partilhado);
+    com ASYNC_IO_ENABLED=true, multi_search delega nela.
     """
     def __init__(self):
         """Inicializa os URLs das APIs e as chaves a partir da configuração."""
@@ -28,122 +50,370 @@ class SearchManager:
         self.scrapingant_key = Config.SCRAPINGANT_API_KEY
         self.jina_key = Config.JINA_API_KEY # Jina pode usar uma chave para limites mais altos
 
+        self.search_mode = Config.SEARCH_MODE
+        self.latency_budget = Config.SEARCH_LATENCY_BUDGET
+
+        self.cache = create_cache(
+            "search_results",
+            ttl=Config.SEARCH_CACHE_TTL,
+            max_entries=Config.SEARCH_CACHE_MAX_ENTRIES
+        )
+        metrics_registry.register("search_cache", self.cache.stats)
+        self._flight = SingleFlight("search")
+        self._async_flight = AsyncSingleFlight("search_async")
+
+        # Disjuntores por provedor: um provedor em falha é ignorado de imediato
+        self.breakers = {
+            "jina": create_breaker("search:jina", "jina"),
+            "google_cse": create_breaker("search:google_cse", "google_cse"),
+            "scrapingant": create_breaker("search:scrapingant", "scrapingant_search"),
+        }
+
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
         }
         
         logger.info("✅ Search Manager (versão gratuita) inicializado.")
 
-    def _search_jina(self, query: str) -> List[Dict]:
-        """Busca usando Jina AI. Robusto e ideal para extrair conteúdo limpo."""
-        try:
-            url = f"{self.jina_api_url}{quote_plus(query)}"
-            headers = {
-                "Accept": "application/json",
-                "Authorization": f"Bearer {self.jina_key}"
-            }
-            response = requests.get(url, headers=headers, timeout=25)
-            
-            if response.status_code == 200:
-                data = response.json().get('data', [])
-                results = [
-                    {
-                        "title": r.get("title", "Sem título"),
-                        "url": r.get("url"),
-                        "snippet": r.get("description", r.get("content", ""))[:300],
-                        "source": "jina"
-                    } for r in data if r.get('url')
-                ]
-                logger.info(f"✅ Jina AI encontrou {len(results)} resultados.")
-                return results
-        except requests.RequestException as e:
-            logger.warning(f"⚠️ Jina AI falhou: {e}")
-        return []
+    def _allow(self, provider: str) -> bool:
+        """Consulta o disjuntor e o limite de pedidos do provedor antes de o chamar."""
+        if not self.breakers[provider].allow_request():
+            logger.info(f"🔌 Provedor '{provider}' ignorado: disjuntor aberto após falhas recentes.")
+            return False
+        if not rate_limiter.acquire(provider):
+            self.breakers[provider].release()
+            return False
+        return True
 
-    def _search_google_cse(self, query: str, num_results: int) -> List[Dict]:
-        """Busca usando Google Custom Search Engine (100/dia grátis)."""
-        if not self.google_key or not self.google_cx:
-            logger.warning("⚠️ Chaves do Google CSE não configuradas.")
-            return []
-        try:
-            params = {"key": self.google_key, "cx": self.google_cx, "q": query, "num": num_results}
-            response = requests.get(self.google_api_url, params=params, timeout=15)
-            if response.status_code == 200:
-                items = response.json().get("items", [])
-                results = [
-                    {"title": i.get("title"), "url": i.get("link"), "snippet": i.get("snippet"), "source": "google_cse"}
-                    for i in items
-                ]
-                logger.info(f"✅ Google CSE encontrou {len(results)} resultados.")
-                return results
-        except requests.RequestException as e:
-            logger.warning(f"⚠️ Google CSE falhou: {e}")
-        return []
+    def _record_call(self, provider: str, healthy: bool, start: float) -> None:
+        """Regista no disjuntor o resultado e a duração de uma chamada."""
+        duration = time.monotonic() - start
+        if healthy:
+            self.breakers[provider].record_success(duration)
+        else:
+            self.breakers[provider].record_failure(duration)
 
-    def _search_scrapingant(self, query: str) -> List[Dict]:
-        """Usa ScrapingAnt para fazer scraping da página de resultados do Google como fallback."""
+    def _provider_request(self, provider: str, query: str, num_results: int) -> Optional[Dict[str, Any]]:
+        """
+        Descreve o pedido HTTP a um provedor (URL, parâmetros e cabeçalhos), ou
+        devolve None se o provedor não estiver configurado.
+        """
+        if provider == "jina":
+            # Jina AI: robusto e ideal para extrair conteúdo limpo
+            return {
+                "url": f"{self.jina_api_url}{quote_plus(query)}",
+                "http_provider": "jina",
+                "headers": {
+                    "Accept": "application/json",
+                    "Authorization": f"Bearer {self.jina_key}"
+                }
+            }
+        if provider == "google_cse":
+            # Google Custom Search Engine (100/dia grátis)
+            if not self.google_key or not self.google_cx:
+                logger.warning("⚠️ Chaves do Google CSE não configuradas.")
+                return None
+            return {
+                "url": self.google_api_url,
+                "http_provider": "google_cse",
+                "params": {"key": self.google_key, "cx": self.google_cx, "q": query, "num": num_results}
+            }
+        # ScrapingAnt: scraping da página de resultados do Google como fallback
         if not self.scrapingant_key:
             logger.warning("⚠️ Chave da ScrapingAnt não configurada.")
+            return None
+        google_search_url = f"https://www.google.com/search?q={quote_plus(query)}&hl=pt-BR"
+        return {
+            "url": self.scrapingant_api_url,
+            "http_provider": "scrapingant_search",
+            "params": {'url': google_search_url, 'browser': 'false'},
+            "headers": {'x-api-key': self.scrapingant_key}
+        }
+
+    def _parse_results(self, provider: str, response: Any) -> List[Dict]:
+        """Converte a resposta (200) de um provedor na lista de resultados normalizada."""
+        if provider == "jina":
+            data = response.json().get('data', [])
+            return [
+                {
+                    "title": r.get("title", "Sem título"),
+                    "url": r.get("url"),
+                    "snippet": r.get("description", r.get("content", ""))[:300],
+                    "source": "jina"
+                } for r in data if r.get('url')
+            ]
+        if provider == "google_cse":
+            items = response.json().get("items", [])
+            return [
+                {"title": i.get("title"), "url": i.get("link"), "snippet": i.get("snippet"), "source": "google_cse"}
+                for i in items
+            ]
+
+        soup = BeautifulSoup(response.content, 'html.parser')
+        results = []
+        # Procura por divs que contêm os resultados de pesquisa do Google
+        for g in soup.find_all('div', class_='g'):
+            a_tag = g.find('a')
+            h3_tag = g.find('h3')
+            snippet_div = g.find('div', style=lambda value: value and 'display: -webkit-box' in value)
+            
+            if a_tag and a_tag.get('href') and h3_tag:
+                results.append({
+                    "title": h3_tag.text,
+                    "url": a_tag['href'],
+                    "snippet": snippet_div.text if snippet_div else "Sem snippet.",
+                    "source": "scrapingant_google"
+                })
+        return results
+
+    def _search_provider(self, provider: str, query: str, num_results: int) -> List[Dict]:
+        """Consulta um provedor, respeitando o disjuntor e o limite de pedidos."""
+        request = self._provider_request(provider, query, num_results)
+        if not request or not self._allow(provider):
             return []
+        start = time.monotonic()
+        healthy = False
         try:
-            google_search_url = f"https://www.google.com/search?q={quote_plus(query)}&hl=pt-BR"
-            params = {'url': google_search_url, 'browser': 'false'}
-            headers = {'x-api-key': self.scrapingant_key}
-            
-            response = requests.get(self.scrapingant_api_url, params=params, headers=headers, timeout=30)
-
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                results = []
-                # Procura por divs que contêm os resultados de pesquisa do Google
-                for g in soup.find_all('div', class_='g'):
-                    a_tag = g.find('a')
-                    h3_tag = g.find('h3')
-                    snippet_div = g.find('div', style=lambda value: value and 'display: -webkit-box' in value)
-                    
-                    if a_tag and a_tag.get('href') and h3_tag:
-                        results.append({
-                            "title": h3_tag.text,
-                            "url": a_tag['href'],
-                            "snippet": snippet_div.text if snippet_div else "Sem snippet.",
-                            "source": "scrapingant_google"
-                        })
-                logger.info(f"✅ ScrapingAnt encontrou {len(results)} resultados.")
+            response = http_client.get(
+                request["url"], provider=request["http_provider"],
+                params=request.get("params"), headers=request.get("headers")
+            )
+            healthy = response.status_code == 200
+            rate_limiter.observe(provider, response)
+            if healthy:
+                results = self._parse_results(provider, response)
+                logger.info(f"✅ {PROVIDER_LABELS[provider]} encontrou {len(results)} resultados.")
                 return results
         except Exception as e:
-            logger.warning(f"⚠️ ScrapingAnt falhou: {e}")
+            logger.warning(f"⚠️ {PROVIDER_LABELS[provider]} falhou: {e}")
+        finally:
+            self._record_call(provider, healthy, start)
         return []
 
-    def multi_search(self, query: str, max_results: int = 10) -> List[Dict]:
-        """
-        Orquestra a busca em múltiplos provedores gratuitos com fallback.
-        """
-        logger.info(f"🚀 Iniciando multi-busca gratuita para: '{query}'")
-        
+    def _providers(self, query: str, num_results: int) -> List[Tuple[str, Callable[[], List[Dict]]]]:
+        """Lista de provedores, por ordem de prioridade, prontos a serem chamados."""
+        return [
+            (provider, lambda provider=provider: self._search_provider(provider, query, num_results))
+            for provider in PROVIDER_LABELS
+        ]
+
+    def _merge_unique(self, unique_results: List[Dict], seen_urls: set, new_results: List[Dict]) -> None:
+        """Junta novos resultados à lista, ignorando URLs já vistas."""
+        for res in new_results:
+            if res.get('url') and res['url'] not in seen_urls:
+                seen_urls.add(res['url'])
+                unique_results.append(res)
+
+    def _sequential_search(self, query: str, max_results: int) -> List[Dict]:
+        """Consulta os provedores um a um, só avançando se faltarem resultados."""
         # 1. Tenta Jina AI (fonte primária)
-        results = self._search_jina(query)
+        results = self._search_provider("jina", query, max_results)
 
         # 2. Se não houver resultados suficientes, tenta Google CSE
         if len(results) < max_results:
             needed = max_results - len(results)
-            results.extend(self._search_google_cse(query, needed))
+            results.extend(self._search_provider("google_cse", query, needed))
 
         # 3. Se ainda não for suficiente, usa o fallback ScrapingAnt
         if len(results) < max_results:
-             results.extend(self._search_scrapingant(query))
+             results.extend(self._search_provider("scrapingant", query, max_results))
 
-        # Remove duplicados pela URL e limita os resultados
-        seen_urls = set()
-        unique_results = []
-        for res in results:
-            if res.get('url') and res['url'] not in seen_urls:
-                seen_urls.add(res['url'])
-                unique_results.append(res)
-        
+        # Remove duplicados pela URL
+        unique_results: List[Dict] = []
+        self._merge_unique(unique_results, set(), results)
+        return unique_results
+
+    def _race_search(self, query: str, max_results: int) -> List[Dict]:
+        """
+        Consulta todos os provedores em paralelo e junta os resultados à medida
+        que chegam. Retorna quando há 'max_results' URLs únicas ou o orçamento de
+        latência termina; os provedores ainda pendentes são abandonados (os seus
+        pedidos terminam pelo próprio timeout e o resultado é descartado).
+        """
+        unique_results: List[Dict] = []
+        seen_urls: set = set()
+        providers = self._providers(query, max_results)
+        start = time.monotonic()
+
+        executor = ThreadPoolExecutor(max_workers=len(providers), thread_name_prefix="search")
+        futures = {executor.submit(search): name for name, search in providers}
+        try:
+            for future in as_completed(futures, timeout=self.latency_budget):
+                name = futures[future]
+                try:
+                    provider_results = future.result()
+                except Exception as e:
+                    logger.warning(f"⚠️ Provedor '{name}' falhou na busca paralela: {e}")
+                    continue
+
+                self._merge_unique(unique_results, seen_urls, provider_results)
+                logger.info(
+                    f"🏁 '{name}' respondeu em {time.monotonic() - start:.1f}s "
+                    f"({len(unique_results)}/{max_results} resultados únicos)."
+                )
+                if len(unique_results) >= max_results:
+                    break
+        except FuturesTimeoutError:
+            logger.warning(
+                f"⏱️ Orçamento de latência da busca ({self.latency_budget}s) esgotado "
+                f"com {len(unique_results)} resultados."
+            )
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        return unique_results
+
+    def multi_search(self, query: str, max_results: int = 10, mode: Optional[str] = None) -> List[Dict]:
+        """
+        Orquestra a busca em múltiplos provedores gratuitos.
+
+        Args:
+            query: A consulta de pesquisa.
+            max_results: O número máximo de resultados únicos a retornar.
+            mode: 'sequential' (fallback em camadas) ou 'race' (provedores em paralelo).
+                  Por defeito usa o valor de SEARCH_MODE.
+        """
+        if async_runtime.enabled:
+            return async_runtime.run(self.multi_search_async(query, max_results, mode))
+
+        mode = mode or self.search_mode
+        cache_key = f"{normalize_text(query)}|{max_results}"
+        cached_results = self.cache.get(cache_key)
+        if cached_results is not None:
+            logger.info(f"♻️ Resultados de busca obtidos da cache para: '{query}'")
+            return cached_results
+
+        # Buscas idênticas em simultâneo partilham a mesma chamada aos provedores.
+        return list(self._flight.do(
+            cache_key, lambda: self._search_and_cache(query, max_results, mode, cache_key)
+        ))
+
+    def _search_and_cache(self, query: str, max_results: int, mode: str, cache_key: str) -> List[Dict]:
+        """Consulta os provedores e guarda os resultados na cache."""
+        logger.info(f"🚀 Iniciando multi-busca gratuita ({mode}) para: '{query}'")
+
+        if mode == "race":
+            unique_results = self._race_search(query, max_results)
+        else:
+            unique_results = self._sequential_search(query, max_results)
+        return self._store_results(cache_key, unique_results, max_results)
+
+    def _store_results(self, cache_key: str, unique_results: List[Dict], max_results: int) -> List[Dict]:
+        """Limita os resultados a 'max_results' e guarda-os na cache."""
         final_results = unique_results[:max_results]
         logger.info(f"✅ Multi-busca concluída. Total de {len(final_results)} resultados únicos.")
+
+        # Uma busca sem resultados indica falha dos provedores: não fica em cache.
+        if final_results:
+            self.cache.set(cache_key, final_results)
         return final_results
 
+    # --- Caminho Assíncrono ---
+
+    async def _search_provider_async(self, provider: str, query: str, num_results: int) -> List[Dict]:
+        """Versão assíncrona de _search_provider; um cancelamento não conta como falha do provedor."""
+        request = self._provider_request(provider, query, num_results)
+        if not request or not await asyncio.to_thread(self._allow, provider):
+            return []
+        start = time.monotonic()
+        healthy = False
+        cancelled = False
+        try:
+            response = await async_runtime.get(
+                request["url"], provider=request["http_provider"],
+                params=request.get("params"), headers=request.get("headers")
+            )
+            healthy = response.status_code == 200
+            await asyncio.to_thread(rate_limiter.observe, provider, response)
+            if healthy:
+                results = await asyncio.to_thread(self._parse_results, provider, response)
+                logger.info(f"✅ {PROVIDER_LABELS[provider]} encontrou {len(results)} resultados.")
+                return results
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+        except Exception as e:
+            logger.warning(f"⚠️ {PROVIDER_LABELS[provider]} falhou: {e}")
+        finally:
+            if cancelled:
+                self.breakers[provider].release()
+            else:
+                self._record_call(provider, healthy, start)
+        return []
+
+    async def _sequential_search_async(self, query: str, max_results: int) -> List[Dict]:
+        """Versão assíncrona de _sequential_search."""
+        results = await self._search_provider_async("jina", query, max_results)
+        if len(results) < max_results:
+            results.extend(await self._search_provider_async("google_cse", query, max_results - len(results)))
+        if len(results) < max_results:
+            results.extend(await self._search_provider_async("scrapingant", query, max_results))
+
+        unique_results: List[Dict] = []
+        self._merge_unique(unique_results, set(), results)
+        return unique_results
+
+    async def _race_search_async(self, query: str, max_results: int) -> List[Dict]:
+        """
+        Versão assíncrona de _race_search. Os provedores ainda pendentes quando a
+        busca termina são cancelados, em vez de abandonados.
+        """
+        unique_results: List[Dict] = []
+        seen_urls: set = set()
+        start = time.monotonic()
+        tasks = {
+            asyncio.ensure_future(self._search_provider_async(provider, query, max_results)): provider
+            for provider in PROVIDER_LABELS
+        }
+        pending = set(tasks)
+        try:
+            while pending and len(unique_results) < max_results:
+                remaining = self.latency_budget - (time.monotonic() - start)
+                done, pending = await asyncio.wait(pending, timeout=max(remaining, 0), return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    logger.warning(
+                        f"⏱️ Orçamento de latência da busca ({self.latency_budget}s) esgotado "
+                        f"com {len(unique_results)} resultados."
+                    )
+                    break
+                for task in done:
+                    name = tasks[task]
+                    if task.exception():
+                        logger.warning(f"⚠️ Provedor '{name}' falhou na busca paralela: {task.exception()}")
+                        continue
+                    self._merge_unique(unique_results, seen_urls, task.result())
+                    logger.info(
+                        f"🏁 '{name}' respondeu em {time.monotonic() - start:.1f}s "
+                        f"({len(unique_results)}/{max_results} resultados únicos)."
+                    )
+        finally:
+            for task in pending:
+                task.cancel()
+
+        return unique_results
+
+    async def multi_search_async(self, query: str, max_results: int = 10, mode: Optional[str] = None) -> List[Dict]:
+        """Versão assíncrona de multi_search, para correr no event loop partilhado."""
+        mode = mode or self.search_mode
+        cache_key = f"{normalize_text(query)}|{max_results}"
+        # A cache pode ser SQLite (I/O bloqueante): lida e escrita fora do event loop
+        cached_results = await asyncio.to_thread(self.cache.get, cache_key)
+        if cached_results is not None:
+            logger.info(f"♻️ Resultados de busca obtidos da cache para: '{query}'")
+            return cached_results
+
+        return list(await self._async_flight.do(
+            cache_key, lambda: self._search_and_cache_async(query, max_results, mode, cache_key)
+        ))
+
+    async def _search_and_cache_async(self, query: str, max_results: int, mode: str, cache_key: str) -> List[Dict]:
+        logger.info(f"🚀 Iniciando multi-busca gratuita ({mode}, assíncrona) para: '{query}'")
+        if mode == "race":
+            unique_results = await self._race_search_async(query, max_results)
+        else:
+            unique_results = await self._sequential_search_async(query, max_results)
+        return await asyncio.to_thread(self._store_results, cache_key, unique_results, max_results)
+
 # --- Instância Global ---
 # Cria uma única instância do SearchManager para ser usada em toda a aplicação.
 search_manager = SearchManager()
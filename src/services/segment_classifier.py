@@ -0,0 +1,46 @@
+# Ficheiro: src/services/segment_classifier.py
+
+import re
+from typing import Dict, FrozenSet, Iterable, Set
+
+from services.cache import normalize_text
+
+class SegmentClassifier:
+    """
+    Classifica o texto de um segmento em categorias com uma única expressão
+    regular (alternância de todas as palavras-chave), compilada uma vez.
+    As categorias e palavras-chave vêm da base de conhecimento; hífenes e
+    espaços dentro de uma palavra-chave são opcionais ("e-commerce" também
+    reconhece "ecommerce" e "e commerce").
+
+    O texto e as palavras-chave são comparados sem acentos e em minúsculas.
+    Uma palavra-chave tem de começar no início de uma palavra, mas pode ser
+    prefixo dela ("loja" reconhece "lojas", "empresa" reconhece "empresarial").
+    """
+    def __init__(self, keywords: Dict[str, Iterable[str]]):
+        # Uma palavra-chave pode pertencer a várias categorias (ex.: "consultoria")
+        self._tags_by_keyword: Dict[str, Set[str]] = {}
+        patterns: Dict[str, str] = {}
+        for tag, terms in keywords.items():
+            for term in terms:
+                parts = re.split(r"[-\s]+", normalize_text(term))
+                self._tags_by_keyword.setdefault("".join(parts), set()).add(tag)
+                patterns["".join(parts)] = r"[-\s]?".join(re.escape(part) for part in parts)
+
+        # As palavras-chave mais longas primeiro, para que prevaleçam sobre os seus prefixos
+        alternatives = sorted(patterns, key=len, reverse=True)
+        self._pattern = re.compile(r"(?<![a-z0-9])(?:" + "|".join(patterns[key] for key in alternatives) + ")") if alternatives else None
+
+    @staticmethod
+    def _compact(text: str) -> str:
+        return re.sub(r"[-\s]+", "", text)
+
+    def classify(self, text: str) -> FrozenSet[str]:
+        """Categorias presentes no texto, encontradas numa única passagem."""
+        if not text or self._pattern is None:
+            return frozenset()
+        return frozenset(
+            tag
+            for match in self._pattern.finditer(normalize_text(text))
+            for tag in self._tags_by_keyword[self._compact(match.group(0))]
+        )
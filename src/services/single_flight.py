@@ -0,0 +1,112 @@
+# Ficheiro: src/services/single_flight.py
+
+import asyncio
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from services.metrics import metrics_registry
+
+logger = logging.getLogger(__name__)
+
+class _Call:
+    """Uma execução em curso, partilhada por todos os pedidos com a mesma chave."""
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Agrupa chamadas idênticas em simultâneo: o primeiro pedido para uma chave
+    executa a função e os restantes, que cheguem enquanto esta ainda corre,
+    esperam e recebem o mesmo resultado (ou a mesma exceção).
+
+    O resultado é partilhado por referência: quem o recebe não o deve alterar.
+    """
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self.executions = 0
+        self.shared = 0
+        _flights.append(self)
+
+    def do(self, key: str, func: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self.executions += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            logger.info(f"🔗 Pedido idêntico já em curso ({self.name}). A aguardar pelo mesmo resultado.")
+            call.done.wait()
+            if call.error:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "executions": self.executions,
+                "shared": self.shared,
+                "in_flight": len(self._calls),
+            }
+
+
+class AsyncSingleFlight:
+    """
+    Equivalente de SingleFlight para corrotinas no mesmo event loop: pedidos
+    idênticos em simultâneo esperam pela mesma tarefa. A tarefa partilhada não
+    é cancelada se um dos pedidos que a esperam for cancelado.
+    """
+    def __init__(self, name: str):
+        self.name = name
+        self._tasks: Dict[str, "asyncio.Future"] = {}
+        self.executions = 0
+        self.shared = 0
+        _flights.append(self)
+
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._tasks[key] = task
+            self.executions += 1
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        else:
+            self.shared += 1
+            logger.info(f"🔗 Pedido idêntico já em curso ({self.name}). A aguardar pelo mesmo resultado.")
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "executions": self.executions,
+            "shared": self.shared,
+            "in_flight": len(self._tasks),
+        }
+
+
+_flights: List[Any] = []
+
+def _collect_stats() -> Dict[str, Any]:
+    return {flight.name: flight.stats() for flight in _flights}
+
+metrics_registry.register("single_flight", _collect_stats)
@@ -0,0 +1,216 @@
+# Ficheiro: src/services/streaming_json_parser.py
+
+import json
+import logging
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Caracteres com significado estrutural fora e dentro de strings
+_STRUCTURAL_CHARS = re.compile(r'[{}\[\]",:]')
+_STRING_CHARS = re.compile(r'["\\]')
+# Vírgula antes de '}' ou ']', um erro frequente nas respostas dos modelos
+_TRAILING_COMMA = re.compile(r',(\s*[}\]])')
+
+# Número máximo de pontos de corte testados ao reparar um JSON truncado
+MAX_REPAIR_ATTEMPTS = 20
+
+class StreamingJSONParser:
+    """
+    Parser incremental e tolerante para o relatório JSON gerado pela IA.
+
+    Recebe o texto aos pedaços (feed) e devolve cada secção de topo
+    ('resumo_executivo', 'analise_mercado', ...) assim que esta fecha.
+    Texto antes do primeiro '{' (ex.: ```json) e depois do último '}' é ignorado.
+
+    No fim (finish), se a resposta estiver truncada, fecha as strings e os
+    objetos/listas em aberto a partir do último ponto seguro, recuperando
+    tudo o que foi gerado até ao corte.
+    """
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._start: Optional[int] = None
+        self._end: Optional[int] = None
+        # Contentores em aberto ('{' ou '[') e, para cada um, se espera uma chave
+        self._stack: List[str] = []
+        self._expect_key: List[bool] = []
+        self._in_string = False
+        self._string_is_key = False
+        self._escape = False
+        self._member_start: Optional[int] = None
+        # Posições onde o texto pode ser cortado e fechado, com os contentores em aberto
+        self._safe_points: List[Tuple[int, str]] = []
+        self.sections: Dict[str, Any] = {}
+        self.repaired = False
+
+    @property
+    def done(self) -> bool:
+        """True quando o objeto de topo já foi fechado."""
+        return self._end is not None
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """
+        Acrescenta texto ao buffer.
+
+        Returns:
+            As secções de topo que ficaram completas com este pedaço, como
+            uma lista de pares (nome, conteúdo).
+        """
+        self._buffer += chunk
+        completed: List[Tuple[str, Any]] = []
+        buffer = self._buffer
+
+        while self._pos < len(buffer) and not self.done:
+            if self._start is None:
+                start = buffer.find('{', self._pos)
+                if start < 0:
+                    self._pos = len(buffer)
+                    break
+                self._start = start
+                self._pos = start
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                    self._pos += 1
+                    continue
+                match = _STRING_CHARS.search(buffer, self._pos)
+                if not match:
+                    self._pos = len(buffer)
+                    break
+                i = match.start()
+                if buffer[i] == '\\':
+                    self._escape = True
+                    self._pos = i + 1
+                    continue
+                self._in_string = False
+                self._pos = i + 1
+                if not self._string_is_key:
+                    self._add_safe_point(self._pos)
+                continue
+
+            match = _STRUCTURAL_CHARS.search(buffer, self._pos)
+            if not match:
+                self._pos = len(buffer)
+                break
+            i = match.start()
+            char = buffer[i]
+            self._pos = i + 1
+
+            if char in '{[':
+                self._stack.append(char)
+                self._expect_key.append(char == '{')
+                if len(self._stack) == 1:
+                    self._member_start = i + 1
+                self._add_safe_point(i + 1)
+            elif char in '}]':
+                if not self._stack:
+                    continue
+                if len(self._stack) == 1:
+                    self._emit_member(i, completed)
+                self._stack.pop()
+                self._expect_key.pop()
+                if not self._stack:
+                    self._end = i
+                else:
+                    self._add_safe_point(i + 1)
+            elif char == ',':
+                self._add_safe_point(i)
+                if self._stack and self._stack[-1] == '{':
+                    self._expect_key[-1] = True
+                if len(self._stack) == 1:
+                    self._emit_member(i, completed)
+                    self._member_start = i + 1
+            elif char == ':':
+                if self._stack and self._stack[-1] == '{':
+                    self._expect_key[-1] = False
+            elif char == '"':
+                self._in_string = True
+                self._string_is_key = bool(self._stack) and self._stack[-1] == '{' and self._expect_key[-1]
+
+        return completed
+
+    def _add_safe_point(self, position: int) -> None:
+        self._safe_points.append((position, "".join(self._stack)))
+
+    def _emit_member(self, end: int, completed: List[Tuple[str, Any]]) -> None:
+        """Interpreta o membro de topo entre _member_start e end ('"chave": valor')."""
+        member = self._buffer[self._member_start:end].strip()
+        if not member:
+            return
+        parsed = _loads_lenient("{" + member + "}")
+        if parsed is None:
+            logger.warning(f"⚠️ Secção do relatório com JSON inválido ignorada: {member[:80]}...")
+            return
+        for key, value in parsed.items():
+            self.sections[key] = value
+            completed.append((key, value))
+
+    @staticmethod
+    def _closers(stack: str) -> str:
+        return "".join('}' if char == '{' else ']' for char in reversed(stack))
+
+    def finish(self) -> Optional[Dict[str, Any]]:
+        """
+        Devolve o objeto completo. Se o texto estiver truncado ou inválido, tenta
+        repará-lo; em último caso devolve as secções que ficaram completas.
+
+        Returns:
+            O dicionário interpretado, ou None se não houver nada recuperável.
+        """
+        if self._start is None:
+            return None
+
+        candidates = []
+        if self.done:
+            text = self._buffer[self._start:self._end + 1]
+            try:
+                result = json.loads(text)
+                if isinstance(result, dict):
+                    return result
+            except json.JSONDecodeError:
+                candidates.append(text)
+
+        if self._in_string and not self._string_is_key:
+            # Cortado a meio de um valor de texto: fecha a string e os contentores
+            body = self._buffer[self._start:]
+            if self._escape:
+                body = body[:-1]
+            candidates.append(body + '"' + self._closers("".join(self._stack)))
+        for position, stack in reversed(self._safe_points[-MAX_REPAIR_ATTEMPTS:]):
+            candidates.append(self._buffer[self._start:position] + self._closers(stack))
+
+        for candidate in candidates:
+            result = _loads_lenient(candidate)
+            if isinstance(result, dict):
+                self.repaired = True
+                return result
+
+        if self.sections:
+            self.repaired = True
+            return dict(self.sections)
+        return None
+
+
+def _loads_lenient(text: str) -> Optional[Any]:
+    """json.loads que tolera vírgulas finais; devolve None se o texto for inválido."""
+    for candidate in (text, _TRAILING_COMMA.sub(r'\1', text)):
+        try:
+            return json.loads(candidate)
+        except json.JSONDecodeError:
+            continue
+    return None
+
+def parse_llm_json(text: str) -> Tuple[Optional[Dict[str, Any]], bool]:
+    """
+    Interpreta de uma só vez uma resposta completa da IA.
+
+    Returns:
+        Um tuplo (dicionário ou None, True se foi necessário reparar o JSON).
+    """
+    parser = StreamingJSONParser()
+    parser.feed(text)
+    return parser.finish(), parser.repaired
@@ -0,0 +1,69 @@
+# Ficheiro: src/services/text_fingerprint.py
+
+import hashlib
+import re
+import threading
+from collections import Counter
+from typing import Any, List, Optional, Tuple
+
+from services.cache import normalize_text
+
+FINGERPRINT_BITS = 64
+
+def shingles(text: str, size: int = 3) -> List[str]:
+    """Sequências de 'size' palavras consecutivas do texto normalizado."""
+    words = re.findall(r'\w+', normalize_text(text))
+    if len(words) < size:
+        return [" ".join(words)] if words else []
+    return [" ".join(words[i:i + size]) for i in range(len(words) - size + 1)]
+
+def simhash(text: str, size: int = 3) -> Optional[int]:
+    """
+    Impressão digital SimHash de 64 bits sobre os shingles do texto. Textos quase
+    iguais (artigos replicados, páginas espelho) diferem em poucos bits.
+
+    Returns:
+        O fingerprint, ou None se o texto não tiver palavras.
+    """
+    counts = Counter(shingles(text, size))
+    if not counts:
+        return None
+
+    weights = [0] * FINGERPRINT_BITS
+    for shingle, weight in counts.items():
+        value = int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'big')
+        for bit in range(FINGERPRINT_BITS):
+            weights[bit] += weight if value >> bit & 1 else -weight
+
+    return sum(1 << bit for bit, total in enumerate(weights) if total > 0)
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class FingerprintIndex:
+    """
+    Conjunto de fingerprints já vistos. 'add_if_new' regista um texto e indica se
+    é quase duplicado (distância de Hamming <= max_distance) de algum anterior.
+    """
+    def __init__(self, max_distance: int = 3, shingle_size: int = 3):
+        self.max_distance = max_distance
+        self.shingle_size = shingle_size
+        self._entries: List[Tuple[int, Any]] = []
+        self._lock = threading.Lock()
+
+    def add_if_new(self, text: str, key: Any) -> Optional[Any]:
+        """
+        Returns:
+            None se o texto for novo (e fica registado), ou a chave do texto
+            anterior de que é quase duplicado.
+        """
+        fingerprint = simhash(text, self.shingle_size)
+        if fingerprint is None:
+            return None
+        with self._lock:
+            for other, other_key in self._entries:
+                if hamming_distance(fingerprint, other) <= self.max_distance:
+                    return other_key
+            self._entries.append((fingerprint, key))
+        return None
@@ -10,6 +10,7 @@ class AnalysisManager {
         this.currentStep = 0;
         this.totalSteps = 6;
         this.progressInterval = null;
+        this.eventSource = null;
         this.init();
     }
 
@@ -51,10 +52,7 @@ class AnalysisManager {
         this.setupAnalysisUI();
         
         try {
-            // Inicia animação de progresso
-            this.startProgressAnimation();
-            
-            // Chama API de análise
+            // Chama API de análise (com progresso em tempo real quando suportado)
             const result = await this.performAnalysis(formData);
             
             // Processa resultado
@@ -191,9 +189,23 @@ class AnalysisManager {
     }
 
     /**
-     * Executa a análise via API
+     * Executa a análise via API.
+     * Usa o modo assíncrono com Server-Sent Events quando o navegador o suporta,
+     * recorrendo ao pedido síncrono com progresso simulado caso contrário.
      */
     async performAnalysis(formData) {
+        if (window.EventSource) {
+            return this.performStreamingAnalysis(formData);
+        }
+        return this.performSyncAnalysis(formData);
+    }
+
+    /**
+     * Executa a análise num único pedido síncrono, com progresso simulado
+     */
+    async performSyncAnalysis(formData) {
+        this.startProgressAnimation();
+
         const response = await fetch('/api/analyze', {
             method: 'POST',
             headers: {
@@ -210,6 +222,182 @@ class AnalysisManager {
         return await response.json();
     }
 
+    /**
+     * Agenda a análise em segundo plano e acompanha o progresso real
+     * através do stream de eventos do servidor.
+     */
+    async performStreamingAnalysis(formData) {
+        const response = await fetch('/api/analyze?async=true', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify(formData)
+        });
+
+        if (!response.ok) {
+            const errorData = await response.json();
+            throw new Error(errorData.error || `Erro HTTP: ${response.status}`);
+        }
+
+        // Uma análise recente com os mesmos dados é devolvida de imediato (200)
+        if (response.status === 200) {
+            return await response.json();
+        }
+
+        const job = await response.json();
+
+        return new Promise((resolve, reject) => {
+            const source = new EventSource(job.events_url);
+            this.eventSource = source;
+            let pagesExtracted = 0;
+            let totalPages = 0;
+            let generatedChars = 0;
+            // Secções já recebidas, mostradas antes do relatório final
+            let partialReport = {};
+
+            const parse = (event) => JSON.parse(event.data);
+
+            source.addEventListener('phase', (event) => {
+                const data = parse(event);
+                const steps = {
+                    'psychological_analysis:started': [5, '🧠 Analisando perfil psicológico do avatar...'],
+                    'web_search:started': [25, '🔍 Realizando pesquisa web contextual...'],
+                    'report_generation:started': [65, '📊 Gerando relatório integrado com IA...']
+                };
+                const step = steps[`${data.phase}:${data.status}`];
+                if (step) {
+                    this.updateProgress(step[0], step[1]);
+                }
+            });
+
+            source.addEventListener('psychological_analysis', (event) => {
+                // Mostra as secções psicológicas enquanto o resto do relatório é gerado
+                const data = parse(event);
+                this.updateProgress(20, '⚡ Drivers mentais e objeções mapeados...');
+                partialReport = { ...data.analysis, ...partialReport };
+                this.renderPartialResults(partialReport);
+            });
+
+            source.addEventListener('search_results', (event) => {
+                const data = parse(event);
+                totalPages = data.results.length;
+                this.updateProgress(30, `🌐 ${totalPages} fontes encontradas. A extrair conteúdo...`);
+            });
+
+            source.addEventListener('page_extracted', (event) => {
+                const data = parse(event);
+                pagesExtracted++;
+                const progress = 30 + Math.round(30 * pagesExtracted / Math.max(totalPages, 1));
+                this.updateProgress(progress, `📄 Extraído: ${data.title || data.url}`);
+            });
+
+            source.addEventListener('llm_chunk', (event) => {
+                const data = parse(event);
+                generatedChars += data.text.length;
+                this.updateProgress(80, `✍️ A gerar relatório... (${generatedChars} caracteres)`);
+            });
+
+            source.addEventListener('section_ready', (event) => {
+                const data = parse(event);
+                partialReport = { ...partialReport, [data.section]: data.content };
+                this.renderPartialResults(partialReport);
+            });
+
+            source.addEventListener('report_parsed', () => {
+                this.updateProgress(95, '✅ Relatório recebido. A finalizar...');
+            });
+
+            source.addEventListener('done', (event) => {
+                const data = parse(event);
+                source.close();
+                this.eventSource = null;
+                if (data.status === 'completed') {
+                    resolve(data.result);
+                } else {
+                    reject(new Error(data.error || 'Falha na análise.'));
+                }
+            });
+
+            source.onerror = () => {
+                // O EventSource volta a ligar sozinho; só desistimos se a ligação foi fechada
+                // (p. ex. um 404 porque o job vive noutro worker do gunicorn).
+                if (source.readyState === EventSource.CLOSED) {
+                    this.eventSource = null;
+                    resolve(this.recoverAnalysis(job, formData));
+                }
+            };
+        });
+    }
+
+    /**
+     * Recupera uma análise cujo stream de eventos falhou: acompanha o job por
+     * polling e, se este não existir neste processo, repete o pedido em modo síncrono.
+     */
+    async recoverAnalysis(job, formData) {
+        while (true) {
+            let response;
+            try {
+                response = await fetch(job.status_url);
+            } catch (error) {
+                throw new Error('A ligação de progresso com o servidor foi perdida.');
+            }
+
+            if (response.status === 404) {
+                console.warn('Job de análise não encontrado; a repetir em modo síncrono.');
+                return this.performSyncAnalysis(formData);
+            }
+            if (!response.ok) {
+                throw new Error(`Erro HTTP: ${response.status}`);
+            }
+
+            const snapshot = await response.json();
+            if (snapshot.status === 'completed') {
+                return snapshot.result;
+            }
+            if (snapshot.status === 'failed') {
+                throw new Error(snapshot.error || 'Falha na análise.');
+            }
+
+            this.updateProgress(snapshot.progress.percent, '⏳ A aguardar a conclusão da análise...');
+            await new Promise(resolve => setTimeout(resolve, 2000));
+        }
+    }
+
+    /**
+     * Atualiza a barra e o texto de progresso
+     */
+    updateProgress(progress, text) {
+        const progressFill = document.getElementById('progressBarFill');
+        const statusText = document.getElementById('progressStatusText');
+
+        if (progressFill) {
+            progressFill.style.width = `${progress}%`;
+        }
+
+        if (statusText) {
+            statusText.textContent = text;
+        }
+    }
+
+    /**
+     * Mostra resultados parciais (ex.: análise psicológica) antes do relatório final
+     */
+    renderPartialResults(partialResult) {
+        if (!partialResult) return;
+
+        const resultsSection = document.getElementById('resultsArea');
+        if (resultsSection) {
+            resultsSection.style.display = 'block';
+        }
+
+        if (window.dashboardManager) {
+            window.dashboardManager.renderDashboard(partialResult);
+        } else {
+            this.renderFallbackResults(partialResult);
+        }
+    }
+
     /**
      * Processa resultado da análise
      */
@@ -427,6 +615,11 @@ class AnalysisManager {
         this.isAnalyzing = false;
         this.currentStep = 0;
         this.stopProgressAnimation();
+
+        if (this.eventSource) {
+            this.eventSource.close();
+            this.eventSource = null;
+        }
         
         // Mostra formulário
         const formSection = document.querySelector('.analysis-section');
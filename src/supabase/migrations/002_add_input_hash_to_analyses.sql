@@ -0,0 +1,27 @@
+-- Ficheiro: src/supabase/migrations/002_add_input_hash_to_analyses.sql
+
+-- =================================================================
+-- Script de Migração para o Banco de Dados ARQV30 (Supabase/PostgreSQL)
+-- Versão: 1.1
+-- Descrição: Adiciona à tabela 'analyses' o hash dos dados de entrada,
+-- para reutilizar análises recentes feitas com os mesmos dados.
+-- =================================================================
+
+-- --- Coluna: input_hash ---
+-- Hash SHA-256 dos dados do formulário normalizados (minúsculas, sem acentos,
+-- sem espaços repetidos e sem campos vazios). Registos antigos ficam a NULL.
+
+ALTER TABLE public.analyses ADD COLUMN IF NOT EXISTS input_hash TEXT;
+
+COMMENT ON COLUMN public.analyses.input_hash IS 'Hash SHA-256 dos dados de entrada normalizados, usado para reutilizar análises recentes.';
+
+-- --- Índice para a Procura por Hash ---
+-- A consulta procura a análise mais recente com um dado hash, dentro de uma
+-- janela de tempo: (input_hash, created_at DESC) responde-lhe com um único acesso.
+
+CREATE INDEX IF NOT EXISTS idx_analyses_input_hash_created_at
+    ON public.analyses (input_hash, created_at DESC);
+
+-- =================================================================
+-- Fim do Script de Migração
+-- =================================================================
@@ -0,0 +1,78 @@
+# Ficheiro: tests/conftest.py
+
+import os
+import sys
+import tempfile
+from concurrent.futures import Executor, Future
+
+import pytest
+
+# --- Configuração Inicial ---
+# Torna importáveis o config.py (na raiz) e os módulos de 'src', como no test_simple.py.
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+# As caches e o limitador de pedidos globais escrevem em CACHE_DIR: longe do projeto.
+os.environ.setdefault('CACHE_DIR', tempfile.mkdtemp(prefix='arqv30-tests-'))
+
+
+class InlineExecutor(Executor):
+    """Executor que corre cada tarefa de imediato, na própria thread: jobs determinísticos."""
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        return future
+
+
+@pytest.fixture
+def inline_job_manager():
+    from services.job_manager import JobManager
+    return JobManager(max_workers=1, max_pending=4, executor=InlineExecutor())
+
+
+@pytest.fixture
+def analysis_routes(monkeypatch, inline_job_manager):
+    """
+    O módulo routes.analysis sem banco de dados e com um pipeline falso, que
+    devolve os dados recebidos. Os jobs correm de imediato no inline_job_manager.
+    """
+    from routes import analysis
+
+    def fake_pipeline(data, progress_callback=None, web_context=None):
+        if progress_callback:
+            progress_callback("phase", {"phase": "psychological_analysis", "status": "started"})
+            progress_callback("phase", {"phase": "psychological_analysis", "status": "completed"})
+        return {"segmento": data["segmento"], "web_context": web_context}, 200
+
+    monkeypatch.setattr(analysis, "_run_analysis_pipeline", fake_pipeline)
+    monkeypatch.setattr(analysis, "_find_reusable_analysis", lambda input_hash: None)
+    monkeypatch.setattr(analysis, "job_manager", inline_job_manager)
+    return analysis
+
+
+@pytest.fixture
+def client(analysis_routes):
+    import run
+    app = run.create_app()
+    app.testing = True
+    return app.test_client()
+
+
+@pytest.fixture
+def shared_search(monkeypatch):
+    """Busca partilhada falsa dos lotes: uma consulta por segmento, sem acesso à rede."""
+    from services import batch_analysis
+
+    searched = []
+
+    def gather_sources(query, scope=None):
+        searched.append(query)
+        return None
+
+    monkeypatch.setattr(batch_analysis.enhanced_analysis_engine, "generate_search_query", lambda item: f"consulta {item['segmento']}")
+    monkeypatch.setattr(batch_analysis.deep_search_service, "gather_sources", gather_sources)
+    return searched
@@ -0,0 +1,92 @@
+# Ficheiro: tests/test_admission_controller.py
+
+import threading
+import time
+
+from services.admission_controller import AdmissionController
+
+def test_admits_up_to_max_concurrent():
+    controller = AdmissionController("teste", max_concurrent=2, max_queue=0)
+    assert controller.acquire() is None
+    assert controller.acquire() is None
+    assert controller.stats()["active"] == 2
+
+def test_full_queue_is_refused_with_429():
+    controller = AdmissionController("teste", max_concurrent=1, max_queue=0, queue_timeout=5)
+    assert controller.acquire() is None
+    status, retry_after = controller.acquire()
+    assert status == 429
+    assert retry_after >= 1
+    assert controller.stats()["rejected_queue_full"] == 1
+
+def test_queue_timeout_is_refused_with_503():
+    controller = AdmissionController("teste", max_concurrent=1, max_queue=1, queue_timeout=0.05)
+    assert controller.acquire() is None
+    status, _ = controller.acquire()
+    assert status == 503
+    stats = controller.stats()
+    assert stats["rejected_timeout"] == 1
+    assert stats["queue_depth"] == 0
+
+def test_release_admits_the_next_in_queue():
+    controller = AdmissionController("teste", max_concurrent=1, max_queue=1, queue_timeout=5)
+    assert controller.acquire() is None
+    results = []
+    waiter = threading.Thread(target=lambda: results.append(controller.acquire()))
+    waiter.start()
+    while controller.stats()["queue_depth"] == 0:
+        time.sleep(0.01)
+    controller.release(1.0)
+    waiter.join(timeout=5)
+    assert results == [None]
+    assert controller.stats()["active"] == 1
+
+def test_blocking_acquire_ignores_queue_limits():
+    controller = AdmissionController("teste", max_concurrent=1, max_queue=0, queue_timeout=0.01)
+    assert controller.acquire() is None
+    results = []
+    waiter = threading.Thread(target=lambda: results.append(controller.acquire(block=True)))
+    waiter.start()
+    time.sleep(0.05)
+    assert results == []
+    controller.release()
+    waiter.join(timeout=5)
+    assert results == [None]
+
+def test_retry_after_follows_the_average_duration():
+    controller = AdmissionController("teste", max_concurrent=2, max_queue=4, queue_timeout=20)
+    assert controller.retry_after() == 10
+    controller.acquire()
+    controller.release(8.0)
+    assert controller.retry_after() == 4
+
+def test_disabled_controller_admits_everything():
+    controller = AdmissionController("teste", max_concurrent=1, max_queue=0, enabled=False)
+    assert all(controller.acquire() is None for _ in range(5))
+
+def test_blocking_waiters_do_not_fill_the_queue():
+    controller = AdmissionController("teste", max_concurrent=1, max_queue=1, queue_timeout=5)
+    assert controller.acquire() is None
+    results = []
+    blocking = [threading.Thread(target=lambda: results.append(controller.acquire(block=True))) for _ in range(2)]
+    for waiter in blocking:
+        waiter.start()
+    while controller.stats()["queue_depth"] < 2:
+        time.sleep(0.01)
+
+    # Os dois jobs à espera não ocupam o único lugar da fila dos pedidos síncronos
+    sync = threading.Thread(target=lambda: results.append(controller.acquire()))
+    sync.start()
+    while controller.stats()["queue_depth"] < 3:
+        time.sleep(0.01)
+    # Agora sim, a fila dos pedidos síncronos está cheia
+    status, _ = controller.acquire()
+    assert status == 429
+
+    for _ in range(3):
+        controller.release()
+        time.sleep(0.05)
+    for waiter in blocking + [sync]:
+        waiter.join(timeout=5)
+    assert results == [None, None, None]
+    assert controller.stats()["queue_depth"] == 0
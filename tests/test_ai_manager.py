@@ -0,0 +1,85 @@
+# Ficheiro: tests/test_ai_manager.py
+
+import threading
+import time
+
+import pytest
+from google.api_core import exceptions as google_exceptions
+
+from services import ai_manager as ai_manager_module
+from services.ai_manager import AIManager
+
+class Chunk:
+    def __init__(self, text):
+        self._text = text
+
+    @property
+    def text(self):
+        if self._text is None:
+            raise ValueError("Pedaço sem texto")
+        return self._text
+
+class StubModel:
+    """Imita o GenerativeModel do SDK fixado (0.3.2), que não aceita 'request_options'."""
+    def __init__(self, chunks=(), error=None, stall=None):
+        self.chunks = chunks
+        self.error = error
+        self.stall = stall
+        self.calls = []
+
+    def generate_content(self, contents, *, generation_config=None, safety_settings=None, stream=False):
+        self.calls.append({"contents": contents, "stream": stream})
+        if self.error:
+            raise self.error
+        return self._iterate()
+
+    def _iterate(self):
+        for chunk in self.chunks:
+            yield chunk
+        if self.stall:
+            self.stall.wait(5)
+
+@pytest.fixture
+def manager():
+    return AIManager()
+
+def use_model(manager, model):
+    manager.providers['gemini'] = {'available': True, 'client': model}
+    return model
+
+def test_gemini_stream_yields_the_text_chunks(manager):
+    model = use_model(manager, StubModel([Chunk("Olá"), Chunk(None), Chunk(""), Chunk(" mundo")]))
+    assert list(manager._stream_with_gemini("prompt", 100)) == ["Olá", " mundo"]
+    assert model.calls == [{"contents": "prompt", "stream": True}]
+
+def test_gemini_stream_raises_when_the_deadline_expires(manager, monkeypatch):
+    stall = threading.Event()
+    use_model(manager, StubModel([Chunk("Olá")], stall=stall))
+    monkeypatch.setattr(ai_manager_module.http_client, "timeouts", {"gemini_stream": 0.2})
+    received = []
+    start = time.monotonic()
+    try:
+        with pytest.raises(TimeoutError):
+            for chunk in manager._stream_with_gemini("prompt", 100):
+                received.append(chunk)
+    finally:
+        stall.set()
+    assert received == ["Olá"]
+    assert time.monotonic() - start < 2
+
+def test_gemini_stream_raises_the_sdk_error(manager, monkeypatch):
+    throttled = []
+    monkeypatch.setattr(ai_manager_module.rate_limiter, "throttle", throttled.append)
+    use_model(manager, StubModel(error=google_exceptions.ResourceExhausted("quota")))
+    with pytest.raises(google_exceptions.ResourceExhausted):
+        list(manager._stream_with_gemini("prompt", 100))
+    assert throttled == ["gemini"]
+
+def test_stream_with_fallback_uses_gemini_without_tripping_its_breaker(manager, monkeypatch):
+    manager.hedging_enabled = False
+    monkeypatch.setattr(manager, "_acquire", lambda provider: True)
+    use_model(manager, StubModel([Chunk("relatório")]))
+    stream = manager.generate_analysis_stream("prompt único para este teste", 100)
+    assert "".join(stream) == "relatório"
+    assert stream.provider == "gemini"
+    assert manager.breakers['gemini'].state == "closed"
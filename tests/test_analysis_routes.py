@@ -0,0 +1,110 @@
+# Ficheiro: tests/test_analysis_routes.py
+
+import json
+
+def test_async_analysis_returns_202_with_location(client):
+    response = client.post('/api/analyze?async=true', json={'segmento': 'Padarias'})
+    assert response.status_code == 202
+    body = response.get_json()
+    assert response.headers['Location'].endswith(body['status_url'])
+    assert body['status_url'] == f"/api/analyze/{body['job_id']}"
+    assert body['events_url'] == f"/api/analyze/{body['job_id']}/events"
+
+def test_async_flag_in_body_and_polling(client):
+    body = client.post('/api/analyze', json={'segmento': 'Padarias', 'async': True}).get_json()
+    snapshot = client.get(body['status_url']).get_json()
+    assert snapshot['status'] == 'completed'
+    assert snapshot['result']['segmento'] == 'Padarias'
+    assert snapshot['progress']['phases']['psychological_analysis']['status'] == 'completed'
+
+def test_unknown_job_returns_404(client):
+    assert client.get('/api/analyze/inexistente').status_code == 404
+
+def test_segmento_is_required(client):
+    assert client.post('/api/analyze?async=true', json={'produto': 'Pão'}).status_code == 400
+
+def _parse_sse(text):
+    """Converte o corpo de um stream SSE numa lista de (id, evento)."""
+    events = []
+    for block in text.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if ": " in line and not line.startswith(":"))
+        if "event" in fields:
+            events.append((int(fields["id"]), fields["event"]))
+    return events
+
+def test_events_stream_replays_the_job_history(client):
+    body = client.post('/api/analyze?async=true', json={'segmento': 'Padarias'}).get_json()
+    response = client.get(body['events_url'])
+    assert response.mimetype == 'text/event-stream'
+    text = response.get_data(as_text=True)
+    assert _parse_sse(text) == [(1, 'phase'), (2, 'phase'), (3, 'done')]
+    assert '"segmento": "Padarias"' in text
+
+def test_events_stream_resumes_after_last_event_id(client):
+    body = client.post('/api/analyze?async=true', json={'segmento': 'Padarias'}).get_json()
+    response = client.get(body['events_url'], headers={'Last-Event-ID': '2'})
+    assert _parse_sse(response.get_data(as_text=True)) == [(3, 'done')]
+
+def test_events_stream_for_unknown_job_returns_404(client):
+    assert client.get('/api/analyze/inexistente/events').status_code == 404
+
+def test_recent_identical_analysis_is_reused(client, analysis_routes, monkeypatch):
+    lookups = []
+
+    def find(input_hash):
+        lookups.append(input_hash)
+        return {"segmento": "guardado", "reused": True}
+
+    monkeypatch.setattr(analysis_routes, "_find_reusable_analysis", find)
+    for query in ("", "?async=true"):
+        response = client.post(f"/api/analyze{query}", json={"segmento": "Padarias"})
+        assert response.status_code == 200
+        assert response.get_json() == {"segmento": "guardado", "reused": True}
+    # O hash ignora o modo assíncrono
+    assert lookups[0] == lookups[1]
+
+def test_force_refresh_skips_the_stored_analysis(client, analysis_routes, monkeypatch):
+    monkeypatch.setattr(analysis_routes, "_find_reusable_analysis", lambda input_hash: {"reused": True})
+    response = client.post("/api/analyze?async=true", json={"segmento": "Padarias", "force_refresh": True})
+    assert response.status_code == 202
+
+def test_find_reusable_analysis_marks_the_stored_record(monkeypatch):
+    from routes import analysis
+
+    record = {"id": 7, "created_at": "2024-01-01T00:00:00", "comprehensive_analysis": {"relatorio": "x"}}
+    monkeypatch.setattr(analysis.db_manager, "find_recent_analysis_by_hash", lambda input_hash, window: record)
+    assert analysis._find_reusable_analysis("hash") == {
+        "relatorio": "x", "database_id": 7, "reused": True, "reused_created_at": "2024-01-01T00:00:00"
+    }
+    assert record["comprehensive_analysis"] == {"relatorio": "x"}
+
+def test_batch_requires_a_list_of_items_with_segmento(client, shared_search):
+    assert client.post('/api/analyze/batch', json={}).status_code == 400
+    assert client.post('/api/analyze/batch', json={'items': []}).status_code == 400
+    response = client.post('/api/analyze/batch', json={'items': [{'segmento': 'Padarias'}, {'produto': 'Pão'}]})
+    assert response.status_code == 400
+    assert response.get_json()['invalid_items'] == [1]
+
+def test_batch_returns_202_and_the_results_when_polled(client, shared_search):
+    response = client.post('/api/analyze/batch', json={'items': [{'segmento': 'Padarias'}, {'segmento': 'Talhos'}]})
+    assert response.status_code == 202
+    body = response.get_json()
+    assert body['items'] == 2
+    assert response.headers['Location'].endswith(body['status_url'])
+
+    snapshot = client.get(body['status_url']).get_json()
+    assert snapshot['status'] == 'completed'
+    assert [r['result']['segmento'] for r in snapshot['result']['resultados']] == ['Padarias', 'Talhos']
+    assert set(snapshot['progress']['phases']) == {'shared_search', 'analyses'}
+
+def test_batch_stream_sends_one_line_per_item_and_the_results_at_the_end(client, shared_search):
+    response = client.post('/api/analyze/batch?stream=true', json={'items': [{'segmento': 'Padarias'}, {'segmento': 'Talhos'}]})
+    assert response.mimetype == 'application/x-ndjson'
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines() if line.strip()]
+
+    items = [line for line in lines if line['event'] == 'batch_item']
+    assert sorted(line['index'] for line in items) == [0, 1]
+    assert all('result' not in line for line in items)
+    done = lines[-1]
+    assert done['event'] == 'done' and done['status'] == 'completed'
+    assert [r['result']['segmento'] for r in done['summary']['resultados']] == ['Padarias', 'Talhos']
@@ -0,0 +1,67 @@
+# Ficheiro: tests/test_batch_analysis.py
+
+import threading
+
+from services.admission_controller import AdmissionController
+from services.batch_analysis import BatchAnalysisService
+from services.request_hash import analysis_input_hash
+
+def test_each_analysis_takes_its_own_admission_slot(shared_search):
+    admission = AdmissionController("teste", max_concurrent=1, max_queue=0)
+    service = BatchAnalysisService(llm_concurrency=3, admission=admission)
+    running, peak = [0], [0]
+    lock = threading.Lock()
+
+    def run_item(item, web_context):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        threading.Event().wait(0.05)
+        with lock:
+            running[0] -= 1
+        return {"segmento": item["segmento"]}, 200
+
+    summary, status_code = service.run([{"segmento": s} for s in ("a", "b", "c")], run_item)
+    assert status_code == 200
+    # O lote não passa o limite de análises em simultâneo do controlador
+    assert peak[0] == 1
+    stats = admission.stats()
+    assert stats["admitted"] == 3
+    assert stats["active"] == 0
+
+def test_identical_items_are_analysed_once_and_stored_analyses_reused(shared_search):
+    service = BatchAnalysisService()
+    analysed, events = [], []
+
+    def run_item(item, web_context):
+        analysed.append(item["segmento"])
+        return {"segmento": item["segmento"]}, 200
+
+    stored = {"segmento": "guardado"}
+    items = [{"segmento": "Padarias"}, {"segmento": "padarias "}, {"segmento": "Talhos"}, {"segmento": "Floristas"}]
+    summary, status_code = service.run(
+        items, run_item,
+        find_reusable=lambda input_hash: stored if input_hash == analysis_input_hash({"segmento": "Floristas"}) else None,
+        progress_callback=lambda event, data: events.append((event, data))
+    )
+
+    assert status_code == 200
+    assert sorted(analysed) == ["Padarias", "Talhos"]
+    assert sorted(shared_search) == ["consulta Padarias", "consulta Talhos"]
+    assert (summary["total"], summary["analisados"], summary["reutilizados"], summary["duplicados"]) == (4, 2, 1, 1)
+    assert [r["result"] for r in summary["resultados"]] == [
+        {"segmento": "Padarias"}, {"segmento": "Padarias"}, {"segmento": "Talhos"}, stored
+    ]
+    # Os eventos só anunciam o item; o resultado segue no resumo
+    items_done = [data for event, data in events if event == "batch_item"]
+    assert sorted(data["index"] for data in items_done) == [0, 1, 2, 3]
+    assert all(set(data) == {"index", "status_code"} for data in items_done)
+
+def test_a_batch_where_every_analysis_fails_returns_500(shared_search):
+    def run_item(item, web_context):
+        raise RuntimeError("boom")
+
+    summary, status_code = BatchAnalysisService().run([{"segmento": "a"}, {"segmento": "b"}], run_item)
+    assert status_code == 500
+    assert summary["falhados"] == 2
+    assert summary["resultados"][0]["status_code"] == 500
@@ -0,0 +1,113 @@
+# Ficheiro: tests/test_cache.py
+
+import pytest
+
+from services import cache as cache_module
+from services.cache import MemoCache, MemoryCacheBackend, SQLiteCacheBackend, TTLCache, create_cache, normalize_text
+
+class FakeTime:
+    """Substitui o módulo time da cache, para avançar o relógio à mão."""
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def time(self) -> float:
+        self.now += 0.001
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeTime()
+    monkeypatch.setattr(cache_module, "time", fake)
+    return fake
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path, clock):
+    if request.param == "memory":
+        return MemoryCacheBackend(max_entries=3)
+    return SQLiteCacheBackend(str(tmp_path / "teste.sqlite3"), max_entries=3)
+
+def test_normalize_text():
+    assert normalize_text("  Marketing   DIGITÁL ") == "marketing digital"
+    assert normalize_text(None) == ""
+
+def test_entries_expire_after_ttl(backend, clock):
+    backend.set("k", "v", ttl=10)
+    assert backend.get("k") == "v"
+    clock.now += 11
+    assert backend.get("k") is None
+
+def test_least_recently_used_entry_is_evicted(backend):
+    for key in ("a", "b", "c"):
+        backend.set(key, key, ttl=60)
+    assert backend.get("a") == "a"
+    backend.set("d", "d", ttl=60)
+    assert backend.get("b") is None
+    assert [backend.get(key) for key in ("a", "c", "d")] == ["a", "c", "d"]
+    assert backend.size() == 3
+
+def test_delete(backend):
+    backend.set("k", "v", ttl=60)
+    backend.delete("k")
+    assert backend.get("k") is None
+
+def test_sqlite_evicts_by_total_size(tmp_path, clock):
+    backend = SQLiteCacheBackend(str(tmp_path / "teste.sqlite3"), max_entries=100, max_bytes=25)
+    for key in ("a", "b", "c"):
+        backend.set(key, "x" * 10, ttl=60)
+    assert backend.get("a") is None
+    assert backend.get("b") and backend.get("c")
+
+def test_sqlite_is_shared_between_instances(tmp_path, clock):
+    path = str(tmp_path / "teste.sqlite3")
+    SQLiteCacheBackend(path).set("k", "v", ttl=60)
+    assert SQLiteCacheBackend(path).get("k") == "v"
+
+def test_ttl_cache_returns_independent_copies_and_counts_hits():
+    cache = TTLCache("teste", MemoryCacheBackend(), ttl=60)
+    cache.set("k", {"resultados": [1, 2]})
+    first = cache.get("k")
+    first["resultados"].append(3)
+    assert cache.get("k") == {"resultados": [1, 2]}
+    assert cache.get("outra") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (2, 1, 0.667)
+
+def test_ttl_cache_ignores_unserializable_values_and_zero_ttl():
+    cache = TTLCache("teste", MemoryCacheBackend(), ttl=60)
+    cache.set("k", {"objeto": object()})
+    assert cache.get("k") is None
+    disabled = TTLCache("teste", MemoryCacheBackend(), ttl=0)
+    disabled.set("k", 1)
+    assert disabled.get("k") is None
+
+def test_create_cache_falls_back_to_memory(monkeypatch, tmp_path):
+    monkeypatch.setattr(cache_module.Config, "CACHE_DIR", str(tmp_path))
+    assert create_cache("teste", ttl=60, backend="sqlite").backend.name == "sqlite"
+    blocker = tmp_path / "ficheiro"
+    blocker.write_text("")
+    monkeypatch.setattr(cache_module.Config, "CACHE_DIR", str(blocker))
+    assert create_cache("teste", ttl=60, backend="sqlite").backend.name == "memory"
+
+def test_memo_cache_returns_the_stored_object_and_evicts_the_oldest():
+    memo = MemoCache("teste", max_entries=2)
+    calls = []
+
+    def compute(value):
+        calls.append(value)
+        return {"valor": value}
+
+    first = memo.get_or_compute("a", lambda: compute("a"))
+    assert memo.get_or_compute("a", lambda: compute("a")) is first
+    memo.get_or_compute("b", lambda: compute("b"))
+    memo.get_or_compute("a", lambda: compute("a"))
+    memo.get_or_compute("c", lambda: compute("c"))
+    # "b" era a entrada menos usada recentemente
+    memo.get_or_compute("b", lambda: compute("b"))
+    assert calls == ["a", "b", "c", "b"]
+    assert memo.stats()["hits"] == 2
+    assert memo.stats()["entries"] == 2
+
+def test_disabled_memo_cache_always_computes():
+    memo = MemoCache("teste", max_entries=0)
+    assert memo.get_or_compute("a", lambda: object()) is not memo.get_or_compute("a", lambda: object())
+    assert memo.stats()["entries"] == 0
@@ -0,0 +1,101 @@
+# Ficheiro: tests/test_circuit_breaker.py
+
+import pytest
+
+from services import circuit_breaker
+from services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+class FakeClock:
+    """Substitui o módulo time do disjuntor, para avançar o relógio à mão."""
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(circuit_breaker, "time", fake)
+    return fake
+
+def make_breaker(**kwargs) -> CircuitBreaker:
+    params = dict(window_seconds=60, min_calls=4, failure_rate=0.5, open_seconds=30)
+    params.update(kwargs)
+    return CircuitBreaker("teste", **params)
+
+def test_opens_when_failure_rate_is_reached(clock):
+    breaker = make_breaker()
+    breaker.record_success()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.allow_request() is False
+    assert breaker.stats()["rejected"] == 1
+
+def test_needs_min_calls_before_opening(clock):
+    breaker = make_breaker()
+    for _ in range(3):
+        breaker.record_failure()
+    assert breaker.state == CLOSED
+
+def test_old_calls_leave_the_window(clock):
+    breaker = make_breaker()
+    breaker.record_failure()
+    breaker.record_failure()
+    clock.now += 61
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+
+def test_slow_calls_open_the_breaker(clock):
+    breaker = make_breaker(slow_call_seconds=5, slow_call_rate=0.75)
+    for _ in range(4):
+        breaker.record_success(duration=10)
+    assert breaker.state == OPEN
+
+def test_half_open_allows_a_single_probe(clock):
+    breaker = make_breaker()
+    for _ in range(4):
+        breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow_request() is True
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow_request() is False
+
+def test_successful_probe_closes_the_breaker(clock):
+    breaker = make_breaker()
+    for _ in range(4):
+        breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.allow_request()
+
+def test_failed_probe_reopens_the_breaker(clock):
+    breaker = make_breaker()
+    for _ in range(4):
+        breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.stats()["times_opened"] == 2
+
+def test_released_probe_lets_the_next_request_through(clock):
+    breaker = make_breaker()
+    for _ in range(4):
+        breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow_request()
+    breaker.release()
+    assert breaker.allow_request()
+
+def test_disabled_breaker_always_allows(clock):
+    breaker = make_breaker(enabled=False)
+    for _ in range(10):
+        breaker.record_failure()
+    assert breaker.allow_request()
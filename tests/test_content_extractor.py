@@ -0,0 +1,78 @@
+# Ficheiro: tests/test_content_extractor.py
+
+import time
+
+import pytest
+import requests
+
+from services import content_extractor as extractor_module
+from services.cache import MemoryCacheBackend, TTLCache
+from services.content_extractor import ContentExtractor
+
+HTML = ("<html><body><main><p>" + "Uma frase longa sobre padarias artesanais e o seu mercado. " * 10 + "</p></main></body></html>").encode()
+
+class FakeResponse:
+    def __init__(self, status_code=200, headers=None, content=HTML):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.content = content
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code}")
+
+@pytest.fixture
+def extractor(monkeypatch):
+    monkeypatch.setattr(extractor_module.async_runtime, "enabled", False)
+    instance = ContentExtractor()
+    instance.page_cache = TTLCache("teste", MemoryCacheBackend(), ttl=3600)
+    instance.page_cache_fresh_ttl = 60
+    instance._allow = lambda strategy: True
+    return instance
+
+def fake_http(monkeypatch, responses):
+    """Responde a cada pedido com a resposta do 'provider' e regista os pedidos feitos."""
+    calls = []
+
+    def get(url, provider, **kwargs):
+        calls.append((provider, kwargs.get("headers") or {}))
+        return responses[provider]
+
+    monkeypatch.setattr(extractor_module.http_client, "get", get)
+    return calls
+
+def age_entry(extractor, url):
+    entry = extractor.page_cache.get(url)
+    entry["fetched_at"] = time.time() - 61
+    extractor.page_cache.set(url, entry)
+
+def test_fresh_pages_are_served_from_cache(extractor, monkeypatch):
+    extractor.scrapingant_key = "chave"
+    calls = fake_http(monkeypatch, {"scrapingant_extract": FakeResponse()})
+    first = extractor.extract_content("https://a.com/artigo")
+    assert extractor.extract_content("https://a.com/artigo") == first
+    assert len(calls) == 1
+
+def test_stale_direct_pages_are_revalidated_with_a_conditional_get(extractor, monkeypatch):
+    extractor.scrapingant_key = None
+    calls = fake_http(monkeypatch, {"direct": FakeResponse(headers={"ETag": '"v1"'})})
+    text = extractor.extract_content("https://a.com/artigo")
+    age_entry(extractor, "https://a.com/artigo")
+
+    calls = fake_http(monkeypatch, {"direct": FakeResponse(status_code=304, content=b"")})
+    assert extractor.extract_content("https://a.com/artigo") == text
+    assert calls[0][1]["If-None-Match"] == '"v1"'
+    # A revalidação renova a frescura da entrada
+    assert extractor.page_cache.get("https://a.com/artigo")["fetched_at"] > time.time() - 5
+
+def test_stale_scrapingant_pages_are_fetched_again_in_full(extractor, monkeypatch):
+    extractor.scrapingant_key = "chave"
+    fake_http(monkeypatch, {"scrapingant_extract": FakeResponse(headers={"ETag": '"da-api"'})})
+    extractor.extract_content("https://a.com/artigo")
+    entry = extractor.page_cache.get("https://a.com/artigo")
+    assert entry["etag"] is None and entry["last_modified"] is None
+
+    age_entry(extractor, "https://a.com/artigo")
+    calls = fake_http(monkeypatch, {"scrapingant_extract": FakeResponse()})
+    assert extractor.extract_content("https://a.com/artigo")
+    assert [provider for provider, _ in calls] == ["scrapingant_extract"]
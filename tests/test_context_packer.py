@@ -0,0 +1,55 @@
+# Ficheiro: tests/test_context_packer.py
+
+from services.context_packer import BM25Index, ContextPacker, Passage, estimate_tokens, tokenize
+
+def source(n, content):
+    return {"title": f"Fonte {n}", "url": f"https://exemplo.com/{n}", "content": content}
+
+def test_tokenize_drops_accents_stopwords_and_short_words():
+    assert tokenize("O mercado de Padarias é enorme na região") == ["mercado", "padarias", "enorme", "regiao"]
+
+def test_bm25_ranks_the_passage_with_the_query_terms_first():
+    passages = [
+        Passage("clima chuvoso e frio no inverno", 0, 0),
+        Passage("padarias artesanais crescem no mercado de padarias", 1, 0),
+        Passage("mercado financeiro em alta", 2, 0),
+    ]
+    scores = BM25Index(passages).scores(tokenize("padarias mercado"))
+    assert scores.index(max(scores)) == 1
+    assert scores[0] == 0
+
+def test_long_lines_are_split_into_passages_within_the_size_limit():
+    packer = ContextPacker(passage_chars=100)
+    text = " ".join(f"Frase numero {i} sobre o mercado." for i in range(20))
+    passages = packer.split_passages(text, 0)
+    assert len(passages) > 1
+    assert all(len(p.text) <= 100 for p in passages)
+    assert [p.position for p in passages] == list(range(len(passages)))
+
+def test_selection_respects_the_token_budget_and_keeps_source_order():
+    passage = "padarias artesanais no mercado portugues"
+    packer = ContextPacker(token_budget=estimate_tokens(passage) * 2, duplicate_threshold=1.1)
+    sources = [source(0, "clima chuvoso no inverno"), source(1, passage), source(2, passage.replace("portugues", "local"))]
+    selected, total = packer.select_passages("padarias mercado", sources)
+    assert total == 3
+    assert [p.source_index for p in selected] == [1, 2]
+    assert sum(p.tokens for p in selected) <= packer.token_budget
+
+def test_near_duplicate_passages_are_dropped():
+    packer = ContextPacker(token_budget=10000)
+    text = "padarias artesanais crescem no mercado portugues este ano"
+    selected, _ = packer.select_passages("padarias", [source(0, text), source(1, text + " agora")])
+    assert [p.source_index for p in selected] == [0]
+
+def test_pack_groups_passages_by_source_with_attribution():
+    packer = ContextPacker(token_budget=10000)
+    context, stats = packer.pack("padarias", [source(0, "padarias artesanais"), source(1, "")])
+    assert "URL: https://exemplo.com/0" in context
+    assert "exemplo.com/1" not in context
+    assert stats["fontes_usadas"] == 1
+    assert stats["trechos_selecionados"] == stats["trechos_disponiveis"] == 1
+
+def test_no_content_gives_an_empty_context():
+    context, stats = ContextPacker().pack("padarias", [source(0, "")])
+    assert context == ""
+    assert stats["trechos_disponiveis"] == 0
@@ -0,0 +1,113 @@
+# Ficheiro: tests/test_deep_search_service.py
+
+import threading
+import time
+
+import pytest
+
+from services import deep_search_service as deep_search_module
+from services.deep_search_service import NO_RESULTS_MESSAGE, DeepSearchService
+
+def page(n: int) -> str:
+    """Texto substancial e diferente para cada página."""
+    return f"Página {n}: " + " ".join(f"termo{n}x{i}" for i in range(40))
+
+def results(n: int):
+    return [{"title": f"Fonte {i}", "url": f"https://site{i}.com/artigo", "snippet": ""} for i in range(n)]
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(deep_search_module.async_runtime, "enabled", False)
+    monkeypatch.setattr(deep_search_module.context_packer, "token_budget", 0)
+    search = DeepSearchService()
+    search.deduplicate = False
+    search.deadline_seconds = 5
+    return search
+
+def fake_extractor(monkeypatch, content_for):
+    calls = []
+
+    def extract(url):
+        calls.append(url)
+        return content_for(url)
+
+    monkeypatch.setattr(deep_search_module.content_extractor, "extract_content", extract)
+    return calls
+
+def test_stops_once_the_target_number_of_pages_is_reached(service, monkeypatch):
+    service.max_workers = 1
+    service.target_pages = 2
+    calls = fake_extractor(monkeypatch, lambda url: (time.sleep(0.05), page(int(url[len("https://site")])))[1])
+    pages = service._extract_pages(results(6), time.monotonic() + 5, None)
+    assert sorted(pages) == [0, 1]
+    # No máximo uma extração a mais pode ter começado antes de a paragem ser pedida
+    assert len(calls) <= 3
+
+def test_short_or_failed_pages_do_not_count(service, monkeypatch):
+    service.target_pages = 2
+
+    def content_for(url):
+        rank = int(url[len("https://site")])
+        if rank == 0:
+            raise RuntimeError("timeout")
+        return "curto" if rank == 1 else page(rank)
+
+    fake_extractor(monkeypatch, content_for)
+    pages = service._extract_pages(results(4), time.monotonic() + 5, None)
+    assert sorted(pages) == [2, 3]
+
+def test_deadline_returns_the_pages_already_extracted(service, monkeypatch):
+    service.target_pages = 0
+    release = threading.Event()
+
+    def content_for(url):
+        if "site1" in url:
+            release.wait(5)
+        return page(int(url[len("https://site")]))
+
+    fake_extractor(monkeypatch, content_for)
+    start = time.monotonic()
+    try:
+        pages = service._extract_pages(results(3), time.monotonic() + 0.2, None)
+    finally:
+        release.set()
+    assert sorted(pages) == [0, 2]
+    assert time.monotonic() - start < 2
+
+def test_context_follows_the_search_ranking(service, monkeypatch):
+    service.target_pages = 0
+    monkeypatch.setattr(deep_search_module.search_manager, "multi_search", lambda query, max_results: results(3))
+
+    def content_for(url):
+        # A primeira fonte é a mais lenta, mas continua a aparecer primeiro
+        if "site0" in url:
+            time.sleep(0.05)
+        return page(int(url[len("https://site")]))
+
+    fake_extractor(monkeypatch, content_for)
+    events = []
+    context = service.perform_deep_search("padarias", {}, progress_callback=lambda event, data: events.append(event))
+    assert context.index("Fonte 0") < context.index("Fonte 1") < context.index("Fonte 2")
+    assert "Páginas com Conteúdo Relevante Extraído: 3" in context
+    assert events.count("page_extracted") == 3 and events[0] == "search_results"
+
+def test_no_search_results(service, monkeypatch):
+    monkeypatch.setattr(deep_search_module.search_manager, "multi_search", lambda query, max_results: [])
+    assert service.perform_deep_search("padarias", {}) == NO_RESULTS_MESSAGE
+
+def test_results_with_near_duplicate_snippets_are_dropped(service):
+    snippet = "O mercado de padarias artesanais cresceu este ano em Lisboa e no Porto com pão de fermentação lenta."
+    search_results = results(3)
+    search_results[0]["snippet"] = snippet
+    search_results[1]["snippet"] = snippet.upper()
+    search_results[2]["snippet"] = "Curto demais para comparar."
+    assert service._drop_duplicate_snippets(search_results) == [search_results[0], search_results[2]]
+
+def test_near_duplicate_pages_do_not_count_towards_the_target(service, monkeypatch):
+    service.deduplicate = True
+    service.max_workers = 1
+    service.target_pages = 2
+    # O site1 é um espelho do site0
+    fake_extractor(monkeypatch, lambda url: page(0) if "site1" in url else page(int(url[len("https://site")])))
+    pages = service._extract_pages(results(3), time.monotonic() + 5, None)
+    assert sorted(pages) == [0, 2]
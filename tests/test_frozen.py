@@ -0,0 +1,58 @@
+# Ficheiro: tests/test_frozen.py
+
+import copy
+import json
+import pickle
+
+import pytest
+
+from services.frozen import FrozenDict, FrozenList, freeze, thaw
+
+ANALYSIS = {"drivers": [{"nome": "Urgência", "gatilhos": ["prazo"]}], "total": 1}
+
+def test_freeze_is_recursive():
+    frozen = freeze(ANALYSIS)
+    assert isinstance(frozen, FrozenDict)
+    assert isinstance(frozen["drivers"], FrozenList)
+    assert isinstance(frozen["drivers"][0], FrozenDict)
+    assert frozen == ANALYSIS
+
+@pytest.mark.parametrize("mutate", [
+    lambda d: d.__setitem__("total", 2),
+    lambda d: d.__delitem__("total"),
+    lambda d: d.update(total=2),
+    lambda d: d.setdefault("novo", 1),
+    lambda d: d.pop("total"),
+    lambda d: d.clear(),
+    lambda d: d["drivers"].append({}),
+    lambda d: d["drivers"][0]["gatilhos"].sort(),
+    lambda d: d["drivers"][0].__setitem__("nome", "Outro"),
+])
+def test_mutations_raise_type_error(mutate):
+    frozen = freeze(ANALYSIS)
+    with pytest.raises(TypeError):
+        mutate(frozen)
+    assert frozen == ANALYSIS
+
+def test_in_place_operators_raise_type_error():
+    frozen = freeze(ANALYSIS)
+    with pytest.raises(TypeError):
+        frozen |= {"total": 2}
+    drivers = frozen["drivers"]
+    with pytest.raises(TypeError):
+        drivers += [{}]
+
+def test_copies_are_mutable():
+    frozen = freeze(ANALYSIS)
+    deep = copy.deepcopy(frozen)
+    deep["drivers"][0]["gatilhos"].append("escassez")
+    assert type(deep) is dict and type(deep["drivers"]) is list
+    assert frozen["drivers"][0]["gatilhos"] == ["prazo"]
+    assert type(copy.copy(frozen)) is dict
+    assert thaw(frozen) == ANALYSIS
+
+def test_still_behaves_as_a_dict():
+    frozen = freeze(ANALYSIS)
+    assert isinstance(frozen, dict)
+    assert json.loads(json.dumps(frozen)) == ANALYSIS
+    assert pickle.loads(pickle.dumps(frozen)) == frozen
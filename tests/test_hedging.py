@@ -0,0 +1,41 @@
+# Ficheiro: tests/test_hedging.py
+
+from services.hedging import HedgingPolicy
+
+def test_default_delay_until_there_are_enough_samples():
+    policy = HedgingPolicy("teste", min_delay=1.0, default_delay=30.0, min_samples=5)
+    for _ in range(4):
+        policy.record_latency(2.0)
+    assert policy.delay() == 30.0
+
+def test_delay_is_the_configured_percentile_of_recent_latencies():
+    policy = HedgingPolicy("teste", percentile=90, min_delay=0.0, min_samples=10)
+    for seconds in range(1, 11):
+        policy.record_latency(float(seconds))
+    assert policy.delay() == 9.0
+
+def test_delay_never_goes_below_the_minimum():
+    policy = HedgingPolicy("teste", min_delay=5.0, min_samples=1)
+    policy.record_latency(0.5)
+    assert policy.delay() == 5.0
+
+def test_only_the_most_recent_samples_are_kept():
+    policy = HedgingPolicy("teste", percentile=100, min_delay=0.0, min_samples=1, max_samples=3)
+    for seconds in (50.0, 1.0, 2.0, 3.0):
+        policy.record_latency(seconds)
+    assert policy.delay() == 3.0
+
+def test_stats_report_the_hedge_rate_and_winners():
+    policy = HedgingPolicy("teste", default_delay=10.0, min_delay=1.0)
+    for _ in range(4):
+        policy.record_request()
+    policy.record_hedge()
+    policy.record_win("huggingface")
+    assert policy.stats() == {
+        "hedge_delay": 10.0,
+        "samples": 0,
+        "requests": 4,
+        "hedged": 1,
+        "hedge_rate": 0.25,
+        "wins": {"huggingface": 1},
+    }
@@ -0,0 +1,121 @@
+# Ficheiro: tests/test_job_manager.py
+
+import threading
+import time
+
+from services.job_manager import JobManager
+
+from conftest import InlineExecutor
+
+class RecordingAdmission:
+    """Regista os pedidos de lugar feitos ao controlador de admissão."""
+    def __init__(self):
+        self.calls = []
+
+    def acquire(self, block=False):
+        self.calls.append(("acquire", block))
+
+    def release(self, duration=None):
+        self.calls.append(("release", duration is not None))
+
+def test_completed_job_keeps_result_and_progress(inline_job_manager):
+    job = inline_job_manager.submit(lambda payload, cb: ({"ok": payload["segmento"]}, 200), {"segmento": "a"})
+    snapshot = inline_job_manager.get_snapshot(job.id)
+    assert snapshot["status"] == "completed"
+    assert snapshot["result"] == {"ok": "a"}
+    assert snapshot["progress"]["percent"] == 100
+    assert inline_job_manager.get_snapshot(job.id, include_result=False).get("result") is None
+
+def test_pipeline_errors_fail_the_job(inline_job_manager):
+    failed = inline_job_manager.submit(lambda payload, cb: ({"error": "sem dados"}, 500), {})
+    assert inline_job_manager.get_snapshot(failed.id)["error"] == "sem dados"
+
+    def crash(payload, cb):
+        raise RuntimeError("boom")
+
+    crashed = inline_job_manager.submit(crash, {})
+    snapshot = inline_job_manager.get_snapshot(crashed.id)
+    assert snapshot["status"] == "failed"
+    assert "boom" not in snapshot["error"]
+
+def test_progress_events_update_phases(inline_job_manager):
+    def pipeline(payload, cb):
+        cb("phase", {"phase": "web_search", "status": "started"})
+        cb("phase", {"phase": "web_search", "status": "completed"})
+        return {}, 200
+
+    job = inline_job_manager.submit(pipeline, {})
+    phases = inline_job_manager.get_snapshot(job.id)["progress"]["phases"]
+    assert phases["web_search"]["status"] == "completed"
+    assert phases["psychological_analysis"] == {"status": "pending"}
+
+def test_identical_running_job_is_reused_and_queue_is_bounded():
+    manager = JobManager(max_workers=2, max_pending=2)
+    release = threading.Event()
+
+    def pipeline(payload, cb):
+        release.wait(5)
+        return {}, 200
+
+    try:
+        first = manager.submit(pipeline, {}, dedupe_key="k")
+        assert manager.submit(pipeline, {}, dedupe_key="k") is first
+        assert manager.submit(pipeline, {}, dedupe_key="outra") is not None
+        assert manager.submit(pipeline, {}, dedupe_key="terceira") is None
+    finally:
+        release.set()
+
+    events, finished = manager.wait_for_events(first.id, after_id=0, timeout=5)
+    while not finished:
+        events, finished = manager.wait_for_events(first.id, after_id=len(events), timeout=5)
+    assert manager.submit(pipeline, {}, dedupe_key="k") is not first
+
+def test_finished_jobs_expire_after_ttl(inline_job_manager):
+    inline_job_manager.result_ttl = 60
+    job = inline_job_manager.submit(lambda payload, cb: ({}, 200), {})
+    assert inline_job_manager.get_snapshot(job.id)
+    job.finished_at = time.time() - 61
+    assert inline_job_manager.get_snapshot(job.id) is None
+
+def test_wait_for_events(inline_job_manager):
+    job = inline_job_manager.submit(lambda payload, cb: (cb("page_extracted", {"url": "https://a.com"}), ({}, 200))[1], {})
+    events, finished = inline_job_manager.wait_for_events(job.id, after_id=0, timeout=0)
+    assert [event["event"] for event in events] == ["page_extracted", "done"]
+    assert finished
+    assert inline_job_manager.wait_for_events(job.id, after_id=2, timeout=0) == ([], True)
+    assert inline_job_manager.wait_for_events("inexistente", timeout=0) == (None, True)
+
+def test_chunk_events_are_dropped_when_the_job_finishes(inline_job_manager):
+    def pipeline(payload, cb):
+        cb("phase", {"phase": "report_generation", "status": "started"})
+        for _ in range(3):
+            cb("llm_chunk", {"text": "..."})
+        return {"relatorio": "ok"}, 200
+
+    job = inline_job_manager.submit(pipeline, {})
+    events, _ = inline_job_manager.wait_for_events(job.id, timeout=0)
+    assert [event["event"] for event in events] == ["phase", "done"]
+    # Os IDs continuam a contar os eventos descartados, para o Last-Event-ID
+    assert events[-1]["id"] == 5
+    assert events[-1]["data"] == {"status": "completed", "error": None, "result": {"relatorio": "ok"}}
+    assert "result" not in job.events[-1]["data"]
+
+def test_event_history_is_capped():
+    manager = JobManager(max_workers=1, max_events=3)
+    job = manager.submit(lambda payload, cb: ([cb("page_extracted", {"n": n}) for n in range(10)], ({}, 200))[1], {})
+    events, finished = manager.wait_for_events(job.id, timeout=5)
+    while not finished:
+        events, finished = manager.wait_for_events(job.id, timeout=5)
+    assert [event["id"] for event in events] == [9, 10, 11]
+    assert events[-1]["event"] == "done"
+
+def test_jobs_take_an_admission_slot_unless_submitted_with_admit_false():
+    admission = RecordingAdmission()
+    manager = JobManager(max_workers=1, max_pending=4, executor=InlineExecutor(), admission=admission)
+    manager.submit(lambda payload, cb: ({}, 200), {})
+    assert admission.calls == [("acquire", True), ("release", True)]
+
+    admission.calls.clear()
+    job = manager.submit(lambda payload, cb: ({}, 200), {}, admit=False)
+    assert admission.calls == []
+    assert manager.get_snapshot(job.id)["status"] == "completed"
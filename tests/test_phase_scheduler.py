@@ -0,0 +1,68 @@
+# Ficheiro: tests/test_phase_scheduler.py
+
+import threading
+import time
+
+import pytest
+
+from services.phase_scheduler import PhaseScheduler
+
+def test_dependencies_receive_their_results():
+    def phase(func):
+        # Cada fase demora o suficiente para os tempos (arredondados ao ms) ficarem ordenados
+        return lambda deps: (time.sleep(0.01), func(deps))[1]
+
+    scheduler = PhaseScheduler()
+    scheduler.add_phase("a", phase(lambda deps: 1))
+    scheduler.add_phase("b", phase(lambda deps: deps["a"] + 1), depends_on=["a"])
+    scheduler.add_phase("c", phase(lambda deps: deps["a"] + deps["b"]), depends_on=["a", "b"])
+    assert scheduler.run() == {"a": 1, "b": 2, "c": 3}
+    assert scheduler.critical_path() == ["a", "b", "c"]
+
+def test_independent_phases_run_concurrently():
+    barrier = threading.Barrier(2, timeout=5)
+    scheduler = PhaseScheduler(max_workers=2)
+    # Só terminam se correrem ao mesmo tempo
+    scheduler.add_phase("psicologica", lambda deps: barrier.wait())
+    scheduler.add_phase("pesquisa", lambda deps: barrier.wait())
+    assert set(scheduler.run()) == {"psicologica", "pesquisa"}
+
+def test_failed_required_phase_skips_dependents_and_is_raised():
+    ran = []
+
+    def fail(deps):
+        raise ValueError("falhou")
+
+    scheduler = PhaseScheduler()
+    scheduler.add_phase("a", fail)
+    scheduler.add_phase("b", lambda deps: ran.append("b"), depends_on=["a"])
+    scheduler.add_phase("c", lambda deps: ran.append("c"), depends_on=["b"])
+    scheduler.add_phase("d", lambda deps: ran.append("d"))
+    with pytest.raises(ValueError):
+        scheduler.run()
+    assert ran == ["d"]
+    assert scheduler.timings["a"]["status"] == "failed"
+    assert scheduler.timings["b"] == {"status": "skipped"}
+    assert scheduler.timings["c"] == {"status": "skipped"}
+
+def test_failed_optional_phase_yields_none():
+    def fail(deps):
+        raise RuntimeError("sem previsões")
+
+    scheduler = PhaseScheduler()
+    scheduler.add_phase("previsao", fail, optional=True)
+    scheduler.add_phase("relatorio", lambda deps: deps["previsao"] is None, depends_on=["previsao"])
+    assert scheduler.run() == {"previsao": None, "relatorio": True}
+
+def test_unknown_dependency_is_rejected():
+    with pytest.raises(ValueError):
+        PhaseScheduler().add_phase("b", lambda deps: None, depends_on=["a"])
+
+def test_execution_metadata():
+    scheduler = PhaseScheduler()
+    scheduler.add_phase("a", lambda deps: time.sleep(0.01))
+    scheduler.run()
+    metadata = scheduler.execution_metadata()
+    assert metadata["caminho_critico"] == ["a"]
+    assert metadata["fases"]["a"]["status"] == "completed"
+    assert metadata["duracao_total_s"] >= 0.01
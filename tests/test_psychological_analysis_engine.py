@@ -0,0 +1,36 @@
+# Ficheiro: tests/test_psychological_analysis_engine.py
+
+import copy
+
+import pytest
+
+from services.cache import MemoCache
+from services.frozen import FrozenDict
+from services.psychological_analysis_engine import PsychologicalAnalysisEngine
+
+@pytest.fixture
+def engine():
+    engine = PsychologicalAnalysisEngine()
+    engine.analysis_cache = MemoCache("teste", max_entries=8)
+    return engine
+
+def test_identical_inputs_share_one_frozen_analysis(engine):
+    first = engine.generate_comprehensive_psychological_analysis({"segmento": "Padarias", "produto": "Curso", "preco": 997})
+    second = engine.generate_comprehensive_psychological_analysis(
+        {"segmento": "padarias ", "produto": "Curso", "preco": 997, "outro_campo": "ignorado"}
+    )
+    assert second is first
+    assert isinstance(first, FrozenDict)
+    assert engine.analysis_cache.stats()["hits"] == 1
+
+def test_the_product_is_part_of_the_key(engine):
+    first = engine.generate_comprehensive_psychological_analysis({"segmento": "Padarias", "produto": "Curso"})
+    assert engine.generate_comprehensive_psychological_analysis({"segmento": "Padarias", "produto": "Mentoria"}) is not first
+
+def test_shared_analysis_cannot_be_changed_but_copies_can(engine):
+    analysis = engine.generate_comprehensive_psychological_analysis({"segmento": "Padarias", "produto": "Curso"})
+    with pytest.raises(TypeError):
+        analysis["avatar_psicologico_profundo"] = {}
+    editable = copy.deepcopy(analysis)
+    editable["avatar_psicologico_profundo"] = {}
+    assert analysis["avatar_psicologico_profundo"] != {}
@@ -0,0 +1,72 @@
+# Ficheiro: tests/test_rate_limiter.py
+
+import pytest
+
+from services import rate_limiter as rate_limiter_module
+from services.rate_limiter import RateLimiter
+
+class FakeTime:
+    """Substitui o módulo time do limitador, para avançar o relógio à mão."""
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def time(self) -> float:
+        return self.now
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeTime()
+    monkeypatch.setattr(rate_limiter_module, "time", fake)
+    return fake
+
+def make_limiter(tmp_path, limits) -> RateLimiter:
+    return RateLimiter(str(tmp_path / "rate_limits.sqlite3"), limits, max_wait=0)
+
+def test_bucket_allows_bursts_up_to_capacity(tmp_path, clock):
+    limiter = make_limiter(tmp_path, {"p": {"per_minute": 2}})
+    assert limiter._try_acquire("p") == (True, 0.0, None)
+    assert limiter._try_acquire("p") == (True, 0.0, None)
+    allowed, wait, reason = limiter._try_acquire("p")
+    assert (allowed, reason) == (False, "rate")
+    assert wait == pytest.approx(30.0)
+
+def test_bucket_refills_over_time(tmp_path, clock):
+    limiter = make_limiter(tmp_path, {"p": {"per_minute": 2}})
+    limiter._try_acquire("p")
+    limiter._try_acquire("p")
+    clock.now += 15
+    allowed, wait, _ = limiter._try_acquire("p")
+    assert not allowed and wait == pytest.approx(15.0)
+    clock.now += 15
+    assert limiter._try_acquire("p")[0] is True
+
+def test_daily_quota_is_refused_without_waiting(tmp_path, clock):
+    limiter = make_limiter(tmp_path, {"p": {"daily": 2}})
+    assert limiter._try_acquire("p")[0]
+    assert limiter._try_acquire("p")[0]
+    assert limiter._try_acquire("p") == (False, 0.0, "quota")
+    assert limiter.acquire("p") is False
+
+def test_refused_token_does_not_consume_quota(tmp_path, clock):
+    limiter = make_limiter(tmp_path, {"p": {"per_minute": 1, "daily": 2}})
+    assert limiter._try_acquire("p")[0]
+    assert limiter._try_acquire("p")[2] == "rate"
+    clock.now += 60
+    assert limiter._try_acquire("p")[0]
+    assert limiter._try_acquire("p")[2] == "quota"
+
+def test_throttle_empties_the_bucket(tmp_path, clock):
+    limiter = make_limiter(tmp_path, {"p": {"per_minute": 60}})
+    limiter.throttle("p", retry_after=10)
+    allowed, wait, _ = limiter._try_acquire("p")
+    assert not allowed and wait == pytest.approx(11.0)
+
+def test_providers_without_limits_are_always_allowed(tmp_path, clock):
+    limiter = make_limiter(tmp_path, {"p": {"daily": 1}})
+    assert all(limiter.acquire("outro") for _ in range(5))
@@ -0,0 +1,25 @@
+# Ficheiro: tests/test_request_hash.py
+
+from services.request_hash import analysis_input_hash, normalize_payload
+
+def test_case_accents_and_spaces_do_not_change_the_hash():
+    a = {"segmento": "Padaria  Artesanal", "regiao": "São Paulo"}
+    b = {"segmento": "padaria artesanal", "regiao": "sao paulo "}
+    assert analysis_input_hash(a) == analysis_input_hash(b)
+
+def test_control_and_empty_fields_are_ignored():
+    base = {"segmento": "padaria"}
+    noisy = {"segmento": "padaria", "async": True, "force_refresh": True, "publico": "", "tags": []}
+    assert normalize_payload(noisy) == base
+    assert analysis_input_hash(noisy) == analysis_input_hash(base)
+
+def test_key_order_does_not_change_the_hash():
+    assert analysis_input_hash({"a": "1", "b": "2"}) == analysis_input_hash({"b": "2", "a": "1"})
+
+def test_different_inputs_have_different_hashes():
+    assert analysis_input_hash({"segmento": "padaria"}) != analysis_input_hash({"segmento": "talho"})
+
+def test_nested_values_are_normalized():
+    assert normalize_payload({"extra": {"Nome": " Ótica "}, "lista": ["Açaí"]}) == {
+        "extra": {"Nome": "otica"}, "lista": ["acai"]
+    }
@@ -0,0 +1,105 @@
+# Ficheiro: tests/test_search_manager.py
+
+import threading
+import time
+
+import pytest
+
+from services import search_manager as search_module
+from services.cache import MemoryCacheBackend, TTLCache
+from services.search_manager import SearchManager
+
+def hits(*names):
+    return [{"title": name, "url": f"https://{name}.com", "snippet": "", "source": "teste"} for name in names]
+
+@pytest.fixture
+def manager(monkeypatch):
+    monkeypatch.setattr(search_module.async_runtime, "enabled", False)
+    search = SearchManager()
+    search.cache.ttl = 0
+    release = threading.Event()
+    yield search, release
+    release.set()
+
+def fake_providers(search, behaviour, release):
+    """Substitui as chamadas aos provedores: 'behaviour' diz o que cada um devolve e se fica pendurado."""
+    calls = []
+
+    def search_provider(provider, query, num_results):
+        calls.append(provider)
+        results, hang = behaviour[provider]
+        if hang:
+            release.wait(5)
+        if isinstance(results, Exception):
+            raise results
+        return results
+
+    search._search_provider = search_provider
+    return calls
+
+def test_race_returns_without_waiting_for_slow_providers(manager):
+    search, release = manager
+    fake_providers(search, {
+        "jina": (hits("a", "b"), False),
+        "google_cse": (hits("b", "c"), False),
+        "scrapingant": (hits("d"), True),
+    }, release)
+    search.latency_budget = 5
+    start = time.monotonic()
+    results = search.multi_search("padarias", max_results=3, mode="race")
+    assert time.monotonic() - start < 1
+    assert sorted(result["url"] for result in results) == ["https://a.com", "https://b.com", "https://c.com"]
+
+def test_race_latency_budget_returns_partial_results(manager):
+    search, release = manager
+    fake_providers(search, {
+        "jina": (hits("a"), False),
+        "google_cse": (hits("b"), True),
+        "scrapingant": (hits("c"), True),
+    }, release)
+    search.latency_budget = 0.2
+    start = time.monotonic()
+    results = search.multi_search("padarias", max_results=3, mode="race")
+    assert time.monotonic() - start < 1
+    assert [result["url"] for result in results] == ["https://a.com"]
+
+def test_race_skips_failing_providers(manager):
+    search, release = manager
+    fake_providers(search, {
+        "jina": (RuntimeError("falhou"), False),
+        "google_cse": (hits("a"), False),
+        "scrapingant": (hits("b"), False),
+    }, release)
+    search.latency_budget = 5
+    results = search.multi_search("padarias", max_results=5, mode="race")
+    assert sorted(result["url"] for result in results) == ["https://a.com", "https://b.com"]
+
+def test_sequential_only_falls_back_when_results_are_missing(manager):
+    search, release = manager
+    calls = fake_providers(search, {
+        "jina": (hits("a", "b"), False),
+        "google_cse": (hits("c"), False),
+        "scrapingant": (hits("d"), False),
+    }, release)
+    assert len(search.multi_search("padarias", max_results=2, mode="sequential")) == 2
+    assert calls == ["jina"]
+
+def test_results_are_cached_by_normalized_query(manager):
+    search, release = manager
+    search.cache = TTLCache("teste", MemoryCacheBackend(), ttl=60)
+    calls = fake_providers(search, {
+        "jina": (hits("a"), False),
+        "google_cse": ([], False),
+        "scrapingant": ([], False),
+    }, release)
+    first = search.multi_search("Padarias  ARTESANAIS", max_results=1, mode="sequential")
+    assert search.multi_search("padarias artesanais", max_results=1, mode="sequential") == first
+    assert calls == ["jina"]
+
+def test_empty_results_are_not_cached(manager):
+    search, release = manager
+    search.cache = TTLCache("teste", MemoryCacheBackend(), ttl=60)
+    calls = fake_providers(search, {"jina": ([], False), "google_cse": ([], False), "scrapingant": ([], False)}, release)
+    search.multi_search("padarias", max_results=1, mode="sequential")
+    search.multi_search("padarias", max_results=1, mode="sequential")
+    assert calls.count("jina") == 2
@@ -0,0 +1,36 @@
+# Ficheiro: tests/test_segment_classifier.py
+
+from services.segment_classifier import SegmentClassifier
+
+KEYWORDS = {
+    "digital": ["e-commerce", "marketing digital", "loja"],
+    "servicos": ["consultoria", "empresa"],
+    "b2b": ["consultoria", "empresa de software"],
+}
+
+def test_accents_and_case_are_ignored():
+    classifier = SegmentClassifier(KEYWORDS)
+    assert classifier.classify("MARKETING DIGITÁL para pequenos negócios") == {"digital"}
+
+def test_optional_hyphens_and_spaces():
+    classifier = SegmentClassifier(KEYWORDS)
+    for text in ("e-commerce", "ecommerce", "e commerce"):
+        assert classifier.classify(text) == {"digital"}
+
+def test_keyword_may_prefix_a_word_but_not_end_one():
+    classifier = SegmentClassifier(KEYWORDS)
+    assert classifier.classify("lojas de roupa") == {"digital"}
+    assert classifier.classify("serviço empresarial") == {"servicos"}
+    assert classifier.classify("superloja") == frozenset()
+
+def test_keyword_shared_by_several_categories():
+    classifier = SegmentClassifier(KEYWORDS)
+    assert classifier.classify("consultoria financeira") == {"servicos", "b2b"}
+
+def test_longer_keyword_wins_over_its_prefix():
+    classifier = SegmentClassifier(KEYWORDS)
+    assert classifier.classify("empresa de software") == {"b2b"}
+
+def test_empty_text_or_keywords():
+    assert SegmentClassifier(KEYWORDS).classify("") == frozenset()
+    assert SegmentClassifier({}).classify("qualquer coisa") == frozenset()
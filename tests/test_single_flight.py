@@ -0,0 +1,78 @@
+# Ficheiro: tests/test_single_flight.py
+
+import threading
+import time
+
+import pytest
+
+from services.single_flight import SingleFlight
+
+def _wait_for_follower(flight: SingleFlight) -> None:
+    while flight.shared == 0:
+        time.sleep(0.01)
+
+def test_concurrent_calls_share_the_result():
+    flight = SingleFlight("teste")
+    release = threading.Event()
+    calls = []
+
+    def work():
+        calls.append(1)
+        release.wait(5)
+        return {"ok": True}
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do("k", work)))
+    leader.start()
+    while not calls:
+        time.sleep(0.01)
+    follower = threading.Thread(target=lambda: results.append(flight.do("k", work)))
+    follower.start()
+    _wait_for_follower(flight)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert calls == [1]
+    assert results[0] is results[1]
+
+def test_error_is_raised_to_every_waiter():
+    flight = SingleFlight("teste")
+    started, release = threading.Event(), threading.Event()
+
+    def work():
+        started.set()
+        release.wait(5)
+        raise ValueError("falhou")
+
+    errors = []
+
+    def call():
+        try:
+            flight.do("k", work)
+        except ValueError as e:
+            errors.append(e)
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait(5)
+    follower = threading.Thread(target=call)
+    follower.start()
+    _wait_for_follower(flight)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert len(errors) == 2
+    assert errors[0] is errors[1]
+
+def test_key_is_free_again_after_an_error():
+    flight = SingleFlight("teste")
+
+    def fail():
+        raise RuntimeError("falhou")
+
+    with pytest.raises(RuntimeError):
+        flight.do("k", fail)
+    assert flight.do("k", lambda: 42) == 42
+    assert flight.stats() == {"executions": 2, "shared": 0, "in_flight": 0}
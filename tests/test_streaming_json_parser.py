@@ -0,0 +1,33 @@
+# Ficheiro: tests/test_streaming_json_parser.py
+
+from services.streaming_json_parser import StreamingJSONParser, parse_llm_json
+
+def test_complete_json_is_not_repaired():
+    result, repaired = parse_llm_json('```json\n{"resumo": "ok", "itens": [1, 2]}\n```')
+    assert result == {"resumo": "ok", "itens": [1, 2]}
+    assert repaired is False
+
+def test_truncated_string_is_closed():
+    result, repaired = parse_llm_json('{"resumo": "completo", "analise": "texto cort')
+    assert result == {"resumo": "completo", "analise": "texto cort"}
+    assert repaired is True
+
+def test_truncated_list_keeps_only_complete_values():
+    # O último número pode estar incompleto ("2" de "25"), por isso é descartado
+    result, repaired = parse_llm_json('{"a": "b", "c": [1, 2')
+    assert result == {"a": "b", "c": [1]}
+    assert repaired is True
+
+def test_dangling_comma_is_dropped():
+    result, repaired = parse_llm_json('{"a": 1, "b": {"c": true},')
+    assert result == {"a": 1, "b": {"c": True}}
+    assert repaired is True
+
+def test_text_without_json_returns_none():
+    assert parse_llm_json('A IA não devolveu JSON.') == (None, False)
+
+def test_sections_are_emitted_as_they_close():
+    parser = StreamingJSONParser()
+    assert parser.feed('{"resumo": {"titulo": "A"}, "anal') == [("resumo", {"titulo": "A"})]
+    assert parser.feed('ise": [1]}') == [("analise", [1])]
+    assert parser.done
@@ -0,0 +1,35 @@
+# Ficheiro: tests/test_text_fingerprint.py
+
+from services.text_fingerprint import FingerprintIndex, hamming_distance, shingles, simhash
+
+ARTICLE = (
+    "O mercado de padarias artesanais cresceu este ano em Lisboa e no Porto, "
+    "impulsionado pela procura de pão de fermentação lenta e de produtos locais "
+    "vendidos diretamente aos clientes do bairro."
+)
+
+def test_hamming_distance():
+    assert hamming_distance(0b1011, 0b1011) == 0
+    assert hamming_distance(0b1011, 0b0010) == 2
+    assert hamming_distance(0, (1 << 64) - 1) == 64
+
+def test_shingles_are_normalized_word_triples():
+    assert shingles("Pão  Quente, Já!") == ["pao quente ja"]
+    assert shingles("Pão quente") == ["pao quente"]
+    assert shingles("") == []
+
+def test_simhash_ignores_case_accents_and_punctuation():
+    assert simhash(ARTICLE) == simhash(ARTICLE.upper().replace(",", "").replace("ã", "a"))
+    assert simhash("!!!") is None
+
+def test_near_duplicates_are_close_and_different_texts_are_far():
+    mirror = ARTICLE.replace("este ano", "em 2024")
+    other = "A previsão do tempo indica chuva forte no norte do país durante o fim de semana prolongado."
+    assert hamming_distance(simhash(ARTICLE), simhash(mirror)) < hamming_distance(simhash(ARTICLE), simhash(other))
+
+def test_index_returns_the_key_of_the_original_text():
+    index = FingerprintIndex(max_distance=3)
+    assert index.add_if_new(ARTICLE, "a") is None
+    assert index.add_if_new(ARTICLE + " ", "b") == "a"
+    assert index.add_if_new("Texto completamente diferente sobre futebol e desporto em geral.", "c") is None
+    assert index.add_if_new("", "d") is None